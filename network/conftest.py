@@ -0,0 +1,9 @@
+# the tests import the scripts here as top-level modules, as running them
+# does, so this directory goes on the path wherever pytest is started from
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# a manual script that sends one request to the live server, not a test
+collect_ignore = ["network_test.py"]
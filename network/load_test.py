@@ -0,0 +1,446 @@
+"""
+Load generator for the move server, grown out of network_test.py: instead of
+one hand-picked request, it plays whole games the way two clients do (clear
+both logs, alternate submit and polling query for every turn, save both
+logs), many at once.
+
+Games start on a fixed schedule (open loop), whether or not earlier ones
+have finished, so a slow server shows up as latency and a growing number of
+games in flight rather than as a quietly lower request rate. Requests share a
+pool of keep-alive connections; the time a request waits for a free one is
+reported apart from its latency.
+
+    python3 network/load_test.py [--endpoint=url] [--rate=games/s]
+        [--duration=s] [--turns=n] [--think=s] [--poll=s | --wait=s]
+        [--connections=n]
+
+With --wait, queries are long-polls that the server holds open until the
+move arrives (see network/server.py) instead of being repeated every --poll
+seconds; compare the two for delivery latency and request volume. Held
+queries get connections of their own, as many as are waiting at once, so
+they never hold up the submits they are waiting for.
+
+Only Python's standard library is needed; run network/server.py for a local
+target.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import ssl
+import sys
+import time
+from collections import defaultdict
+from typing import Any, Optional
+from urllib.parse import urlsplit
+
+
+DEFAULT_ENDPOINT = os.environ.get(
+    "SCSERVER_ENDPOINT", "http://127.0.0.1:8000/scserver/post")
+
+
+class Pool:
+    """
+    Keep-alive HTTP/1.1 connections to one endpoint: a fixed number, or with
+    no size, a new one whenever none is idle.
+    """
+    host: str
+    port: int
+    path: str
+    ssl: Optional[ssl.SSLContext]
+    size: Optional[int]
+    idle: asyncio.Queue
+    timeout: float
+
+    def __init__(self, endpoint: str, size: Optional[int], timeout: float):
+        url = urlsplit(endpoint)
+        self.host = url.hostname
+        self.port = url.port or (443 if url.scheme == "https" else 80)
+        self.path = url.path or "/"
+        self.ssl = ssl.create_default_context() if url.scheme == "https" else None
+        self.size = size
+        self.timeout = timeout
+        self.idle = asyncio.Queue()
+        for _ in range(size or 0):
+            # connected on first use
+            self.idle.put_nowait(None)
+
+    async def _connect(self):
+        return await asyncio.open_connection(self.host, self.port, ssl=self.ssl)
+
+    async def acquire(self):
+        """A connection to post() on, once one is free (None: not yet open)."""
+        if self.size is None and self.idle.empty():
+            return None
+        return await self.idle.get()
+
+    async def post(self, conn, body: dict) -> tuple[int, Any]:
+        """Sends body on an acquired connection and gives it back."""
+        payload = json.dumps(body).encode()
+        request = (
+            f"POST {self.path} HTTP/1.1\r\n" +
+            f"host: {self.host}\r\n" +
+            "content-type: application/json\r\n" +
+            f"content-length: {len(payload)}\r\n\r\n"
+        ).encode() + payload
+
+        try:
+            if conn is None:
+                conn = await asyncio.wait_for(self._connect(), self.timeout)
+            status, response, keep_alive = await asyncio.wait_for(
+                self._exchange(*conn, request), self.timeout)
+        except BaseException:
+            # a broken or timed-out connection is replaced, not reused
+            if conn is not None:
+                conn[1].close()
+            self.idle.put_nowait(None)
+            raise
+        if not keep_alive:
+            conn[1].close()
+            conn = None
+        self.idle.put_nowait(conn)
+        return status, response
+
+    @staticmethod
+    async def _exchange(
+            reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+            request: bytes) -> tuple[int, Any, bool]:
+        """
+        One request and its response: the status, the parsed body and
+        whether the connection may be reused. Raises ValueError on anything
+        that is not HTTP, so a connection is never read out of step.
+        """
+        writer.write(request)
+        await writer.drain()
+
+        head = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1")
+        lines = head.split("\r\n")
+        version, _, rest = lines[0].partition(" ")
+        code = rest[:3]
+        if not version.startswith("HTTP/") or not code.isdigit():
+            raise ValueError(f"bad status line: {lines[0]!r}")
+        headers = dict()
+        for line in lines[1:]:
+            name, sep, value = line.partition(":")
+            if sep:
+                headers[name.strip().lower()] = value.strip().lower()
+        keep_alive = (
+            headers.get("connection") != "close" and version == "HTTP/1.1")
+
+        # the original Node server sends chunked bodies
+        if "chunked" in headers.get("transfer-encoding", ""):
+            raw = await _read_chunked(reader)
+        elif "content-length" in headers:
+            raw = await reader.readexactly(int(headers["content-length"]))
+        elif not keep_alive:
+            raw = await reader.read()
+        else:
+            raw = b""
+        return int(code), json.loads(raw) if raw else None, keep_alive
+
+    async def close(self):
+        while not self.idle.empty():
+            conn = self.idle.get_nowait()
+            if conn is not None:
+                conn[1].close()
+
+
+async def _read_chunked(reader: asyncio.StreamReader) -> bytes:
+    body = bytearray()
+    while True:
+        size = int((await reader.readuntil(b"\r\n")).split(b";")[0], 16)
+        if size == 0:
+            # any trailers, up to the blank line that ends the response
+            while await reader.readuntil(b"\r\n") != b"\r\n":
+                pass
+            return bytes(body)
+        body += await reader.readexactly(size)
+        if await reader.readexactly(2) != b"\r\n":
+            raise ValueError("chunk without its line break")
+
+
+class Stats:
+    """Latencies and outcomes of every request, by action."""
+    # from sending a request to its response (or failure)
+    latencies: defaultdict[str, list[float]]
+    # waits for a free connection before sending
+    queued: defaultdict[str, list[float]]
+    # from a move being sent to the opponent having it
+    delivery: list[float]
+    errors: defaultdict[str, int]
+    pending: int
+    started: int
+    games: int
+    failed_games: int
+    in_flight: int
+    peak_in_flight: int
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.queued = defaultdict(list)
+        self.delivery = []
+        self.errors = defaultdict(int)
+        self.pending = 0
+        self.started = 0
+        self.games = 0
+        self.failed_games = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+
+async def request(
+        pool: Pool, stats: Stats, body: dict,
+        ok: tuple[int, ...] = (200,)) -> Optional[int]:
+    """Sends one action; the status, or None if the request itself failed."""
+    action = body["action"]
+    queued = time.perf_counter()
+    conn = await pool.acquire()
+    start = time.perf_counter()
+    stats.queued[action].append(start - queued)
+    try:
+        status, _ = await pool.post(conn, body)
+    except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError,
+            asyncio.LimitOverrunError, ValueError):
+        stats.latencies[action].append(time.perf_counter() - start)
+        stats.errors[action] += 1
+        return None
+    stats.latencies[action].append(time.perf_counter() - start)
+    if status not in ok:
+        stats.errors[action] += 1
+    return status
+
+
+def move_key(move_no: int) -> str:
+    return f"move-{move_no:03d}"
+
+
+async def play_game(
+        game_no: int, pool: Pool, queries: Pool, stats: Stats, args) -> bool:
+    """
+    One game between two simulated clients, white and black, as main.py
+    plays it: white clears both logs, then every turn the side to move
+    thinks and submits while the other side polls for the move. Queries go
+    through their own pool, which may be the same one.
+    """
+    tag = f"{os.getpid()}-{game_no}"
+    names = [f"load-{tag}-w", f"load-{tag}-b"]
+
+    for name in names:
+        if await request(pool, stats, {"action": "clear", "username": name}) != 200:
+            return False
+
+    for turn in range(args.turns):
+        # the waiting side reads the mover's log, as PlayerOnlineOpponent does
+        mover = names[turn % 2]
+        key = move_key(turn)
+        sent = []
+
+        async def submit():
+            await asyncio.sleep(random.expovariate(1 / args.think) if args.think else 0)
+            sent.append(time.perf_counter())
+            return await request(pool, stats, {
+                "action": "submit",
+                "username": mover,
+                "move": {
+                    "fr": [random.randrange(10), random.randrange(10)],
+                    "to": [random.randrange(10), random.randrange(10)],
+                    "capture": False
+                },
+                "key": key
+            })
+
+        async def poll():
+            # until the move shows up; a 404 just means not yet
+            query = {"action": "query", "username": mover, "key": key}
+            if args.wait:
+                query["wait"] = args.wait
+            while True:
+                if not args.wait:
+                    await asyncio.sleep(args.poll)
+                status = await request(queries, stats, query, (200, 404))
+                if status == 200:
+                    stats.delivery.append(time.perf_counter() - sent[0])
+                    return status
+                if status is None:
+                    return None
+                stats.pending += 1
+
+        submitted, received = await asyncio.gather(submit(), poll())
+        if submitted != 200 or received != 200:
+            return False
+
+    for name in names:
+        if await request(pool, stats, {"action": "save", "username": name}) != 200:
+            return False
+    return True
+
+
+async def run(args) -> tuple[Stats, float]:
+    pool = Pool(args.endpoint, args.connections, args.timeout)
+    # a held query must not wait for a connection behind the submits that
+    # would end it
+    queries = Pool(args.endpoint, None, args.timeout) if args.wait else pool
+    stats = Stats()
+    tasks = set()
+
+    async def game(game_no: int):
+        stats.started += 1
+        stats.in_flight += 1
+        stats.peak_in_flight = max(stats.peak_in_flight, stats.in_flight)
+        try:
+            if await play_game(game_no, pool, queries, stats, args):
+                stats.games += 1
+            else:
+                stats.failed_games += 1
+        except Exception:
+            # whatever went wrong, the game did not finish
+            stats.failed_games += 1
+        finally:
+            stats.in_flight -= 1
+
+    start = time.perf_counter()
+    game_no = 0
+    # games are started on schedule, not when a previous one finishes
+    while True:
+        due = start + game_no / args.rate
+        if due - start >= args.duration:
+            break
+        delay = due - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        task = asyncio.create_task(game(game_no))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+        game_no += 1
+
+    if tasks:
+        await asyncio.wait(tasks)
+    seconds = time.perf_counter() - start
+    await pool.close()
+    await queries.close()
+    return stats, seconds
+
+
+def percentile(sorted_values: list[float], p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    i = min(len(sorted_values) - 1, int(p / 100 * len(sorted_values)))
+    return sorted_values[i]
+
+
+def summarize(stats: Stats, seconds: float, args) -> dict:
+    actions = dict()
+    for action, latencies in sorted(stats.latencies.items()):
+        latencies.sort()
+        queued = sorted(stats.queued[action])
+        actions[action] = {
+            "requests": len(latencies),
+            "errors": stats.errors[action],
+            "error_rate": stats.errors[action] / len(latencies),
+            **{
+                f"p{p}_ms": 1000 * percentile(latencies, p)
+                for p in (50, 95, 99)
+            },
+            "max_ms": 1000 * latencies[-1],
+            "queued_p50_ms": 1000 * percentile(queued, 50),
+            "queued_p99_ms": 1000 * percentile(queued, 99),
+        }
+    requests = sum(len(latencies) for latencies in stats.latencies.values())
+    stats.delivery.sort()
+    return {
+        "endpoint": args.endpoint,
+        "rate": args.rate,
+        "turns": args.turns,
+        "connections": args.connections,
+        "seconds": seconds,
+        "games": stats.games,
+        "failed_games": stats.failed_games,
+        "unfinished_games": stats.started - stats.games - stats.failed_games,
+        "games_per_second": stats.games / seconds,
+        "requests_per_second": requests / seconds,
+        "peak_games_in_flight": stats.peak_in_flight,
+        "not_yet_found": stats.pending,
+        "delivery_p50_ms": 1000 * percentile(stats.delivery, 50),
+        "delivery_p99_ms": 1000 * percentile(stats.delivery, 99),
+        "actions": actions,
+    }
+
+
+def report(summary: dict):
+    print(
+        f"{summary['games']} games ({summary['failed_games']} failed" +
+        (f", {summary['unfinished_games']} unfinished"
+         if summary["unfinished_games"] else "") +
+        f") in " +
+        f"{summary['seconds']:.1f}s: {summary['games_per_second']:.1f} games/s, " +
+        f"{summary['requests_per_second']:.0f} requests/s, " +
+        f"{summary['peak_games_in_flight']} games in flight at peak"
+    )
+    print(
+        f"  moves reached the opponent in {summary['delivery_p50_ms']:.1f} ms " +
+        f"(p50), {summary['delivery_p99_ms']:.1f} ms (p99); " +
+        f"{summary['not_yet_found']} queries found nothing"
+    )
+    # latency, then the wait for a connection before it
+    print(f"  {'action':<8} {'requests':>9} {'errors':>7} " +
+          f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8} " +
+          f"{'queue p50':>10} {'queue p99':>10}")
+    for action, a in summary["actions"].items():
+        print(
+            f"  {action:<8} {a['requests']:>9} {a['error_rate']:>7.2%} " +
+            f"{a['p50_ms']:>8.1f} {a['p95_ms']:>8.1f} {a['p99_ms']:>8.1f} " +
+            f"{a['max_ms']:>8.1f} {a['queued_p50_ms']:>10.1f} " +
+            f"{a['queued_p99_ms']:>10.1f}"
+        )
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        prog=argv[0],
+        description="Play many simulated games against a move server and " +
+                    "report latency, errors and sustained games/s.")
+    parser.add_argument("--endpoint", default=DEFAULT_ENDPOINT)
+    parser.add_argument(
+        "--rate", type=float, default=50, help="games started per second")
+    parser.add_argument(
+        "--duration", type=float, default=10,
+        help="seconds to keep starting games for")
+    parser.add_argument("--turns", type=int, default=40, help="turns per game")
+    parser.add_argument(
+        "--think", type=float, default=0.1,
+        help="mean seconds before each move is submitted")
+    parser.add_argument(
+        "--poll", type=float, default=0.05,
+        help="seconds between queries for the opponent's move")
+    parser.add_argument(
+        "--wait", type=float, default=0,
+        help="long-poll, asking the server to hold each query this long")
+    parser.add_argument(
+        "--connections", type=int, default=256,
+        help="keep-alive connections, besides those of held queries")
+    parser.add_argument(
+        "--timeout", type=float, default=10, help="seconds per request")
+    parser.add_argument("--out", help="append the summary as a JSON line")
+    args = parser.parse_args(argv[1:])
+    if args.rate <= 0 or args.duration <= 0 or args.turns <= 0:
+        parser.error("--rate, --duration and --turns must be positive")
+    # a held query must not count as timed out
+    args.timeout = max(args.timeout, args.wait + 5)
+    return args
+
+
+def main(argv):
+    args = parse_args(argv)
+    stats, seconds = asyncio.run(run(args))
+    summary = summarize(stats, seconds, args)
+    report(summary)
+    if args.out is not None:
+        with open(args.out, "a") as out:
+            out.write(json.dumps(summary) + "\n")
+    sys.exit(
+        1 if summary["failed_games"] or summary["unfinished_games"] else 0)
+
+
+if __name__ == "__main__":
+    main(sys.argv)
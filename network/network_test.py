@@ -1,8 +1,10 @@
 import requests
 import json
+import os
 import sys
 
-url = "https://www.tylerdnguyen.com/scserver/post"
+url = os.environ.get(
+    "SCSERVER_ENDPOINT", "https://www.tylerdnguyen.com/scserver/post")
 
 match int(sys.argv[1]):
     case -2:
@@ -0,0 +1,127 @@
+import asyncio
+import json
+import unittest
+from typing import Callable, Optional
+from load_test import Pool, parse_args, run
+
+
+def _chunked(status: int, body: dict) -> bytes:
+    # the way Node frames a body it was not given a length for: in pieces,
+    # here with a chunk extension and a trailer for good measure
+    payload = json.dumps(body).encode()
+    half = len(payload) // 2
+    return (
+        f"HTTP/1.1 {status} X\r\ntransfer-encoding: chunked\r\n\r\n".encode() +
+        f"{half:x};ext=1\r\n".encode() + payload[:half] + b"\r\n" +
+        f"{len(payload) - half:X}\r\n".encode() + payload[half:] + b"\r\n" +
+        b"0\r\nx-trailer: 1\r\n\r\n"
+    )
+
+
+def _sized(status: int, body: dict) -> bytes:
+    payload = json.dumps(body).encode()
+    return (
+        f"HTTP/1.1 {status} X\r\ncontent-length: {len(payload)}\r\n\r\n"
+        .encode() + payload
+    )
+
+
+class _Server:
+    """
+    Answers the nth request on a connection with respond(n, body), which
+    may be empty bytes to answer nothing.
+    """
+    respond: Callable[[int, dict], bytes]
+    server: Optional[asyncio.Server]
+
+    def __init__(self, respond: Callable[[int, dict], bytes]):
+        self.respond = respond
+        self.server = None
+
+    async def _serve(self, reader, writer):
+        try:
+            n = 0
+            while True:
+                head = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1")
+                length = 0
+                for line in head.split("\r\n")[1:]:
+                    name, _, value = line.partition(":")
+                    if name.strip().lower() == "content-length":
+                        length = int(value)
+                body = json.loads(await reader.readexactly(length))
+                writer.write(self.respond(n, body))
+                await writer.drain()
+                n += 1
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def __aenter__(self) -> str:
+        self.server = await asyncio.start_server(self._serve, "127.0.0.1", 0)
+        port = self.server.sockets[0].getsockname()[1]
+        return f"http://127.0.0.1:{port}/scserver/post"
+
+    async def __aexit__(self, *exc):
+        self.server.close()
+        await self.server.wait_closed()
+
+
+async def _posts(endpoint: str, bodies: list[dict]) -> list[tuple[int, dict]]:
+    # on one connection, one after another
+    pool = Pool(endpoint, 1, 5)
+    try:
+        results = []
+        for body in bodies:
+            results.append(await pool.post(await pool.acquire(), body))
+        return results
+    finally:
+        await pool.close()
+
+
+class PoolTest(unittest.IsolatedAsyncioTestCase):
+    async def test_chunked_on_a_kept_connection(self):
+        async with _Server(lambda n, body: _chunked(200 + n, {"n": n})) as url:
+            results = await _posts(url, [{"action": "query"}] * 3)
+        self.assertEqual(results, [(200, {"n": 0}), (201, {"n": 1}), (202, {"n": 2})])
+
+    async def test_pipelined_responses(self):
+        # both responses arrive at once, after the first request: each
+        # exchange must take exactly its own
+        def respond(n: int, body: dict) -> bytes:
+            if n == 0:
+                return _chunked(200, {"n": 0}) + _sized(404, {"n": 1})
+            return b""
+
+        async with _Server(respond) as url:
+            results = await _posts(url, [{"action": "query"}] * 2)
+        self.assertEqual(results, [(200, {"n": 0}), (404, {"n": 1})])
+
+    async def test_bad_status_line(self):
+        async with _Server(lambda n, body: b"garbage\r\n\r\n") as url:
+            with self.assertRaises(ValueError):
+                await _posts(url, [{"action": "query"}])
+
+    async def test_games_against_a_chunked_server(self):
+        async with _Server(lambda n, body: _chunked(200, {"move": "pass"})) as url:
+            args = parse_args([
+                "load_test.py", f"--endpoint={url}", "--rate=20",
+                "--duration=0.2", "--turns=4", "--think=0",
+                "--connections=2"])
+            stats, _ = await run(args)
+        self.assertEqual(stats.games, stats.started)
+        self.assertGreater(stats.games, 0)
+
+    async def test_failures_are_counted(self):
+        async with _Server(lambda n, body: b"garbage\r\n\r\n") as url:
+            args = parse_args([
+                "load_test.py", f"--endpoint={url}", "--rate=20",
+                "--duration=0.2", "--turns=4", "--think=0",
+                "--connections=2"])
+            stats, _ = await run(args)
+        self.assertEqual(stats.games, 0)
+        self.assertEqual(stats.failed_games, stats.started)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,363 @@
+"""
+A local stand-in for starChessServer.js: the same clear / submit / query /
+save actions, JSON responses and status codes, with every move log held in
+memory instead of in files, so games can be played and tested offline. One
+asyncio process serves thousands of concurrent games over keep-alive
+connections.
+
+    python3 network/server.py [--host=127.0.0.1] [--port=8000] [--save-dir=d]
+
+then point the client at it with
+
+    SCSERVER_ENDPOINT=http://127.0.0.1:8000/scserver/post python3 main.py ...
+
+Any path is accepted. Saved logs are written to --save-dir the way the
+original server writes them to saved-logs/, and only counted without it.
+
+One extension: a query may ask to wait, {"action": "query", ..., "wait": s},
+in which case a move that is not there yet is answered as soon as it is
+submitted, within s seconds (at most MAX_WAIT), instead of with an immediate
+404. A 404 after waiting says how long it waited ("waited"), which is how
+clients tell this server from one that ignores "wait".
+
+Another: several actions may be sent in one request,
+
+    {"action": "batch", "actions": [{"action": "clear", ...}, ...]}
+
+which are carried out in order and answered together with 200 and
+{"responses": [{"status": ..., "body": ...}, ...]}, one per action, each
+exactly what the action alone would have got. A query that waits holds up
+the actions after it.
+
+And a username's whole log, or the part from a given move number on, comes
+back in one response to {"action": "history", "username": u, "from": n},
+as {"moves": {"move-NNN": move, ...}} in key order, so a client that
+restarted mid-game can catch up at once.
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from typing import Any, Optional
+
+
+# largest header block and body read from a client
+MAX_HEADER_BYTES = 16 << 10
+MAX_BODY_BYTES = 1 << 20
+# longest a query may be held open
+MAX_WAIT = 60.0
+# most actions in one batch
+MAX_BATCH = 256
+
+REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    413: "Payload Too Large",
+}
+
+
+class MoveServer:
+    """
+    The move logs of every username and the actions on them. handle() takes
+    a parsed request body and returns a status code and a response body.
+    """
+    logs: dict[str, dict[str, Any]]
+    # queries held open for a move, by (username, key)
+    waiters: dict[tuple[str, str], list[asyncio.Future]]
+    save_dir: Optional[str]
+    saves: int
+    requests: int
+
+    def __init__(self, save_dir: Optional[str] = None):
+        self.logs = dict()
+        self.waiters = dict()
+        self.save_dir = save_dir
+        self.saves = 0
+        self.requests = 0
+
+    async def handle(self, body: Any, req: dict) -> tuple[int, dict]:
+        self.requests += 1
+        action = body.get("action") if isinstance(body, dict) else None
+        handler = {
+            "submit": self.submit,
+            "query": self.query,
+            "clear": self.clear,
+            "save": self.save,
+            "batch": self.batch,
+            "history": self.history,
+        }.get(action)
+
+        if handler is None:
+            return 400, {
+                "msg": f"Unknown action: '{action}'.",
+                "req": req,
+                "body": body,
+                "err": ""
+            }
+        return await handler(body, req)
+
+    async def batch(self, body: dict, req: dict) -> tuple[int, dict]:
+        actions = body["actions"]
+        if not isinstance(actions, list) or len(actions) > MAX_BATCH:
+            return 400, {
+                "msg": f"Expected a list of at most {MAX_BATCH} actions.",
+                "req": req,
+                "body": body
+            }
+
+        responses = []
+        for action in actions:
+            if isinstance(action, dict) and action.get("action") == "batch":
+                status, result = 400, {
+                    "msg": "Batches cannot be nested.",
+                    "req": req,
+                    "body": action
+                }
+            else:
+                try:
+                    status, result = await self.handle(action, req)
+                except (ValueError, KeyError, TypeError, AttributeError) as e:
+                    status, result = 400, {
+                        "msg": "Server error encountered when processing " +
+                               "POST request.",
+                        "req": req,
+                        "body": action,
+                        "err": repr(e)
+                    }
+            responses.append({"status": status, "body": result})
+
+        return 200, {
+            "msg": f"Batch of {len(actions)} actions processed.",
+            "responses": responses
+        }
+
+    async def submit(self, body: dict, req: dict) -> tuple[int, dict]:
+        username, key = body["username"], body["key"]
+        self.logs.setdefault(username, dict())[key] = body["move"]
+        for waiter in self.waiters.pop((username, key), []):
+            if not waiter.done():
+                waiter.set_result(None)
+        return 200, {
+            "msg": f"Move from '{username}' with key '{key}' successfully recorded."
+        }
+
+    async def _wait_for(self, username: str, key: str, seconds: float):
+        waiter = asyncio.get_running_loop().create_future()
+        waiters = self.waiters.setdefault((username, key), [])
+        waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, seconds)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            # a submit takes the whole list; otherwise leave it to the rest
+            if waiter in waiters:
+                waiters.remove(waiter)
+                if not waiters and self.waiters.get((username, key)) is waiters:
+                    del self.waiters[(username, key)]
+
+    async def query(self, body: dict, req: dict) -> tuple[int, dict]:
+        username, key = body["username"], body["key"]
+        log = self.logs.get(username)
+
+        waited = None
+        if (log is None or key not in log) and "wait" in body:
+            start = time.monotonic()
+            await self._wait_for(
+                username, key, max(0.0, min(float(body["wait"]), MAX_WAIT)))
+            waited = time.monotonic() - start
+            log = self.logs.get(username)
+        extra = dict() if waited is None else {"waited": waited}
+
+        if log is None:
+            return 404, {
+                "msg": f"No move log found for '{username}'.",
+                "req": req,
+                "body": body,
+                **extra
+            }
+        if key not in log:
+            return 404, {
+                "msg": f"Move from '{username}' with key '{key}' not found in log.",
+                "req": req,
+                "body": body,
+                **extra
+            }
+        return 200, {
+            "msg": f"Move from '{username}' with key '{key}' successfully found.",
+            "move": log[key]
+        }
+
+    async def history(self, body: dict, req: dict) -> tuple[int, dict]:
+        username = body["username"]
+        first = int(body.get("from", 0))
+        log = self.logs.get(username)
+
+        if log is None:
+            return 404, {
+                "msg": f"No move log found for '{username}'.",
+                "req": req,
+                "body": body
+            }
+
+        moves = dict()
+        for key in sorted(log):
+            prefix, _, number = key.partition("-")
+            if prefix == "move" and number.isdigit() and int(number) >= first:
+                moves[key] = log[key]
+        return 200, {
+            "msg": f"{len(moves)} moves from '{username}' found.",
+            "moves": moves
+        }
+
+    async def clear(self, body: dict, req: dict) -> tuple[int, dict]:
+        username = body["username"]
+        self.logs.pop(username, None)
+        return 200, {
+            "msg": f"Move log for '{username}' successfully cleared."
+        }
+
+    async def save(self, body: dict, req: dict) -> tuple[int, dict]:
+        username = body["username"]
+        log = self.logs.get(username)
+
+        if log is None:
+            return 404, {
+                "msg": f"No log found for '{username}' to save.",
+                "req": req,
+                "body": body
+            }
+
+        self.saves += 1
+        if self.save_dir is not None:
+            path = os.path.join(
+                self.save_dir,
+                f"{int(time.time() * 1000)}-move-log-{username}.json")
+            # off the event loop, so a slow disk does not stall other games
+            await asyncio.to_thread(_write_json, path, dict(log))
+        return 200, {
+            "msg": f"Move log for '{username}' successfully saved."
+        }
+
+
+def _write_json(path: str, data: Any):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(data, f)
+
+
+async def _respond(
+        writer: asyncio.StreamWriter, status: int, body: dict, keep_alive: bool):
+    payload = json.dumps(body).encode()
+    writer.write(
+        f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n".encode() +
+        b"content-type: application/json\r\n" +
+        f"content-length: {len(payload)}\r\n".encode() +
+        (b"" if keep_alive else b"connection: close\r\n") +
+        b"\r\n" + payload
+    )
+    await writer.drain()
+
+
+async def _serve_connection(
+        server: MoveServer, reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter):
+    try:
+        while True:
+            try:
+                head = await reader.readuntil(b"\r\n\r\n")
+            except asyncio.IncompleteReadError:
+                # the client closed the connection between requests
+                return
+            except asyncio.LimitOverrunError:
+                await _respond(writer, 413, {"msg": "Headers too large."}, False)
+                return
+
+            lines = head.decode("latin-1").split("\r\n")
+            method, _, version = lines[0].split(" ", 2)
+            headers = dict()
+            for line in lines[1:]:
+                name, sep, value = line.partition(":")
+                if sep:
+                    headers[name.strip().lower()] = value.strip()
+            keep_alive = (
+                headers.get("connection", "").lower() != "close" and
+                version == "HTTP/1.1"
+            )
+            req = {"method": method, "headers": headers}
+
+            length = int(headers.get("content-length", 0))
+            if length > MAX_BODY_BYTES:
+                await _respond(writer, 413, {"msg": "Body too large."}, False)
+                return
+            raw = await reader.readexactly(length)
+
+            if method != "POST":
+                status, body = 400, {
+                    "msg": f"Expected 'POST', got '{method}'.",
+                    "req": req
+                }
+            elif headers.get("content-type", "").split(";")[0] != "application/json":
+                status, body = 400, {
+                    "msg": "Expected 'application/json', got " +
+                           f"'{headers.get('content-type')}'.",
+                    "req": req
+                }
+            else:
+                try:
+                    status, body = await server.handle(json.loads(raw), req)
+                except (ValueError, KeyError, TypeError, AttributeError) as e:
+                    status, body = 400, {
+                        "msg": "Server error encountered when processing " +
+                               "POST request.",
+                        "req": req,
+                        "body": raw.decode(errors="replace"),
+                        "err": repr(e)
+                    }
+
+            await _respond(writer, status, body, keep_alive)
+            if not keep_alive:
+                return
+    except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(
+        host: str, port: int, server: Optional[MoveServer] = None,
+        backlog: int = 4096) -> asyncio.Server:
+    """Starts serving on host:port and returns the listening asyncio.Server."""
+    server = MoveServer() if server is None else server
+    return await asyncio.start_server(
+        lambda r, w: _serve_connection(server, r, w),
+        host, port, limit=MAX_HEADER_BYTES, backlog=backlog)
+
+
+async def _main(args):
+    listener = await serve(args.host, args.port, MoveServer(args.save_dir))
+    addrs = ", ".join(
+        f"http://{s.getsockname()[0]}:{s.getsockname()[1]}"
+        for s in listener.sockets)
+    print(f"serving on {addrs}")
+    async with listener:
+        await listener.serve_forever()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Local in-memory stand-in for the star-chess move server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument(
+        "--save-dir", help="write saved move logs here (default: keep none)")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(_main(parse_args()))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,137 @@
+import os
+import random
+import unittest
+from mcts import random_legal
+from state.entities.bitboard import BitBoard
+from state.entities.board import Board
+from state.entities.color.color import Color
+from state.entities.move.coord import Coord
+from state.entities.piece import PieceType
+
+SPECS = [
+    os.path.join(os.path.dirname(__file__), "spec", name)
+    for name in ("simple.json", "standard.json")
+]
+
+
+def _attackers(board: Board, color: Color) -> dict[Coord, set[Coord]]:
+    # the old way: every piece of the color, and every capture it can make
+    attackers = dict()
+    for piece in board.pieces(color):
+        for move in piece.moves(board.board):
+            if move.capture:
+                attackers.setdefault(move.to, set()).add(piece.loc)
+    return attackers
+
+
+def _game_positions(board: Board, rng: random.Random, games: int, turns: int):
+    """Positions from random games, each left on the board while yielded."""
+    for _ in range(games):
+        color = Color.WHITE
+        made = 0
+        for _ in range(turns):
+            if random_legal(board, color, rng) is None:
+                break
+            made += 1
+            color = Color.other(color)
+            yield
+        for _ in range(made):
+            board.unmake()
+
+
+def _random_positions(board: Board, rng: random.Random, positions: int):
+    """Random placements of every piece type, with one king a side."""
+    squares = [
+        Coord(r, c) for r in range(board.n_rows) for c in range(board.n_cols)
+    ]
+    types = [t for t in board.rules if t is not PieceType.KING]
+    for _ in range(positions):
+        for coord in squares:
+            board.remove_piece(coord)
+        free = rng.sample(squares, 2 + rng.randrange(2, len(squares) // 2))
+        board.add_piece(PieceType.KING, Color.WHITE, free.pop())
+        board.add_piece(PieceType.KING, Color.BLACK, free.pop())
+        for coord in free:
+            board.add_piece(rng.choice(types), rng.choice(list(Color)), coord)
+        yield
+
+
+class CheckTest(unittest.TestCase):
+    """
+    Check detection, which looks outward from the attacked square, against
+    asking every piece whether it can capture there.
+    """
+
+    def check(self, board: Board):
+        w = board.n_cols
+        for color in Color:
+            captures = _attackers(board, color)
+            for target in board.pieces(Color.other(color)):
+                to = target.loc
+                self.assertEqual(
+                    board.attacked_by(to, color), to in captures,
+                    f"{color.name} attacks {to} in {board.to_fen()}")
+            k = board.king_loc(Color.other(color))
+            attackers = captures.get(k, set())
+            checks = board._checks(k, color)
+            self.assertEqual(
+                board.exists_check(Color.other(color)), bool(attackers))
+            self.assertEqual(bool(checks), bool(attackers))
+            for fr in attackers:
+                self.assertTrue(
+                    any(fr.r * w + fr.c in lands for lands, _ in checks),
+                    f"check from {fr} missed in {board.to_fen()}")
+
+    def test_game_positions(self):
+        for backend in (Board, BitBoard):
+            for spec in SPECS:
+                with self.subTest(backend=backend.__name__, spec=spec):
+                    board = backend.from_spec(spec)
+                    for _ in _game_positions(board, random.Random(1), 6, 50):
+                        self.check(board)
+
+    def test_random_positions(self):
+        for backend in (Board, BitBoard):
+            for spec in SPECS:
+                with self.subTest(backend=backend.__name__, spec=spec):
+                    board = backend(spec)
+                    for _ in _random_positions(board, random.Random(2), 150):
+                        self.check(board)
+
+
+class RandomLegalTest(unittest.TestCase):
+    def test_moves_are_legal(self):
+        for backend in (Board, BitBoard):
+            for spec in SPECS:
+                with self.subTest(backend=backend.__name__, spec=spec):
+                    board = backend.from_spec(spec)
+                    rng = random.Random(3)
+                    color = Color.WHITE
+                    for _ in range(200):
+                        legal = {m.id for m in board.position(color).legal}
+                        move = random_legal(board, color, rng)
+                        if move is None:
+                            self.assertFalse(legal)
+                            break
+                        self.assertIn(move.id, legal, board.to_fen())
+                        self.assertFalse(board.exists_check(color))
+                        color = Color.other(color)
+
+    def test_no_legal_move(self):
+        # a lone black king in the corner, boxed in by two rooks
+        board = Board(SPECS[1])
+        for r in range(board.n_rows):
+            for c in range(board.n_cols):
+                board.remove_piece(Coord(r, c))
+        top = board.n_rows - 1
+        board.add_piece(PieceType.KING, Color.BLACK, Coord(top, 0))
+        board.add_piece(PieceType.KING, Color.WHITE, Coord(0, board.n_cols - 1))
+        board.add_piece(PieceType.ROOK, Color.WHITE, Coord(top - 1, 5))
+        board.add_piece(PieceType.ROOK, Color.WHITE, Coord(top - 2, 1))
+        fen = board.to_fen()
+        self.assertIsNone(random_legal(board, Color.BLACK, random.Random(4)))
+        self.assertEqual(board.to_fen(), fen)
+
+
+if __name__ == "__main__":
+    unittest.main()
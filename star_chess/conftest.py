@@ -0,0 +1,7 @@
+# the modules here import each other as top-level modules, the way they are
+# run from this directory, so the tests need it on the path wherever pytest
+# is started from
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
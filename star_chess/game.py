@@ -1,6 +1,12 @@
+import os
+import time
+from typing import Optional
 from player import Player
 from frontend import Frontend
+from record import RecordWriter
 from thread import ThreadWithReturnValue
+from state.entities.color.color import Color
+from state.entities.move.move import Move
 from state.state import State
 
 
@@ -9,16 +15,32 @@ class Game():
     oppo: Player
     frontend: Frontend
     state: State
+    # a round still going after this many turns (moves and passes) ends with
+    # no winner; unlimited if None
+    max_turns: Optional[int]
+    # every round is appended to it as it is played, if given
+    record: Optional[RecordWriter]
 
-    def __init__(self, spec: str, user: Player, oppo: Player, frontend: Frontend):
+    def __init__(
+            self, spec: str, user: Player, oppo: Player, frontend: Frontend,
+            max_turns: Optional[int] = None,
+            record: Optional[RecordWriter] = None):
         self.user = user
         self.oppo = oppo
         if self.user.color == self.oppo.color:
             raise ValueError()
         self.frontend = frontend
         self.state = State(spec, user.color)
+        self.max_turns = max_turns
+        self.record = record
 
-    def play(self):
+    def play(self, resume: Optional[list[tuple[Optional[Move], bool]]] = None):
+        """
+        Plays rounds until the players stop. With resume, the first round
+        picks up after the given turns, (move, resign) pairs as players
+        return them; they are replayed without redrawing and the resulting
+        position is drawn once.
+        """
         self.frontend.display_init(self.state)
         self.user.game_begin()
 
@@ -26,7 +48,11 @@ class Game():
 
         while playing:
             self.state.reset()
-            self._play_round()
+            if resume is not None:
+                self.state.replay(resume)
+                self.frontend.display_update(self.state, None)
+            self._play_round(resume)
+            resume = None
 
             user_query = ThreadWithReturnValue(target=self.user.play_again)
             oppo_query = ThreadWithReturnValue(target=self.oppo.play_again)
@@ -48,21 +74,69 @@ class Game():
         self.user.game_end(self.state)
         self.frontend.display_end()
     
-    def _play_round(self):
-        self.user.round_begin()
-
-        while (not self.state.is_game_over()):
-            has_turn = self.user \
-                if self.state.has_turn is self.user.color \
-                else self.oppo
-            move, resign = has_turn.get_move(self.state)
-            if resign:
-                self.state.resign_player(has_turn.color)
-            elif move is None:
-                self.state.pass_turn()
-            else:
-                self.state.make_move(move)
-            self.frontend.display_update(
-                self.state, set() if move is None else {move.fr, move.to})
-        
+    def _tags(self) -> dict[str, str]:
+        white, black = (self.user, self.oppo) \
+            if self.user.color is Color.WHITE else (self.oppo, self.user)
+        return {
+            "Spec": os.path.basename(self.state.spec),
+            "White": _name(white),
+            "Black": _name(black),
+            "Date": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        }
+
+    def _play_round(self, resumed: Optional[list[tuple[Optional[Move], bool]]]):
+        if resumed is None:
+            self.user.round_begin()
+        else:
+            self.user.round_resume(resumed)
+        if self.record is not None:
+            self.record.begin(self._tags())
+            for move, resign in resumed or []:
+                self.record.turn(move, resign)
+
+        try:
+            while not self.state.is_game_over() and (
+                self.max_turns is None or self.state.turn_no < self.max_turns
+            ):
+                has_turn, waiting = (self.user, self.oppo) \
+                    if self.state.has_turn is self.user.color \
+                    else (self.oppo, self.user)
+                # pondering would only slow down an opponent thinking here,
+                # e.g. an engine in a tournament, and bias the result
+                if not has_turn.thinks:
+                    waiting.ponder_begin(self.state)
+                move, resign = has_turn.get_move(self.state)
+                if resign:
+                    self.state.resign_player(has_turn.color)
+                elif move is None:
+                    self.state.pass_turn()
+                else:
+                    self.state.make_move(move)
+                if self.record is not None:
+                    self.record.turn(move, resign)
+                self.frontend.display_update(
+                    self.state, set() if move is None else {move.fr, move.to})
+        except BaseException:
+            # the round is abandoned, but its record is still a complete game
+            if self.record is not None:
+                self.record.end("*")
+            raise
+
+        self.user.ponder_end()
+        self.oppo.ponder_end()
+        if self.record is not None:
+            self.record.end(
+                "1-0" if self.state.winner is Color.WHITE else
+                "0-1" if self.state.winner is Color.BLACK else
+                "1/2-1/2"
+            )
         self.user.round_end()
+
+
+def _name(player: Player) -> str:
+    # online players know their usernames and refereed engines their specs;
+    # anything else goes by its class
+    for attr in ("uname", "username", "name"):
+        if isinstance(getattr(player, attr, None), str):
+            return getattr(player, attr)
+    return type(player).__name__
@@ -0,0 +1,72 @@
+import os
+import unittest
+from typing import Optional
+from frontend import NullFrontend
+from game import Game
+from player import Player
+from state.entities.color.color import Color
+from state.entities.move.move import Move
+from state.state import State
+
+SPEC = os.path.join(os.path.dirname(__file__), "spec", "standard.json")
+
+
+class _Passer(Player):
+    """Passes a few times, then resigns, noting every turn it was asked to ponder."""
+    color: Color
+    passes: int
+    pondered: list[int]
+
+    def __init__(self, color: Color, thinks: bool, passes: int):
+        self.color = color
+        self.thinks = thinks
+        self.passes = passes
+        self.pondered = []
+
+    def get_move(self, state: State) -> tuple[Optional[Move], bool]:
+        self.passes -= 1
+        return None, self.passes < 0
+
+    def ponder_begin(self, state: State):
+        self.pondered.append(state.turn_no)
+
+    def play_again(self) -> bool:
+        return False
+
+    def rematch_rejected(self):
+        pass
+
+    def game_begin(self):
+        pass
+
+    def game_end(self, state: State):
+        pass
+
+    def round_begin(self):
+        pass
+
+    def round_end(self):
+        pass
+
+
+class PonderTest(unittest.TestCase):
+    def play(self, white_thinks: bool, black_thinks: bool) -> tuple[_Passer, _Passer]:
+        white = _Passer(Color.WHITE, white_thinks, 2)
+        black = _Passer(Color.BLACK, black_thinks, 2)
+        Game(SPEC, white, black, NullFrontend()).play()
+        return white, black
+
+    def test_ponders_on_a_player_that_does_not_think(self):
+        # white passes, black passes, ..., white resigns on turn 4
+        white, black = self.play(False, False)
+        self.assertEqual(white.pondered, [1, 3])
+        self.assertEqual(black.pondered, [0, 2, 4])
+
+    def test_never_on_an_engine_thinking_here(self):
+        white, black = self.play(True, False)
+        self.assertEqual(white.pondered, [1, 3])
+        self.assertEqual(black.pondered, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
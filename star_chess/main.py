@@ -1,16 +1,22 @@
 import sys
 from game import Game
-from player import PlayerOnlineFancyGUI, PlayerOnlineOpponent
-from frontend import FrontendFancyGUI
+from player_online import PlayerOnlineFancyGUI, PlayerOnlineOpponent
+from frontend_gui import FrontendFancyGUI
+from network import server_game_history
 from state.entities.color.color import Color
 
 
 def usage(argv):
-    print(f"usage: {argv[0]} --color={{w,b}} [--username=<username> --opponent=<opponent>]")
+    print(f"usage: {argv[0]} --color={{w,b}} [--username=<username> --opponent=<opponent>] [--resume]")
     sys.exit(1)
 
 
 def parse_args(argv):
+    # pick up a game in progress, e.g. after a crash, instead of a new one
+    resume = len(argv) > 1 and argv[-1] == "--resume"
+    if resume:
+        argv = argv[:-1]
+
     if len(argv) == 2 or len(argv) == 4:
         if argv[1] == "--color=w":
             color = Color.WHITE
@@ -37,11 +43,11 @@ def parse_args(argv):
         username = argv[2].split("--username")[1][1:]
         opponent = argv[3].split("--opponent")[1][1:]
 
-    return color, username, opponent
+    return color, username, opponent, resume
 
 
 def main(argv):
-    color, username, opponent = parse_args(argv)
+    color, username, opponent, resume = parse_args(argv)
 
     frontend = FrontendFancyGUI()
 
@@ -54,7 +60,14 @@ def main(argv):
         frontend
     )
 
-    game.play()
+    turns = None
+    if resume:
+        white, black = (user.uname, user.uname_opponent) \
+            if color is Color.WHITE else (user.uname_opponent, user.uname)
+        turns = server_game_history([white, black])
+        print(f"Resuming after {len(turns)} turns.")
+
+    game.play(turns)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,265 @@
+import math
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Optional
+from search import MoveId, evaluate, move_id
+from state.entities.board import Board
+from state.entities.color.color import Color
+from state.entities.move.move import Move
+
+
+# random moves a playout makes before it is cut off and scored by material.
+# Full-length playouts run to a few dozen a second on standard.json, against
+# about a thousand with this cutoff: random moves there are slow to settle a
+# game, and the material balance a short way in tells the tree about as much
+PLAYOUT_DEPTH = 20
+# playouts with no depth cutoff (None) that reach no checkmate stop here and
+# are scored by material, so a shuffling endgame cannot run forever
+MAX_PLAYOUT = 400
+
+
+def material_odds(board: Board, color: Color) -> float:
+    """Material balance mapped to a rough chance that the given color wins."""
+    return 1 / (1 + math.exp(-evaluate(board, color) / 400))
+
+
+def random_legal(board: Board, color: Color, rng: random.Random) -> Optional[Move]:
+    """
+    A random legal move, left made on the board: a random piece, then a
+    random one of its moves, skipping moves that leave the mover in check
+    and pieces left with none. Only the chosen piece's moves are generated,
+    so a playout move costs a fraction of generating the whole move list;
+    the price is that every piece that can move is equally likely, rather
+    than every move.
+    """
+    pieces = board.pieces(color)
+    while pieces:
+        i = rng.randrange(len(pieces))
+        moves = pieces[i].moves(board.board)
+        while moves:
+            j = rng.randrange(len(moves))
+            move = moves[j]
+            board.make(move)
+            if not board.exists_check(color):
+                return move
+            board.unmake()
+            moves[j] = moves[-1]
+            moves.pop()
+        pieces[i] = pieces[-1]
+        pieces.pop()
+    return None
+
+
+class Node:
+    # color: the side that played move to reach this node, so wins are
+    # counted from its point of view
+    move: Optional[Move]
+    color: Color
+    parent: Optional["Node"]
+    children: list["Node"]
+    untried: Optional[list[Move]]
+    visits: int
+    wins: float
+
+    def __init__(self, move: Optional[Move], color: Color, parent: Optional["Node"]):
+        self.move = move
+        self.color = color
+        self.parent = parent
+        self.children = []
+        self.untried = None
+        self.visits = 0
+        self.wins = 0.0
+
+    def select(self, exploration: float) -> "Node":
+        log_n = math.log(self.visits)
+        return max(
+            self.children,
+            key=lambda child:
+                child.wins / child.visits +
+                exploration * math.sqrt(log_n / child.visits)
+        )
+
+
+@dataclass
+class MCTSResult:
+    move: Optional[Move]
+    playouts: int
+    seconds: float
+    # root move -> (visits, wins for the side to move)
+    stats: dict[MoveId, tuple[int, float]]
+
+    @property
+    def playouts_per_second(self) -> float:
+        return self.playouts / self.seconds if self.seconds > 0 else 0.0
+
+
+class MCTS:
+    """
+    UCT Monte Carlo tree search. Each iteration walks the tree, expands one
+    move and finishes with a light playout of uniformly random legal moves,
+    all with make/unmake on the one board, which is restored afterwards.
+
+    Playouts stop after playout_depth moves (PLAYOUT_DEPTH by default, None
+    for full-length playouts) and are scored by material.
+    A side with no legal move loses if in check and otherwise passes; the
+    tree itself stops at such positions and leaves them to the playouts.
+    """
+    board: Board
+    budget: float
+    playout_depth: Optional[int]
+    exploration: float
+    rng: random.Random
+
+    def __init__(
+            self, board: Board, budget: float,
+            playout_depth: Optional[int] = PLAYOUT_DEPTH,
+            exploration: float = 1.4,
+            seed: Optional[int] = None):
+        self.board = board
+        self.budget = budget
+        self.playout_depth = playout_depth
+        self.exploration = exploration
+        self.rng = random.Random(seed)
+
+    def run(self, color: Color) -> MCTSResult:
+        start = time.perf_counter()
+        root = Node(None, Color.other(color), None)
+        root.untried = list(self.board.position(color).legal)
+        playouts = 0
+
+        if len(root.untried) > 0:
+            while time.perf_counter() - start < self.budget:
+                self._iterate(root)
+                playouts += 1
+
+        stats = {
+            move_id(child.move): (child.visits, child.wins)
+            for child in root.children
+        }
+        best = max(root.children, key=lambda child: child.visits, default=None)
+
+        return MCTSResult(
+            None if best is None else best.move,
+            playouts,
+            time.perf_counter() - start,
+            stats
+        )
+
+    def _iterate(self, root: Node):
+        board = self.board
+        node = root
+        made = 0
+
+        # selection
+        while node.untried is not None and not node.untried and node.children:
+            node = node.select(self.exploration)
+            board.make(node.move)
+            made += 1
+
+        # expansion
+        to_move = Color.other(node.color)
+        if node.untried is None:
+            node.untried = board.legal_moves(to_move)
+        if node.untried:
+            move = node.untried.pop(self.rng.randrange(len(node.untried)))
+            child = Node(move, to_move, node)
+            node.children.append(child)
+            node = child
+            board.make(move)
+            made += 1
+
+        # simulation, scored for the side that moved into node
+        result = self._playout(Color.other(node.color), node.color)
+
+        for _ in range(made):
+            board.unmake()
+
+        # backpropagation
+        while node is not None:
+            node.visits += 1
+            node.wins += result
+            result = 1 - result
+            node = node.parent
+
+    def _playout(self, to_move: Color, scored_for: Color) -> float:
+        board = self.board
+        rng = self.rng
+        limit = MAX_PLAYOUT if self.playout_depth is None else self.playout_depth
+        made = 0
+        passes = 0
+        result = None
+
+        for _ in range(limit):
+            move = random_legal(board, to_move, rng)
+            if move is None:
+                if board.exists_check(to_move):
+                    result = 0.0 if to_move is scored_for else 1.0
+                    break
+                board.pass_turn()
+                passes += 1
+            else:
+                made += 1
+            to_move = Color.other(to_move)
+
+        if result is None:
+            result = material_odds(board, scored_for)
+
+        for _ in range(made):
+            board.unmake()
+        # a pass only flips the side to move, so an odd count flips it back
+        if passes % 2 == 1:
+            board.pass_turn()
+
+        return result
+
+
+def _run_worker(
+        spec: str, board_cls: type[Board], fen: str, color: Color,
+        budget: float, playout_depth: Optional[int], seed: int) -> MCTSResult:
+    board = board_cls.from_spec(spec)
+    board.load_fen(fen)
+    result = MCTS(board, budget, playout_depth, seed=seed).run(color)
+    # the board is rebuilt in the parent, so only send plain data back
+    result.move = None
+    return result
+
+
+def parallel_mcts(
+        spec: str, board: Board, color: Color, budget: float, workers: int,
+        playout_depth: Optional[int] = PLAYOUT_DEPTH,
+        seed: Optional[int] = None) -> MCTSResult:
+    """
+    Root-parallel MCTS: every worker grows its own tree from the same
+    position for the whole budget, and root move statistics are summed.
+    """
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    fen = board.to_fen()
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(
+                _run_worker, spec, type(board), fen, color, budget,
+                playout_depth, rng.getrandbits(32))
+            for _ in range(workers)
+        ]
+        results = [future.result() for future in futures]
+
+    stats = dict()
+    for result in results:
+        for key, (visits, wins) in result.stats.items():
+            v, w = stats.get(key, (0, 0.0))
+            stats[key] = (v + visits, w + wins)
+
+    moves = {move_id(move): move for move in board.position(color).legal}
+    best = max(
+        sorted(stats), key=lambda key: stats[key][0], default=None)
+
+    return MCTSResult(
+        None if best is None else moves[best],
+        sum(result.playouts for result in results),
+        time.perf_counter() - start,
+        stats
+    )
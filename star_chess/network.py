@@ -1,111 +1,441 @@
 import requests
+import requests.adapters
 import json
+import random
 import time
 import os
-from typing import Any, Optional
-from state.entities.move.move import Move
+from typing import Any, Callable, Optional
+from state.entities.move.move import Move, SpecialMove
 from state.entities.move.coord import Coord
 
 
-POST_ENDPOINT = "https://www.tylerdnguyen.com/scserver/post"
+# the live server, unless SCSERVER_ENDPOINT points elsewhere (e.g. at a local
+# network/server.py); see also set_endpoint
+POST_ENDPOINT = os.environ.get(
+    "SCSERVER_ENDPOINT", "https://www.tylerdnguyen.com/scserver/post")
 HEADERS = {
     "content-type": "application/json"
 }
 MOVE_PASS = "pass"
 MOVE_FORFEIT = "forfeit"
 
+# how long a query asks the server to wait for a move that is not there yet
+LONG_POLL_SECONDS = 25.0
+# pauses between queries to servers that answer at once
+POLL_MIN_SECONDS = 0.25
+POLL_MAX_SECONDS = 3.0
+POLL_BACKOFF = 1.5
+# long polls in a row that may fail (a timeout, a dropped connection or a
+# 5xx) before polling instead, and for how long, before long polling again
+LONG_POLL_FAILURES = 3
+LONG_POLL_PAUSE_SECONDS = 60.0
+
+# moves asked for at a time when catching up without the history action
+HISTORY_CHUNK = 16
+
+# called after every attempt with the action, the status code (None if no
+# response came back), the seconds taken and the attempt number from 0
+TimingHook = Callable[[str, Optional[int], float, int], None]
+
+
+class ServerClient:
+    """
+    Talks to one move server over a pooled keep-alive session, so requests
+    after the first skip the TCP and TLS handshakes. Every request has
+    connect and read timeouts, and one that fails to connect, times out or
+    gets a 5xx is retried a few times after a jittered exponential pause;
+    every action is safe to repeat (a submit overwrites its own key).
+    """
+    endpoint: str
+    session: requests.Session
+    connect_timeout: float
+    read_timeout: float
+    retries: int
+    backoff: float
+    hooks: list[TimingHook]
+    # whether the server holds queries open, once known
+    long_poll: Optional[bool]
+    # long polls that have failed in a row, and until when (in
+    # time.monotonic seconds) to poll instead after too many
+    long_poll_failures: int
+    long_poll_paused: float
+    # whether the server takes batches of actions, once known
+    batches: Optional[bool]
+    # whether the server has the history action, once known
+    history: Optional[bool]
+
+    def __init__(
+            self, endpoint: str, connect_timeout: float = 5.0,
+            read_timeout: float = 15.0, retries: int = 3,
+            backoff: float = 0.5, pool_size: int = 4):
+        self.endpoint = endpoint
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update(HEADERS)
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.hooks = []
+        self.long_poll = None
+        self.long_poll_failures = 0
+        self.long_poll_paused = 0.0
+        self.batches = None
+        self.history = None
+
+    def add_hook(self, hook: TimingHook):
+        self.hooks.append(hook)
+
+    def _timed(self, action: str, status: Optional[int], start: float, attempt: int):
+        seconds = time.perf_counter() - start
+        for hook in self.hooks:
+            hook(action, status, seconds, attempt)
+
+    def post(
+            self, data: dict[str, Any], read_timeout: Optional[float] = None,
+            retries: Optional[int] = None) -> requests.Response:
+        """
+        Sends one request, retrying as described above. Raises the last
+        requests exception if no attempt got a response.
+        """
+        action = str(data.get("action"))
+        body = json.dumps(data)
+        timeout = (
+            self.connect_timeout,
+            self.read_timeout if read_timeout is None else read_timeout
+        )
+        retries = self.retries if retries is None else retries
+
+        for attempt in range(retries + 1):
+            start = time.perf_counter()
+            try:
+                response = self.session.post(
+                    self.endpoint, data=body, timeout=timeout)
+            except (requests.exceptions.ConnectionError,
+                    requests.exceptions.Timeout):
+                self._timed(action, None, start, attempt)
+                if attempt == retries:
+                    raise
+            else:
+                self._timed(action, response.status_code, start, attempt)
+                if response.status_code < 500 or attempt == retries:
+                    return response
+            # full jitter, so clients that failed together retry apart
+            time.sleep(random.uniform(0, self.backoff * 2 ** attempt))
+
+    def batch(self, actions: list[dict[str, Any]]) -> list[tuple[int, Any]]:
+        """
+        Sends several actions in one request if the server takes batches
+        (network/server.py does), or one by one if it does not, and returns
+        each one's status code and response body, in order.
+        """
+        if self.batches is not False and len(actions) > 1:
+            response = self.post({"action": "batch", "actions": actions})
+            if response.ok:
+                self.batches = True
+                return [
+                    (result["status"], result["body"])
+                    for result in json.loads(response.text)["responses"]
+                ]
+            if response.status_code != 400 or "batch" not in response.text:
+                raise ValueError(response.text)
+            # an unknown action to this server
+            self.batches = False
+
+        results = []
+        for action in actions:
+            response = self.post(action)
+            try:
+                body = json.loads(response.text)
+            except ValueError:
+                body = response.text
+            results.append((response.status_code, body))
+        return results
+
+    def close(self):
+        self.session.close()
+
+
+_client: Optional[ServerClient] = None
+
+
+def client() -> ServerClient:
+    """The client for POST_ENDPOINT that every server_* function uses."""
+    global _client
+    if _client is None or _client.endpoint != POST_ENDPOINT:
+        if _client is not None:
+            _client.close()
+        _client = ServerClient(POST_ENDPOINT)
+    return _client
+
+
+def set_endpoint(url: str):
+    global POST_ENDPOINT
+    POST_ENDPOINT = url
+
 
 def move_key(move_no: int) -> str:
     return f"move-{move_no:03d}"
 
 
 def server_ok_or_fail(data: dict[str, Any], ignore_codes: list[int] = []):
-    response = requests.post(
-        POST_ENDPOINT,
-        data=json.dumps(data),
-        headers=HEADERS
-    )
+    response = client().post(data)
 
     if not response.ok and response.status_code not in ignore_codes:
         raise ValueError(response.text)
 
 
-def server_clear(username: str):
-    server_ok_or_fail({
-        "action": "clear",
-        "username": username
-    })
+def server_batch_ok_or_fail(
+        actions: list[dict[str, Any]], ignore_codes: list[int] = []):
+    for status, body in client().batch(actions):
+        if not 200 <= status < 300 and status not in ignore_codes:
+            raise ValueError(json.dumps(body))
 
 
-def server_submit(username: str, move: Optional[Move], move_no: int):
-    if move is None:
-        server_submit_special(username, MOVE_PASS, move_no)
-    else:
-        req = {
-            "action": "submit",
-            "username": username,
-            "move": {
-                "fr": [move.fr.r, move.fr.c],
-                "to": [move.to.r, move.to.c],
-                "capture": move.capture
-            },
-            "key": move_key(move_no)
+def server_clear(*usernames: str):
+    # several usernames are cleared in one request where possible
+    server_batch_ok_or_fail([
+        {
+            "action": "clear",
+            "username": username
         }
-        if move.msg is not None:
-            req["move"]["msg"] = move.msg
-        server_ok_or_fail(req)
+        for username in usernames
+    ])
 
 
-def server_save(username: str):
-    server_ok_or_fail({
-        "action": "save",
-        "username": username
-    }, [404])
+def _submit_req(username: str, move: Optional[Move], move_no: int) -> dict:
+    if move is None:
+        return _submit_special_req(username, MOVE_PASS, move_no)
+
+    req = {
+        "action": "submit",
+        "username": username,
+        "move": {
+            "fr": [move.fr.r, move.fr.c],
+            "to": [move.to.r, move.to.c],
+            "capture": move.capture
+        },
+        "key": move_key(move_no)
+    }
+    if move.special is SpecialMove.HYPERDRIVE:
+        req["move"]["hyperdrive"] = True
+    if move.msg is not None:
+        req["move"]["msg"] = move.msg
+    return req
 
 
-def server_submit_special(username: str, move_special: str, move_no: int):
+def _submit_special_req(username: str, move_special: str, move_no: int) -> dict:
     if move_special not in (MOVE_PASS, MOVE_FORFEIT):
         raise ValueError(move_special)
-    
-    server_ok_or_fail({
+
+    return {
         "action": "submit",
         "username": username,
         "move": move_special,
         "key": move_key(move_no)
-    })
+    }
+
+
+def _save_req(username: str) -> dict:
+    return {
+        "action": "save",
+        "username": username
+    }
+
+
+def server_submit(
+        username: str, move: Optional[Move], move_no: int, save: bool = False):
+    # with save, the log is saved in the same request, for a final move
+    if save:
+        server_batch_ok_or_fail(
+            [_submit_req(username, move, move_no), _save_req(username)], [404])
+    else:
+        server_ok_or_fail(_submit_req(username, move, move_no))
+
+
+def server_save(username: str):
+    server_ok_or_fail(_save_req(username), [404])
+
+
+def server_submit_special(
+        username: str, move_special: str, move_no: int, save: bool = False):
+    req = _submit_special_req(username, move_special, move_no)
+    if save:
+        server_batch_ok_or_fail([req, _save_req(username)], [404])
+    else:
+        server_ok_or_fail(req)
+
+
+def server_query_many(
+        username: str, move_nos: list[int]
+) -> list[Optional[tuple[Optional[Move], bool]]]:
+    """
+    The given moves as far as they have been submitted, in one request where
+    possible, without waiting: None for each move not there yet.
+    """
+    results = client().batch([
+        {
+            "action": "query",
+            "username": username,
+            "key": move_key(move_no)
+        }
+        for move_no in move_nos
+    ])
+
+    moves = []
+    for status, body in results:
+        if status == 404:
+            moves.append(None)
+        elif not 200 <= status < 300:
+            raise ValueError(json.dumps(body))
+        else:
+            moves.append(_parse_move(body["move"]))
+    return moves
+
+
+def _parse_move(moveData: Any) -> tuple[Optional[Move], bool]:
+    if moveData == MOVE_PASS:
+        return None, False
+    elif moveData == MOVE_FORFEIT:
+        return None, True
+    else:
+        return Move(
+            Coord(*moveData["fr"]),
+            Coord(*moveData["to"]),
+            moveData["capture"],
+            SpecialMove.HYPERDRIVE if moveData.get("hyperdrive") else None,
+            moveData.get("msg", None)
+        ), False
 
 
 def server_query(username: str, move_no: int) -> tuple[Optional[Move], bool]:
+    """
+    Waits for the given move. Servers that hold a query open until the move
+    arrives (network/server.py) are long-polled, so the move comes back as
+    soon as it is submitted; others are polled, the pause between queries
+    growing from POLL_MIN_SECONDS to POLL_MAX_SECONDS while nothing arrives.
+    Only a server that answers a long poll at once is taken not to hold
+    queries open; when long polls fail LONG_POLL_FAILURES times in a row,
+    queries are polled for LONG_POLL_PAUSE_SECONDS before long polling
+    is tried again.
+    """
+    server = client()
+    delay = POLL_MIN_SECONDS
+
     while True:
-        # rate-limit the number of queries we are making
-        time.sleep(3)
+        long_poll = server.long_poll is not False and \
+            time.monotonic() >= server.long_poll_paused
+        req = {
+            "action": "query",
+            "username": username,
+            "key": move_key(move_no)
+        }
+
+        if long_poll:
+            req["wait"] = LONG_POLL_SECONDS
+            try:
+                response = server.post(
+                    req, read_timeout=LONG_POLL_SECONDS + 15, retries=0)
+            except (requests.exceptions.Timeout,
+                    requests.exceptions.ConnectionError):
+                response = None
+            if response is None or response.status_code >= 500:
+                # a network hiccup, or something along the way that will not
+                # hold a request open that long, e.g. a proxy that gives up
+                # with a 502 or 504 or drops the connection: after a few in
+                # a row, poll for a while
+                server.long_poll_failures += 1
+                if server.long_poll_failures >= LONG_POLL_FAILURES:
+                    server.long_poll_failures = 0
+                    server.long_poll_paused = \
+                        time.monotonic() + LONG_POLL_PAUSE_SECONDS
+                else:
+                    time.sleep(delay * random.uniform(0.75, 1.25))
+                    delay = min(delay * POLL_BACKOFF, POLL_MAX_SECONDS)
+                continue
+            server.long_poll_failures = 0
+        else:
+            response = server.post(req)
 
-        response = requests.post(
-            POST_ENDPOINT,
-            data=json.dumps({
-                "action": "query",
-                "username": username,
-                "key": move_key(move_no)
-            }),
-            headers=HEADERS
-        )
-        
         if response.status_code == 404:
-            continue
+            if long_poll:
+                # a server that knows the wait field says how long it waited
+                server.long_poll = "waited" in json.loads(response.text)
+                if server.long_poll:
+                    continue
+            # jittered, so clients that started together drift apart
+            time.sleep(delay * random.uniform(0.75, 1.25))
+            delay = min(delay * POLL_BACKOFF, POLL_MAX_SECONDS)
         elif not response.ok:
             raise ValueError(response.text)
         else:
-            moveData = json.loads(response.text)["move"]
+            return _parse_move(json.loads(response.text)["move"])
 
-            if moveData == MOVE_PASS:
-                return None, False
-            elif moveData == MOVE_FORFEIT:
-                return None, True
-            else:
-                return Move(
-                    Coord(*moveData["fr"]),
-                    Coord(*moveData["to"]),
-                    moveData["capture"],
-                    None,
-                    moveData.get("msg", None)
-                ), False
+
+def _move_no(key: str) -> Optional[int]:
+    prefix, _, number = key.partition("-")
+    return int(number) if prefix == "move" and number.isdigit() else None
+
+
+def server_game_history(
+        usernames: list[str], from_move: int = 0
+) -> list[tuple[Optional[Move], bool]]:
+    """
+    Every move of a game from the given move number on, both players' logs
+    merged by number up to the first one missing, as (move, resign) pairs
+    the way players return them. One request where the server has the
+    history action (network/server.py); otherwise the moves are queried a
+    chunk at a time, still without waiting.
+    """
+    server = client()
+    moves: dict[int, tuple[Optional[Move], bool]] = dict()
+
+    if server.history is not False:
+        results = server.batch([
+            {
+                "action": "history",
+                "username": username,
+                "from": from_move
+            }
+            for username in usernames
+        ])
+        if any(
+            status == 400 and "history" in json.dumps(body)
+            for status, body in results
+        ):
+            # an unknown action to this server
+            server.history = False
+        else:
+            server.history = True
+            for status, body in results:
+                if status == 404:
+                    continue
+                if not 200 <= status < 300:
+                    raise ValueError(json.dumps(body))
+                for key, move in body["moves"].items():
+                    move_no = _move_no(key)
+                    if move_no is not None:
+                        moves[move_no] = _parse_move(move)
+
+    if server.history is False:
+        first = from_move
+        while True:
+            chunk = list(range(first, first + HISTORY_CHUNK))
+            found = [server_query_many(username, chunk) for username in usernames]
+            for move_no, turns in zip(chunk, zip(*found)):
+                for turn in turns:
+                    if turn is not None:
+                        moves[move_no] = turn
+            if any(move_no not in moves for move_no in chunk):
+                break
+            first += HISTORY_CHUNK
+
+    history = []
+    move_no = from_move
+    while move_no in moves:
+        history.append(moves[move_no])
+        move_no += 1
+    return history
@@ -0,0 +1,129 @@
+import json
+import unittest
+from typing import Any, Optional, Union
+from unittest import mock
+
+try:
+    import requests
+    import network
+except ImportError:
+    requests = None
+
+MOVE = {"fr": [1, 1], "to": [2, 1], "capture": False}
+
+
+class _Response:
+    """What the server loop reads of a requests.Response."""
+    status_code: int
+    text: str
+    ok: bool
+
+    def __init__(self, status_code: int, body: dict):
+        self.status_code = status_code
+        self.text = json.dumps(body)
+        self.ok = status_code < 400
+
+
+def _client(answers: list[Union[_Response, Exception]]):
+    """A client that answers each post with the next answer, keeping the requests."""
+
+    class _Client(network.ServerClient):
+        answers: list[Union[_Response, Exception]]
+        sent: list[dict[str, Any]]
+
+        def post(
+                self, data: dict[str, Any], read_timeout: Optional[float] = None,
+                retries: Optional[int] = None) -> _Response:
+            self.sent.append(data)
+            answer = self.answers.pop(0)
+            if isinstance(answer, Exception):
+                raise answer
+            return answer
+
+    client = _Client(network.POST_ENDPOINT)
+    client.answers = answers
+    client.sent = []
+    return client
+
+
+@unittest.skipIf(requests is None, "requests is not installed")
+class ServerQueryTest(unittest.TestCase):
+    def setUp(self):
+        self.now = 0.0
+        patches = [
+            mock.patch.object(network.time, "sleep"),
+            mock.patch.object(network.time, "monotonic", lambda: self.now),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.addCleanup(setattr, network, "_client", network._client)
+
+    def query(self, answers: list[Union[_Response, Exception]], client=None):
+        if client is None:
+            client = _client(answers)
+        else:
+            client.answers, client.sent = answers, []
+        network._client = client
+        move, resign = network.server_query("luke", 0)
+        self.assertFalse(resign)
+        self.assertEqual((move.fr.r, move.fr.c, move.to.r, move.to.c), (1, 1, 2, 1))
+        return network._client
+
+    def waited(self, client) -> list[bool]:
+        return ["wait" in sent for sent in client.sent]
+
+    def test_long_poll(self):
+        client = self.query([
+            _Response(404, {"waited": 25}),
+            _Response(200, {"move": MOVE}),
+        ])
+        self.assertEqual(self.waited(client), [True, True])
+        self.assertIs(client.long_poll, True)
+
+    def test_wait_not_supported(self):
+        client = self.query([
+            _Response(404, {"error": "not found"}),
+            _Response(404, {"error": "not found"}),
+            _Response(200, {"move": MOVE}),
+        ])
+        self.assertEqual(self.waited(client), [True, False, False])
+        self.assertIs(client.long_poll, False)
+
+    def test_hiccups(self):
+        client = self.query([
+            requests.exceptions.Timeout(),
+            _Response(502, {}),
+            _Response(404, {"waited": 25}),
+            requests.exceptions.ConnectionError(),
+            _Response(200, {"move": MOVE}),
+        ])
+        # three failures, but not in a row: never a pause
+        self.assertEqual(self.waited(client), [True] * 5)
+        self.assertIsNot(client.long_poll, False)
+        self.assertEqual(client.long_poll_failures, 0)
+
+    def test_pause_after_repeated_failures(self):
+        failures = network.LONG_POLL_FAILURES
+        client = self.query(
+            [_Response(504, {})] * failures + [
+                _Response(404, {"error": "not found"}),
+                _Response(200, {"move": MOVE}),
+            ])
+        self.assertEqual(self.waited(client), [True] * failures + [False, False])
+        self.assertIsNot(client.long_poll, False)
+
+        # still polling during the pause, and long polling again after it
+        self.query([
+            _Response(404, {"error": "not found"}),
+            _Response(200, {"move": MOVE}),
+        ], client)
+        self.assertEqual(self.waited(client), [False, False])
+
+        self.now += network.LONG_POLL_PAUSE_SECONDS
+        self.query([_Response(200, {"move": MOVE})], client)
+        self.assertEqual(self.waited(client), [True])
+
+
+if __name__ == "__main__":
+    unittest.main()
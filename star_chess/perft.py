@@ -0,0 +1,277 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+from state.entities.board import Board
+from state.entities.bitboard import BitBoard
+from state.entities.color.color import Color
+from state.entities.move.move import Move
+
+
+# leaf counts from the starting position with white to move, by spec file
+# name and depth; a move is legal if it does not leave the mover in check, and
+# neither passing nor hyperdrive is counted. They were counted with the
+# legal move filter as it stood when this file was added, before the position
+# cache and move generation from checkers and pins, and every one of them
+# agrees with a brute force that does not even use the outward check test:
+# each piece's own moves, made and kept unless a piece of the other color
+# could then capture the king. perft_test.py repeats the brute force for the
+# shallow depths and checks both backends against them
+REFERENCE: dict[str, dict[int, int]] = {
+    "simple.json": {
+        1: 11,
+        2: 121,
+        3: 1244,
+        4: 11297,
+        5: 103144,
+    },
+    "standard.json": {
+        1: 72,
+        2: 5184,
+        3: 372648,
+    },
+}
+
+BACKENDS: dict[str, type[Board]] = {
+    "board": Board,
+    "bitboard": BitBoard,
+}
+
+
+def perft(board: Board, color: Color, depth: int) -> int:
+    if depth <= 0:
+        return 1
+
+    moves = board.legal_moves(color)
+
+    if depth == 1:
+        return len(moves)
+
+    nodes = 0
+    for move in moves:
+        board.make(move)
+        nodes += perft(board, Color.other(color), depth - 1)
+        board.unmake()
+    return nodes
+
+
+def divide(board: Board, color: Color, depth: int) -> dict[str, int]:
+    counts = dict()
+    for move in board.legal_moves(color):
+        board.make(move)
+        counts[str(move)] = perft(board, Color.other(color), depth - 1)
+        board.unmake()
+    return counts
+
+
+# per-process state for parallel runs: each worker rebuilds the root position
+# once from its FEN and is then only sent root moves as coordinate tuples
+_worker_board: Optional[Board] = None
+_worker_moves: dict[tuple[int, int, int, int], Move] = dict()
+
+
+def _move_id(move: Move) -> tuple[int, int, int, int]:
+    return move.fr.r, move.fr.c, move.to.r, move.to.c
+
+
+def _init_worker(spec: str, backend: str, fen: str):
+    global _worker_board, _worker_moves
+    _worker_board = BACKENDS[backend](spec)
+    _worker_board.load_fen(fen)
+    _worker_moves = {
+        _move_id(move): move
+        for move in _worker_board.legal_moves(_worker_board.turn)
+    }
+
+
+def _perft_root_move(job: tuple[tuple[int, int, int, int], int]) -> int:
+    move_id, depth = job
+    board = _worker_board
+    board.make(_worker_moves[move_id])
+    nodes = perft(board, board.turn, depth - 1)
+    board.unmake()
+    return nodes
+
+
+def parallel_divide(
+        spec: str, backend: str, board: Board, depth: int,
+        workers: int) -> tuple[dict[str, int], float]:
+    """
+    divide() with root moves spread across a process pool. Returns the counts
+    sorted by root move coordinates, regardless of which worker finished
+    first, and the time spent starting the pool.
+    """
+    # set iteration order differs between processes, so moves are sent by
+    # coordinates rather than by their index in a worker's own move list
+    moves = sorted(board.legal_moves(board.turn), key=_move_id)
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(spec, backend, board.to_fen())
+    ) as pool:
+        # wait for every worker to come up, so startup is timed on its own
+        list(pool.map(time.sleep, [0] * workers))
+        startup = time.perf_counter() - start
+
+        counts = pool.map(
+            _perft_root_move,
+            [(_move_id(move), depth) for move in moves]
+        )
+
+    return dict(zip(map(str, moves), counts)), startup
+
+
+def reference(spec: str, depth: int) -> Optional[int]:
+    return REFERENCE.get(os.path.basename(spec), dict()).get(depth)
+
+
+def run(
+        spec: str, depth: int, backend: str, show_divide: bool,
+        workers: Optional[int] = None) -> dict:
+    board = BACKENDS[backend](spec)
+    startup = None
+
+    start = time.perf_counter()
+    if workers is not None:
+        counts, startup = parallel_divide(spec, backend, board, depth, workers)
+        nodes = sum(counts.values())
+    elif show_divide:
+        counts = divide(board, Color.WHITE, depth)
+        nodes = sum(counts.values())
+    else:
+        counts = None
+        nodes = perft(board, Color.WHITE, depth)
+    seconds = time.perf_counter() - start
+
+    expected = reference(spec, depth)
+
+    result = {
+        "spec": os.path.basename(spec),
+        "depth": depth,
+        "backend": backend,
+        "nodes": nodes,
+        "seconds": seconds,
+        "nps": nodes / seconds if seconds > 0 else None,
+        "expected": expected,
+        "ok": None if expected is None else nodes == expected,
+        "workers": workers,
+        "startup_seconds": startup,
+        "python": platform.python_version(),
+        "time": time.time(),
+    }
+    if counts is not None and show_divide:
+        result["divide"] = counts
+    return result
+
+
+def scaling(spec: str, depth: int, backend: str, max_workers: int) -> list[dict]:
+    """
+    Runs the same parallel count with 1, 2, 4, ... max_workers processes and
+    adds speedup and efficiency (speedup per worker) relative to one worker.
+    """
+    counts = sorted({
+        *[2 ** i for i in range(max_workers.bit_length()) if 2 ** i <= max_workers],
+        max_workers
+    })
+    results = [run(spec, depth, backend, False, n) for n in counts]
+    base = results[0]["seconds"]
+    for result in results:
+        result["speedup"] = base / result["seconds"]
+        result["efficiency"] = result["speedup"] / result["workers"]
+    return results
+
+
+def report(result: dict):
+    for move, count in result.get("divide", dict()).items():
+        print(f"  {move}: {count}")
+
+    status = {None: "", True: " ok", False: " MISMATCH"}[result["ok"]]
+    line = (
+        f"{result['spec']} depth {result['depth']}: {result['nodes']} nodes " +
+        f"in {result['seconds']:.3f}s ({result['nps'] or 0:.0f} nodes/s)"
+    )
+    if result["workers"] is not None:
+        line += (
+            f" with {result['workers']} workers " +
+            f"({result['startup_seconds']:.3f}s pool startup)"
+        )
+    if "speedup" in result:
+        line += (
+            f", speedup {result['speedup']:.2f}x, " +
+            f"efficiency {result['efficiency']:.0%}"
+        )
+    print(line + status)
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        prog=argv[0],
+        description="Count leaf nodes of the legal move tree to a fixed depth."
+    )
+    parser.add_argument(
+        "--spec", action="append",
+        help="spec file to run (repeatable); defaults to both bundled specs")
+    parser.add_argument(
+        "--depth", type=int,
+        help="depth to search; defaults to every depth with a reference count")
+    parser.add_argument(
+        "--backend", choices=BACKENDS.keys(), default="board")
+    parser.add_argument(
+        "--divide", action="store_true",
+        help="break the count down per root move")
+    parser.add_argument(
+        "--workers", type=int,
+        help="split root moves across this many worker processes")
+    parser.add_argument(
+        "--scaling", action="store_true",
+        help="repeat with 1, 2, 4, ... --workers processes and report " +
+             "speedup and efficiency")
+    parser.add_argument(
+        "--out", help="append one JSON result per line to this file")
+    args = parser.parse_args(argv[1:])
+    # divide and the workers search each root move to depth - 1
+    if args.depth is not None and args.depth < 1:
+        parser.error("--depth must be at least 1")
+    return args
+
+
+def main(argv):
+    args = parse_args(argv)
+
+    specs = args.spec or ["./spec/simple.json", "./spec/standard.json"]
+    failed = False
+
+    for spec in specs:
+        depths = (
+            [args.depth] if args.depth is not None else
+            sorted(REFERENCE.get(os.path.basename(spec), {1: None}).keys())
+        )
+
+        for depth in depths:
+            if args.scaling:
+                results = scaling(
+                    spec, depth, args.backend, args.workers or os.cpu_count())
+            else:
+                results = [
+                    run(spec, depth, args.backend, args.divide, args.workers)
+                ]
+
+            for result in results:
+                report(result)
+                failed = failed or result["ok"] is False
+
+                if args.out is not None:
+                    with open(args.out, "a") as out:
+                        out.write(json.dumps(result) + "\n")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,58 @@
+import os
+import unittest
+from perft import BACKENDS, REFERENCE, perft
+from state.entities.board import Board
+from state.entities.color.color import Color
+
+SPEC_DIR = os.path.join(os.path.dirname(__file__), "spec")
+# depths the brute force gets through in a few seconds
+DEPTHS = {"simple.json": 4, "standard.json": 2}
+
+
+def _in_check(board: Board, color: Color) -> bool:
+    # the slow way: can any piece of the other color capture the king?
+    k = board.king_loc(color)
+    return any(
+        move.capture and move.to == k
+        for piece in board.pieces(Color.other(color))
+        for move in piece.moves(board.board)
+    )
+
+
+def _brute_perft(board: Board, color: Color, depth: int) -> int:
+    """Leaf count using only make, unmake and each piece's own moves."""
+    if depth == 0:
+        return 1
+    nodes = 0
+    for piece in board.pieces(color):
+        for move in piece.moves(board.board):
+            board.make(move)
+            if not _in_check(board, color):
+                nodes += _brute_perft(board, Color.other(color), depth - 1)
+            board.unmake()
+    return nodes
+
+
+class PerftTest(unittest.TestCase):
+    def test_reference_by_brute_force(self):
+        for spec, depth in DEPTHS.items():
+            for d in range(1, depth + 1):
+                with self.subTest(spec=spec, depth=d):
+                    board = Board(os.path.join(SPEC_DIR, spec))
+                    self.assertEqual(
+                        _brute_perft(board, Color.WHITE, d), REFERENCE[spec][d])
+
+    def test_backends(self):
+        for name, backend in BACKENDS.items():
+            for spec, depth in DEPTHS.items():
+                for d in range(1, depth + 1):
+                    with self.subTest(backend=name, spec=spec, depth=d):
+                        board = backend(os.path.join(SPEC_DIR, spec))
+                        fen = board.to_fen()
+                        self.assertEqual(
+                            perft(board, Color.WHITE, d), REFERENCE[spec][d])
+                        self.assertEqual(board.to_fen(), fen)
+
+
+if __name__ == "__main__":
+    unittest.main()
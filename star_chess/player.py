@@ -1,16 +1,22 @@
 from abc import ABC, abstractmethod
+from math import inf
+from threading import Event
 from typing import Optional
-from frontend import FrontendFancyGUI
-from network import MOVE_PASS, MOVE_FORFEIT, server_clear, server_submit, \
-    server_submit_special, server_query, server_save
+from mcts import MCTS, PLAYOUT_DEPTH, MCTSResult, parallel_mcts
+from search import Search, SearchResult, move_id
+from thread import ThreadWithReturnValue
+from transposition import TranspositionTable
 from state.entities.color.color import Color
-from state.entities.move.move import Move, SpecialMove
+from state.entities.move.move import Move
 from state.entities.move.coord import Coord
 from state.state import State
 
 
 class Player(ABC):
     color: Color
+    # whether get_move keeps this process busy computing, so that an
+    # opponent pondering in the same process would be taking its time
+    thinks: bool = False
 
     @abstractmethod
     def get_move(self, state: State) -> tuple[Optional[Move], bool]:
@@ -40,6 +46,21 @@ class Player(ABC):
     def round_end(self):
         pass
 
+    # called by Game while the other player is choosing a move, for players
+    # that can use the time, unless the other player thinks in this same
+    # process (so only in local games: online, main.py plays a person against
+    # the server); get_move and ponder_end must stop whatever this started
+    def ponder_begin(self, state: State):
+        pass
+
+    def ponder_end(self):
+        pass
+
+    # called instead of round_begin when a round picks up where it left off,
+    # after the given turns so far have been replayed
+    def round_resume(self, turns: list[tuple[Optional[Move], bool]]):
+        self.round_begin()
+
 
 
 class PlayerCLI(Player):
@@ -109,8 +130,8 @@ class PlayerRandomAI(Player):
         n = int(state.board.n_squares() * self.tenacity)
 
         for _ in range(n):
-            fr = Coord.random(state.board.n_rows(), state.board.n_cols())
-            to = Coord.random(state.board.n_rows(), state.board.n_cols())
+            fr = Coord.random(state.board.n_rows, state.board.n_cols)
+            to = Coord.random(state.board.n_rows, state.board.n_cols)
 
             moving = state.board.piece_at(fr)
 
@@ -150,52 +171,115 @@ class PlayerRandomAI(Player):
         raise Exception(f"{self.__class__}:{func} should not be called")
 
 
-class PlayerFancyGUI(Player):
+class PlayerSearchAI(Player):
     color: Color
-    frontend: FrontendFancyGUI
+    thinks: bool = True
+    budget: float
+    max_depth: int
+    table: TranspositionTable
+    ponder: bool
+    # (key of the pondered position, its search, the thread running it)
+    pondering: Optional[tuple[int, Search, ThreadWithReturnValue]]
+    last: Optional[SearchResult]
 
-    def __init__(self, color: Color, frontend: FrontendFancyGUI):
+    def __init__(
+            self, color: Color, budget: float = 2.0, max_depth: int = 64,
+            table_bytes: int = 16 << 20, ponder: bool = False):
         self.color = color
-        self.frontend = frontend
+        self.budget = budget
+        self.max_depth = max_depth
+        self.table = TranspositionTable(table_bytes)
+        self.ponder = ponder
+        self.pondering = None
+        self.last = None
 
     def get_move(self, state: State) -> tuple[Optional[Move], bool]:
-        fr = None
-        to = None
-
-        while fr is None or to is None:
-            cmd = input("$ ")
-
-            if cmd in ["quit", "exit", "forfeit", "concede"]:
+        self.last = self._ponder_result(state)
+        ponder_hit = self.last is not None
+
+        if self.last is None:
+            search = Search(
+                state.board, self.budget, self.max_depth, self.table)
+            self.last = search.run(self.color)
+
+        print(
+            f"# depth {self.last.depth}, {self.last.nodes} nodes " +
+            f"in {self.last.seconds:.2f}s ({self.last.nps:.0f} nodes/s), " +
+            f"table hit rate {self.table.stats()['hit_rate']:.0%}" +
+            (", ponder hit" if ponder_hit else "")
+        )
+
+        if self.last.move is None:
+            if state.board.position(self.color).in_check:
+                print("# opponent resigned")
                 return None, True
-
-            fr = self.frontend.move_fr
-            to = self.frontend.move_to
-        
-        moving = state.board.piece_at(fr)
-
-        if moving is None:
+            print("# opponent passed the turn")
             return None, False
-        else:
-            return moving.can_move_to(state.board.board, to), False
+
+        print(f"# {self.last.move} played by opponent")
+        return self.last.move, False
+
+    def ponder_begin(self, state: State):
+        if not self.ponder or state.is_game_over():
+            return
+        self.ponder_end()
+
+        # guess the reply our last search expected, and search the position
+        # it leads to on a copy of the board until told to stop
+        entry = self.table.probe(state.board.key)
+        if entry is None or entry[3] is None:
+            return
+        guess = next((
+            move for move in state.board.position(state.has_turn).legal
+            if move_id(move) == entry[3]
+        ), None)
+        if guess is None:
+            return
+
+        board = state.board_copy()
+        board.make(guess)
+        search = Search(board, inf, self.max_depth, self.table, Event())
+        thread = ThreadWithReturnValue(target=search.run, args=(self.color,))
+        thread.daemon = True
+        self.pondering = (board.key, search, thread)
+        thread.start()
+
+    def _ponder_result(self, state: State) -> Optional[SearchResult]:
+        if self.pondering is None:
+            return None
+        key, search, thread = self.pondering
+        self.pondering = None
+
+        if key != state.board.key:
+            # ponder miss: the table keeps what the search found
+            search.stop.set()
+            thread.join()
+            return None
+
+        # ponder hit: let the search finish as if it had been started when
+        # pondering began, which may be immediately
+        search.budget = self.budget
+        result = thread.join()
+        return result if result.move is not None else None
+
+    def ponder_end(self):
+        if self.pondering is not None:
+            _, search, thread = self.pondering
+            self.pondering = None
+            search.stop.set()
+            thread.join()
 
     def play_again(self) -> bool:
         return False
-    
+
     def rematch_rejected(self):
         pass
 
     def game_begin(self):
-        print("It's time to do battle, captain!")
-        print("Click to select which ship to move.")
-        print("Shift-click to select where to move.")
-        print("Press [enter] in the terminal to submit move.")
-        print("Illegal moves will be rejected and counted as a pass.")
+        pass
 
     def game_end(self, state: State):
-        if state.winner == self.color:
-            print("Well fought, captain!")
-        else:
-            print("Retreat for now, captain!")
+        pass
 
     def round_begin(self):
         pass
@@ -204,198 +288,62 @@ class PlayerFancyGUI(Player):
         pass
 
 
-class PlayerOnlineFancyGUI(Player):
+class PlayerMCTS(Player):
     color: Color
-    frontend: FrontendFancyGUI
-    uname: str
-    uname_opponent: str
-    used_hyperdrive: bool
+    thinks: bool = True
+    budget: float
+    workers: int
+    playout_depth: Optional[int]
+    last: Optional[MCTSResult]
 
     def __init__(
-            self, color: Color, frontend: FrontendFancyGUI,
-            username: Optional[str] = None, opponent: Optional[str] = None):
+            self, color: Color, budget: float = 2.0, workers: int = 1,
+            playout_depth: Optional[int] = PLAYOUT_DEPTH):
         self.color = color
-        self.frontend = frontend
-        self.uname = self.color.name if username is None else username
-        self.uname_opponent = \
-            Color.other(self.color).name if opponent is None else opponent
-        self.used_hyperdrive = False
-    
-    def get_move(self, state: State) -> tuple[Optional[Move], bool]:
-        if state.board.is_checkmated(self.color):
-            print("There's no escape! You've been checkmated!")
-            server_submit_special(
-                self.uname, MOVE_FORFEIT, state.turn_no)
-            return None, True
-        
-        msg = None
+        self.budget = budget
+        self.workers = workers
+        self.playout_depth = playout_depth
+        self.last = None
 
-        while True:
-            fr = None
-            to = None
-            attempted_cmd = False
-            test_move = False
-            hyperdrive = False
-            cmd = ""
-            
-
-            while fr is None or to is None:
-                test_move = False
-                hyperdrive = False
-
-                cmd = input(f"[{state.turn_no:>3d}] ")
-
-                attempted_cmd = cmd != ""
-
-                if cmd in [":exit", ":quit"]:
-                    server_submit_special(
-                        self.uname, MOVE_FORFEIT, state.turn_no)
-                    return None, True
-                elif cmd == ":pass":
-                    if state.board.exists_check(self.color):
-                        print("Now's no time to freeze up captain! "+
-                              "We're in their crosshairs!")
-                        server_submit_special(
-                            self.uname, MOVE_FORFEIT, state.turn_no)
-                        return None, True
-                    else:
-                        print("Thanks for being honest, captain :)")
-                        server_submit_special(
-                            self.uname, MOVE_PASS, state.turn_no)
-                        return None, False
-                elif cmd == ":test":
-                    test_move = True
-                elif cmd.startswith(":chat "):
-                    newMsg = cmd[len(":chat "):]
-                    print(f"The message\n'''\n{newMsg}\n'''\nwill broadcast " +
-                           "to enemy vessels when you make your next maneuver.")
-                    if msg is not None:
-                        print("Your previous message has been overwritten.")
-                    msg = newMsg
-                    continue
-                elif cmd == ":hyperdrive":
-                    if self.used_hyperdrive:
-                        print("No can do, captain! The corvette can only use hyperdrive once!")
-                        continue
-                    else:
-                        hyperdrive = True
-                elif attempted_cmd:
-                    print(f"Command '{cmd}' not recognized!")
-                    continue
-
-                fr = self.frontend.move_fr
-                to = self.frontend.move_to
-
-            moving = state.board.piece_at(fr)
-            move = None if moving is None else moving.can_move_to(
-                state.board.board, to,
-                SpecialMove.HYPERDRIVE if hyperdrive else None)
-            if move is not None:
-                move.msg = msg
-
-            if moving is None:
-                print("There is no ship there to command!")
-            elif moving.color is not self.color:
-                print("You cannot command an enemy vessel!")
-            elif test_move:
-                if move is None:
-                    print("That ship cannot perform that maneuver!")
-                else:
-                    print("That's a valid maneuver, captain!")
-            elif not test_move and move is None:
-                if state.board.exists_check(self.color):
-                    print("That maneuver cannot be made! Defend your corvette!")
-                else:
-                    print("Not possible, captain! We don't have time for " +
-                        "commands that can't be followed!")
-                    server_submit_special(
-                        self.uname, MOVE_PASS, state.turn_no)
-                    return None, False
-            elif state.board.exists_check_after_move(self.color, move):
-                print("That maneuver would leave your corvette under attack!")
-            else:
-                if state.board.exists_check_after_move(
-                    Color.other(self.color), move
-                ):
-                    print("You've put the enemy's corvette under attack!")
-                if hyperdrive:
-                    self.used_hyperdrive = True
-                server_submit(self.uname, move, state.turn_no)
-                return move, False
-
-    def play_again(self) -> bool:
-        return False
-    
-    def rematch_rejected(self):
-        pass
-
-    def game_begin(self):
-        print("It's time to do battle, captain!")
-        print("Click to select which ship to move.")
-        print("Shift-click to select where to move.")
-        print("Press [enter] in the terminal to submit the move.")
-
-    def game_end(self, state: State):
-        if state.winner == self.color:
-            print("Well fought, captain! You won the battle!")
+    def get_move(self, state: State) -> tuple[Optional[Move], bool]:
+        if self.workers > 1:
+            self.last = parallel_mcts(
+                state.spec, state.board, self.color, self.budget,
+                self.workers, self.playout_depth)
         else:
-            print("Retreat for now, captain! Better luck next time!")
-        input("Press [enter] to exit. " +
-              "And then ask your alumni if you have time to play again!")
-
-    def round_begin(self):
-        self.used_hyperdrive = False
-        if self.color is Color.WHITE:
-            server_clear(self.uname)
-            server_clear(self.uname_opponent)
-
-
-    def round_end(self):
-        server_save(self.uname)
-
-
-class PlayerOnlineOpponent(Player):
-    color: Color
-    username: str
-
-    def __init__(self, color: Color, username: Optional[str] = None):
-        self.color = color
-        self.username = self.color.name if username is None else username
+            self.last = MCTS(
+                state.board, self.budget, self.playout_depth
+            ).run(self.color)
+
+        print(
+            f"# {self.last.playouts} playouts in {self.last.seconds:.2f}s " +
+            f"({self.last.playouts_per_second:.0f} playouts/s)"
+        )
+
+        if self.last.move is None:
+            if state.board.position(self.color).in_check:
+                print("# opponent resigned")
+                return None, True
+            print("# opponent passed the turn")
+            return None, False
 
-    def get_move(self, state: State) -> tuple[Optional[Move], bool]:
-        print(f"[{state.turn_no:>3d}] Waiting for opponent's move...")
-        move, resign = server_query(self.username, state.turn_no)
-        if (
-            move is not None and
-            state.board.exists_check_after_move(Color.other(self.color), move)
-        ):
-            print("Your corvette vessel is under attack, captain!")
-            print("You must perform evasive maneuvers!")
-        if move is not None and move.msg is not None:
-            print("Enemy transmission received:")
-            print(f">>> {move.msg}")
-        if move is None and not resign:
-            print("The enemy is faltering! Now's your chance!")
-        return move, resign
+        print(f"# {self.last.move} played by opponent")
+        return self.last.move, False
 
-            
     def play_again(self) -> bool:
         return False
-    
+
     def rematch_rejected(self):
-        self.illegal(self.rematch_rejected)
+        pass
 
     def game_begin(self):
-        self.illegal(self.game_begin)
+        pass
 
     def game_end(self, state: State):
-        self.illegal(self.game_end)
+        pass
 
     def round_begin(self):
-        self.illegal(self.round_begin)
+        pass
 
     def round_end(self):
-        self.illegal(self.round_end)
-    
-    def illegal(self, func):
-        raise Exception(f"{self.__class__}:{func} should not be called")
+        pass
@@ -0,0 +1,231 @@
+"""
+A plain-text game record format, in the spirit of PGN. An archive is any
+number of games, one after another:
+
+    [Spec "standard.json"]
+    [White "luke"]
+    [Black "leia"]
+    [Date "2026-10-18T14:03:51Z"]
+
+    1. b2-b3 g7xg6 {nice try}
+    2. pass @e8-b5
+    3. forfeit 0-1
+
+Tag lines come first, then the turns, white's and black's alternating and
+numbered from white's. A turn is a move (fr-to, or frxto for a capture,
+prefixed with @ for a hyperdrive jump), optionally followed by the message
+sent with it in braces ({...}, with backslash escapes for \\, } and
+newlines), or pass, or forfeit. A game ends with its result: 1-0, 0-1,
+1/2-1/2, or * if it was abandoned. A game cut off without a result, e.g. by a
+crash while it was being written, reads back with result *: every game is
+written starting on a fresh line, so the next one is not run into it.
+
+Writers flush after every turn, so an archive being written is always
+readable up to its last complete turn, and readers stream an archive one
+game at a time, so its size does not matter. Archives ending in .gz are
+compressed.
+"""
+import gzip
+import re
+from typing import Iterator, Optional, TextIO
+from state.entities.move.coord import Coord
+from state.entities.move.move import Move, SpecialMove
+
+
+PASS = "pass"
+FORFEIT = "forfeit"
+RESULTS = {"1-0", "0-1", "1/2-1/2", "*"}
+
+_TAG = re.compile(r'\[(\w+)\s+"((?:[^"\\]|\\.)*)"\]\s*$')
+_TOKEN = re.compile(r"\{(?:[^\\}]|\\.)*\}|[^\s{]+")
+_MOVE = re.compile(r"(@?)([a-z]\d+)([-x])([a-z]\d+)$")
+_NUMBER = re.compile(r"\d+\.$")
+_ESCAPES = {"\\": "\\", "}": "}", '"': '"', "n": "\n"}
+
+
+def _escape(text: str, quote: str) -> str:
+    return text.replace("\\", "\\\\").replace(quote, "\\" + quote) \
+        .replace("\n", "\\n")
+
+
+def _unescape(text: str) -> str:
+    return re.sub(r"\\(.)", lambda m: _ESCAPES.get(m[1], m[1]), text)
+
+
+def format_turn(move: Optional[Move], resign: bool) -> str:
+    """One turn as written in a record, e.g. e2xe4 {check}."""
+    if resign:
+        return FORFEIT
+    if move is None:
+        return PASS
+    token = (
+        ("@" if move.special is SpecialMove.HYPERDRIVE else "") +
+        f"{move.fr}{'x' if move.capture else '-'}{move.to}"
+    )
+    if move.msg is not None:
+        token += " {" + _escape(move.msg, "}") + "}"
+    return token
+
+
+def parse_move(token: str) -> Move:
+    match = _MOVE.match(token)
+    if match is None:
+        raise ValueError(f"not a move: {token!r}")
+    hyperdrive, fr, sep, to = match.groups()
+    return Move(
+        Coord.from_str(fr), Coord.from_str(to), sep == "x",
+        SpecialMove.HYPERDRIVE if hyperdrive else None)
+
+
+class GameRecord:
+    """
+    One recorded game: its tags, its turns as (move, resign) pairs the way
+    players return them (a pass being (None, False) and a forfeit
+    (None, True)), and its result.
+    """
+    tags: dict[str, str]
+    turns: list[tuple[Optional[Move], bool]]
+    result: str
+
+    def __init__(
+            self, tags: Optional[dict[str, str]] = None,
+            turns: Optional[list[tuple[Optional[Move], bool]]] = None,
+            result: str = "*"):
+        self.tags = dict() if tags is None else tags
+        self.turns = [] if turns is None else turns
+        self.result = result
+
+    def __repr__(self) -> str:
+        return (
+            f"GameRecord(tags={self.tags!r}, turns=<{len(self.turns)}>, " +
+            f"result={self.result!r})"
+        )
+
+
+def open_archive(path: str, mode: str = "r") -> TextIO:
+    """Opens an archive for reading ("r") or appending ("a") as text."""
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+class RecordWriter:
+    """
+    Writes games to a text stream as they are played: begin() with the tags,
+    then turn() for every turn, then end() with the result.
+    """
+    stream: TextIO
+    turn_no: int
+
+    def __init__(self, stream: TextIO):
+        self.stream = stream
+        self.turn_no = 0
+
+    def _write(self, text: str):
+        self.stream.write(text)
+        self.stream.flush()
+
+    def begin(self, tags: dict[str, str]):
+        self.turn_no = 0
+        # ends the line of a game cut off mid-turn, and otherwise leaves the
+        # blank line between games
+        lines = ["\n"]
+        for name, value in tags.items():
+            value = _escape(str(value), '"')
+            lines.append(f'[{name} "{value}"]\n')
+        self._write("".join(lines) + "\n")
+
+    def turn(self, move: Optional[Move], resign: bool):
+        text = format_turn(move, resign)
+        if self.turn_no % 2 == 0:
+            text = f"{self.turn_no // 2 + 1}. {text}"
+        text += "\n" if self.turn_no % 2 == 1 else " "
+        self.turn_no += 1
+        self._write(text)
+
+    def end(self, result: str):
+        if result not in RESULTS:
+            raise ValueError(result)
+        self._write(f"{result}\n")
+
+    def write(self, record: GameRecord):
+        self.begin(record.tags)
+        for move, resign in record.turns:
+            self.turn(move, resign)
+        self.end(record.result)
+
+
+def read_records(stream: TextIO) -> Iterator[GameRecord]:
+    """
+    The games in a stream, in order, reading one line at a time. Raises
+    ValueError, with the line number, on anything that is not part of the
+    format.
+    """
+    record: Optional[GameRecord] = None
+    in_moves = False
+    # a blank line has ended the current game's tags
+    tags_done = False
+
+    for line_no, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            tags_done = record is not None
+            continue
+
+        if not in_moves:
+            match = _TAG.match(line)
+            if match is not None:
+                if record is not None and tags_done:
+                    # the previous game was cut off before its first turn
+                    yield record
+                    record = None
+                if record is None:
+                    record, tags_done = GameRecord(), False
+                record.tags[match[1]] = _unescape(match[2])
+                continue
+        elif line.startswith("["):
+            # the previous game was cut off
+            yield record
+            record, in_moves, tags_done = GameRecord(), False, False
+            match = _TAG.match(line)
+            if match is None:
+                raise ValueError(f"line {line_no}: bad tag {line!r}")
+            record.tags[match[1]] = _unescape(match[2])
+            continue
+
+        if record is None:
+            record = GameRecord()
+        in_moves = True
+
+        for token in _TOKEN.findall(line):
+            if record is None:
+                raise ValueError(f"line {line_no}: {token!r} after the result")
+            if _NUMBER.match(token):
+                continue
+            if token.startswith("{"):
+                last = record.turns[-1][0] if record.turns else None
+                if last is None or last.msg is not None:
+                    raise ValueError(f"line {line_no}: message without a move")
+                record.turns[-1] = (last.with_msg(_unescape(token[1:-1])), False)
+            elif token in RESULTS:
+                record.result = token
+                yield record
+                record, in_moves = None, False
+            elif token == PASS:
+                record.turns.append((None, False))
+            elif token == FORFEIT:
+                record.turns.append((None, True))
+            else:
+                try:
+                    record.turns.append((parse_move(token), False))
+                except ValueError as e:
+                    raise ValueError(f"line {line_no}: {e}") from None
+
+    if record is not None:
+        yield record
+
+
+def read_archive(path: str) -> Iterator[GameRecord]:
+    """The games in an archive file, streamed; see read_records."""
+    with open_archive(path) as stream:
+        yield from read_records(stream)
@@ -0,0 +1,128 @@
+import io
+import os
+import unittest
+from typing import Optional
+from frontend import NullFrontend
+from game import Game
+from player import Player
+from record import GameRecord, RecordWriter, read_records
+from state.entities.color.color import Color
+from state.entities.move.coord import Coord
+from state.entities.move.move import Move, SpecialMove
+from state.state import State
+
+
+def _move(fr: str, to: str, capture: bool = False, **kwargs) -> Move:
+    return Move(Coord.from_str(fr), Coord.from_str(to), capture, **kwargs)
+
+
+TURNS = [
+    (_move("b2", "b3"), False),
+    (_move("g7", "g6", True, msg='nice } try\n"\\'), False),
+    (None, False),
+    (_move("e8", "b5", special=SpecialMove.HYPERDRIVE), False),
+    (None, True),
+]
+TAGS = {"Spec": "standard.json", "White": "luke", "Black": 'le"ia'}
+
+
+def _read(text: str) -> list[GameRecord]:
+    return list(read_records(io.StringIO(text)))
+
+
+def _same(record: GameRecord, tags: dict, turns: list, result: str) -> bool:
+    return record.tags == tags and record.result == result and [
+        (None if move is None else
+         (move.fr, move.to, move.capture, move.special, move.msg), resign)
+        for move, resign in record.turns
+    ] == [
+        (None if move is None else
+         (move.fr, move.to, move.capture, move.special, move.msg), resign)
+        for move, resign in turns
+    ]
+
+
+class _Crash(Exception):
+    pass
+
+
+class _Scripted(Player):
+    """Plays the given turns, then raises."""
+    color: Color
+    turns: list[tuple[Optional[Move], bool]]
+
+    def __init__(self, color: Color, turns: list[tuple[Optional[Move], bool]]):
+        self.color = color
+        self.turns = list(turns)
+
+    def get_move(self, state: State) -> tuple[Optional[Move], bool]:
+        if not self.turns:
+            raise _Crash()
+        return self.turns.pop(0)
+
+    def play_again(self) -> bool:
+        return False
+
+    def rematch_rejected(self):
+        pass
+
+    def game_begin(self):
+        pass
+
+    def game_end(self, state: State):
+        pass
+
+    def round_begin(self):
+        pass
+
+    def round_end(self):
+        pass
+
+
+class RecordTest(unittest.TestCase):
+    def test_round_trip(self):
+        stream = io.StringIO()
+        writer = RecordWriter(stream)
+        writer.write(GameRecord(TAGS, TURNS, "0-1"))
+        writer.write(GameRecord(TAGS, TURNS[:2], "1/2-1/2"))
+
+        first, second = _read(stream.getvalue())
+        self.assertTrue(_same(first, TAGS, TURNS, "0-1"))
+        self.assertTrue(_same(second, TAGS, TURNS[:2], "1/2-1/2"))
+
+    def test_cut_off_games(self):
+        # a crash after each number of turns, then another game appended by
+        # a new writer, as when a crashed tournament is restarted
+        for cut in range(len(TURNS) + 1):
+            with self.subTest(cut=cut):
+                stream = io.StringIO()
+                writer = RecordWriter(stream)
+                writer.begin(TAGS)
+                for move, resign in TURNS[:cut]:
+                    writer.turn(move, resign)
+                RecordWriter(stream).write(GameRecord(TAGS, TURNS[:1], "1-0"))
+
+                cut_off, after = _read(stream.getvalue())
+                self.assertTrue(_same(cut_off, TAGS, TURNS[:cut], "*"))
+                self.assertTrue(_same(after, TAGS, TURNS[:1], "1-0"))
+
+    def test_round_ended_by_exception(self):
+        stream = io.StringIO()
+        played = [(_move("b2", "b3"), False), (None, False)]
+        game = Game(
+            os.path.join(os.path.dirname(__file__), "spec", "standard.json"),
+            _Scripted(Color.WHITE, played[:1]),
+            _Scripted(Color.BLACK, played[1:]),
+            NullFrontend(), record=RecordWriter(stream))
+        with self.assertRaises(_Crash):
+            game.play()
+        RecordWriter(stream).write(GameRecord(TAGS, [], "1/2-1/2"))
+
+        crashed, after = _read(stream.getvalue())
+        self.assertEqual(crashed.result, "*")
+        self.assertTrue(_same(crashed, crashed.tags, played, "*"))
+        self.assertTrue(_same(after, TAGS, [], "1/2-1/2"))
+
+
+if __name__ == "__main__":
+    unittest.main()
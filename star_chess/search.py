@@ -0,0 +1,295 @@
+import time
+from dataclasses import dataclass
+from threading import Event
+from typing import Optional
+from state.entities.board import Board
+from state.entities.cache import MoveId, move_id
+from state.entities.color.color import Color
+from state.entities.move.move import Move
+from state.entities.piece import PieceType
+from transposition import Bound, TranspositionTable
+
+
+# rough centipawn values; the king has none since losing it ends the game,
+# which the MATE score already covers
+PIECE_VALUES: dict[PieceType, int] = {
+    PieceType.KING: 0,
+    PieceType.SERGEANT: 120,
+    PieceType.CAMEL: 250,
+    PieceType.GRASSHOPPER: 250,
+    PieceType.KNIGHT: 300,
+    PieceType.BISHOP: 330,
+    PieceType.ROOK: 500,
+    PieceType.WILDEBEEST: 520,
+    PieceType.ARCHBISHOP: 850,
+    PieceType.CHANCELLOR: 900,
+    PieceType.QUEEN: 950,
+    PieceType.AMAZON: 1250,
+    PieceType.WAMAZON: 1400,
+}
+
+MATE = 1_000_000
+INF = MATE + 1
+# scores at least this close to MATE are mates, stored in the transposition
+# table relative to the node rather than the root
+MATE_BOUND = MATE - 1000
+
+
+def evaluate(board: Board, color: Color) -> int:
+    """Material balance from the point of view of the given color."""
+    score = 0
+    for (c, type), coords in board.map.items():
+        value = PIECE_VALUES[type] * len(coords)
+        score += value if c is color else -value
+    return score
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+@dataclass
+class SearchResult:
+    move: Optional[Move]
+    score: int
+    depth: int
+    nodes: int
+    seconds: float
+
+    @property
+    def nps(self) -> float:
+        return self.nodes / self.seconds if self.seconds > 0 else 0.0
+
+
+class Search:
+    """
+    Negamax alpha-beta with iterative deepening, a quiescence search over
+    captures, and captures (most valuable victim first), killer moves and the
+    history heuristic for move ordering.
+
+    The board is searched in place with make/unmake and is left as it was
+    found, including when the time budget runs out mid-iteration. A
+    transposition table, if given, is probed and filled at every full-width
+    node and can be shared across searches.
+
+    A search can be cancelled from another thread by setting its stop event,
+    or have its budget (counted from the start of run) changed while it runs,
+    e.g. from infinite to finite when a pondered position is reached.
+    """
+    board: Board
+    budget: float
+    max_depth: int
+    table: Optional[TranspositionTable]
+    stop: Optional[Event]
+    nodes: int
+    start: float
+    killers: list[list[MoveId]]
+    history: dict[MoveId, int]
+
+    def __init__(
+            self, board: Board, budget: float, max_depth: int = 64,
+            table: Optional[TranspositionTable] = None,
+            stop: Optional[Event] = None):
+        self.board = board
+        self.budget = budget
+        self.max_depth = max_depth
+        self.table = table
+        self.stop = stop
+        self.nodes = 0
+        self.start = time.perf_counter()
+        self.killers = []
+        self.history = dict()
+
+    def run(self, color: Color) -> SearchResult:
+        self.start = start = time.perf_counter()
+        self.nodes = 0
+        self.killers = [[] for _ in range(self.max_depth + 1)]
+        self.history = dict()
+
+        result = SearchResult(None, 0, 0, 0, 0.0)
+        root = list(self.board.position(color).legal)
+
+        if len(root) == 0:
+            # mated or stalemated: nothing to search, the caller resigns or
+            # passes
+            result.seconds = time.perf_counter() - start
+            return result
+        result.move = root[0]
+
+        for depth in range(1, self.max_depth + 1):
+            try:
+                move, score = self._root(color, root, depth)
+            except SearchTimeout:
+                break
+            result.move, result.score, result.depth = move, score, depth
+            # search the best move first on the next iteration
+            root.remove(move)
+            root.insert(0, move)
+            if abs(score) >= MATE - self.max_depth:
+                break
+
+        result.nodes = self.nodes
+        result.seconds = time.perf_counter() - start
+        return result
+
+    def _tick(self):
+        self.nodes += 1
+        if self.nodes & 255 == 0 and (
+            time.perf_counter() - self.start > self.budget or
+            (self.stop is not None and self.stop.is_set())
+        ):
+            raise SearchTimeout()
+
+    def _root(self, color: Color, moves: list[Move], depth: int) -> tuple[Move, int]:
+        alpha = -INF
+        best = moves[0]
+        for move in moves:
+            self.board.make(move)
+            try:
+                score = -self._negamax(
+                    Color.other(color), depth - 1, 1, -INF, -alpha)
+            finally:
+                self.board.unmake()
+            if score > alpha:
+                alpha, best = score, move
+        return best, alpha
+
+    def _order(
+            self, moves: list[Move], ply: int,
+            hash_move: Optional[MoveId] = None) -> list[Move]:
+        board = self.board
+        killers = self.killers[ply] if ply < len(self.killers) else []
+
+        def key(move: Move) -> int:
+            if hash_move is not None and move_id(move) == hash_move:
+                return 1 << 31
+            if move.capture:
+                victim = board.piece_at(move.to).type
+                attacker = board.piece_at(move.fr).type
+                return 1 << 30 | PIECE_VALUES[victim] << 12 | \
+                    (4095 - PIECE_VALUES[attacker])
+            if move_id(move) in killers:
+                return 1 << 29
+            return self.history.get(move_id(move), 0)
+
+        return sorted(moves, key=key, reverse=True)
+
+    def _negamax(
+            self, color: Color, depth: int, ply: int,
+            alpha: int, beta: int) -> int:
+        if depth <= 0:
+            return self._quiesce(color, alpha, beta)
+
+        self._tick()
+        board = self.board
+        table = self.table
+        alpha_orig = alpha
+        hash_move = None
+
+        if table is not None:
+            entry = table.probe(board.key)
+            if entry is not None:
+                entry_depth, bound, score, hash_move = entry
+                score = self._from_table(score, ply)
+                if entry_depth >= depth and (
+                    bound is Bound.EXACT or
+                    (bound is Bound.LOWER and score >= beta) or
+                    (bound is Bound.UPPER and score <= alpha)
+                ):
+                    return score
+
+        legal = 0
+        best = -INF
+        best_move = None
+
+        for move in self._order(board.moves(color), ply, hash_move):
+            board.make(move)
+            try:
+                if board.exists_check(color):
+                    continue
+                legal += 1
+                score = -self._negamax(
+                    Color.other(color), depth - 1, ply + 1, -beta, -alpha)
+            finally:
+                board.unmake()
+
+            if score > best:
+                best, best_move = score, move
+            if score >= beta:
+                if not move.capture:
+                    self._remember(move, depth, ply)
+                break
+            if score > alpha:
+                alpha = score
+
+        if legal == 0:
+            if board.exists_check(color):
+                return -MATE + ply
+            # no legal move but not in check: the only option is to pass
+            board.pass_turn()
+            try:
+                return -self._negamax(
+                    Color.other(color), depth - 1, ply + 1, -beta, -alpha)
+            finally:
+                board.pass_turn()
+
+        if table is not None:
+            bound = (
+                Bound.LOWER if best >= beta else
+                Bound.UPPER if best <= alpha_orig else
+                Bound.EXACT
+            )
+            table.store(
+                board.key, depth, bound, self._to_table(best, ply),
+                move_id(best_move))
+
+        return best
+
+    @staticmethod
+    def _to_table(score: int, ply: int) -> int:
+        if score >= MATE_BOUND:
+            return score + ply
+        if score <= -MATE_BOUND:
+            return score - ply
+        return score
+
+    @staticmethod
+    def _from_table(score: int, ply: int) -> int:
+        if score >= MATE_BOUND:
+            return score - ply
+        if score <= -MATE_BOUND:
+            return score + ply
+        return score
+
+    def _quiesce(self, color: Color, alpha: int, beta: int) -> int:
+        self._tick()
+        board = self.board
+
+        stand_pat = evaluate(board, color)
+        if stand_pat >= beta:
+            return stand_pat
+        alpha = max(alpha, stand_pat)
+
+        captures = [move for move in board.moves(color) if move.capture]
+        for move in self._order(captures, len(self.killers)):
+            board.make(move)
+            try:
+                if board.exists_check(color):
+                    continue
+                score = -self._quiesce(Color.other(color), -beta, -alpha)
+            finally:
+                board.unmake()
+            if score >= beta:
+                return score
+            alpha = max(alpha, score)
+
+        return alpha
+
+    def _remember(self, move: Move, depth: int, ply: int):
+        key = move_id(move)
+        if ply < len(self.killers):
+            killers = self.killers[ply]
+            if key not in killers:
+                killers.insert(0, key)
+                del killers[2:]
+        self.history[key] = self.history.get(key, 0) + depth * depth
@@ -0,0 +1,81 @@
+import json
+import os
+import tempfile
+import unittest
+from record import format_turn, parse_move
+from state.entities.board import Board
+from state.entities.color.color import Color
+from state.entities.move.coord import Coord
+from state.entities.move.move import MAX_COLS, MAX_ROWS, Move
+from state.entities.spec import parse_spec
+
+
+def _spec_text(n_rows: int, n_cols: int) -> str:
+    # the kings in opposite corners, so any size from 1x2 up is a valid board
+    return json.dumps({
+        "size": {"w": n_cols, "h": n_rows},
+        "white": {"king": "a1"},
+        "black": {"king": str(Coord(n_rows - 1, n_cols - 1))},
+    })
+
+
+class SpecSizeTest(unittest.TestCase):
+    def test_limits(self):
+        self.assertEqual((MAX_ROWS, MAX_COLS), (32, 26))
+        spec = parse_spec(_spec_text(MAX_ROWS, MAX_COLS))
+        self.assertEqual((spec.n_rows, spec.n_cols), (MAX_ROWS, MAX_COLS))
+
+    def test_too_large(self):
+        for n_rows, n_cols in ((MAX_ROWS + 1, 8), (8, MAX_COLS + 1), (8, 64)):
+            with self.subTest(n_rows=n_rows, n_cols=n_cols):
+                with self.assertRaises(ValueError):
+                    parse_spec(json.dumps({
+                        "size": {"w": n_cols, "h": n_rows},
+                        "white": {"king": "a1"},
+                        "black": {"king": "b2"},
+                    }))
+
+    def test_empty(self):
+        for n_rows, n_cols in ((0, 8), (8, 0)):
+            with self.subTest(n_rows=n_rows, n_cols=n_cols):
+                with self.assertRaises(ValueError):
+                    parse_spec(json.dumps({
+                        "size": {"w": n_cols, "h": n_rows},
+                        "white": {"king": "a1"},
+                        "black": {"king": "a1"},
+                    }))
+
+
+class CoordNameTest(unittest.TestCase):
+    def test_round_trip(self):
+        for r in range(MAX_ROWS):
+            for c in range(MAX_COLS):
+                coord = Coord(r, c)
+                with self.subTest(coord=repr(coord)):
+                    self.assertIs(Coord.from_str(str(coord)), coord)
+
+    def test_last_square(self):
+        corner = Coord(MAX_ROWS - 1, MAX_COLS - 1)
+        self.assertEqual(str(corner), f"z{MAX_ROWS}")
+
+    def test_recorded_at_the_limit(self):
+        # a move to the far corner of the largest board survives a record
+        move = Move(Coord(MAX_ROWS - 2, MAX_COLS - 2), Coord(MAX_ROWS - 1, MAX_COLS - 1), True)
+        token = format_turn(move, False)
+        parsed = parse_move(token)
+        self.assertEqual((parsed.fr, parsed.to, parsed.capture), (move.fr, move.to, True))
+
+    def test_largest_board_plays(self):
+        with tempfile.TemporaryDirectory() as spec_dir:
+            path = os.path.join(spec_dir, "largest.json")
+            with open(path, "w") as spec_file:
+                spec_file.write(_spec_text(MAX_ROWS, MAX_COLS))
+            board = Board(path)
+        corner = Coord(MAX_ROWS - 1, MAX_COLS - 1)
+        legal = board.position(Color.BLACK).legal
+        self.assertTrue(legal)
+        self.assertTrue(all(move.fr is corner for move in legal))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+from functools import cache
+from typing import Optional
+from .betza import CAPTURE, PieceRules, landings
+from .color.color import Color
+from .move.coord import Coord
+from .move.tables import tables
+from .piece import PieceType
+
+
+# the kinds of piece that could capture from somewhere: classes for
+# isinstance tests on the square grid, types for bitboard lookups
+Kinds = tuple[tuple[type, ...], tuple[PieceType, ...]]
+
+
+def _kinds(types: set[PieceType]) -> Kinds:
+    ordered = tuple(sorted(types, key=lambda type: type.value))
+    return tuple(type.to_class() for type in ordered), ordered
+
+
+class AttackTables:
+    """
+    A board's piece rules turned around: for a target square, where a piece
+    of a given color could capture it from. Indexed by color, then as noted.
+
+        leaps[r][c]:  (from, square that must be empty or None, kinds)
+        lines:        (direction from the target towards the attacker,
+                       rays[r][c] along it, kinds of rider found first on it)
+        hops[(sr, sc)]: (direction the hopper moved in, kinds), for a hopper
+                      that landed at offset (sr, sc) from its hurdle
+        hoppers:      every kind that can capture by hopping
+    """
+    n_rows: int
+    n_cols: int
+    leaps: dict[Color, list[list[list[tuple[Coord, Optional[Coord], Kinds]]]]]
+    lines: dict[Color, list[tuple[tuple[int, int], list[list[list[Coord]]], Kinds]]]
+    hops: dict[Color, dict[tuple[int, int], list[tuple[tuple[int, int], Kinds]]]]
+    hoppers: dict[Color, Kinds]
+
+    def __init__(
+            self, piece_rules: tuple[tuple[PieceType, PieceRules], ...],
+            n_rows: int, n_cols: int):
+        self.n_rows = n_rows
+        self.n_cols = n_cols
+        self.leaps = dict()
+        self.lines = dict()
+        self.hops = dict()
+        self.hoppers = dict()
+        t = tables(n_rows, n_cols)
+
+        for color in Color:
+            dir = 1 if color is Color.WHITE else -1
+            leaps = [
+                [dict() for _ in range(n_cols)] for _ in range(n_rows)
+            ]
+            lines: dict[tuple[int, int], set[PieceType]] = dict()
+            hops: dict[tuple[int, int], dict[tuple[int, int], set[PieceType]]] = dict()
+            hoppers = set()
+
+            for type, rules in piece_rules:
+                compiled = rules.tables(n_rows, n_cols)
+                for r in range(n_rows):
+                    for c in range(n_cols):
+                        fr = t.coords[r][c]
+                        for to, via, mode in compiled.leaps[color][r][c]:
+                            if mode & CAPTURE:
+                                leaps[to.r][to.c].setdefault((fr, via), set()).add(type)
+
+                for atom in rules.atoms:
+                    if not atom.rider or not atom.mode & CAPTURE:
+                        continue
+                    for dr, dc in atom.offsets:
+                        dr *= dir
+                        if atom.hop:
+                            hoppers.add(type)
+                            for s in landings(dr, dc, atom.wide):
+                                hops.setdefault(s, dict()) \
+                                    .setdefault((dr, dc), set()).add(type)
+                        else:
+                            lines.setdefault((-dr, -dc), set()).add(type)
+
+            self.leaps[color] = [
+                [
+                    [(fr, via, _kinds(types)) for (fr, via), types in cell.items()]
+                    for cell in row
+                ]
+                for row in leaps
+            ]
+            self.lines[color] = [
+                (d, _rays(n_rows, n_cols, *d), _kinds(types))
+                for d, types in lines.items()
+            ]
+            self.hops[color] = {
+                s: [(d, _kinds(types)) for d, types in by_dir.items()]
+                for s, by_dir in hops.items()
+            }
+            self.hoppers[color] = _kinds(hoppers)
+
+
+def _rays(n_rows: int, n_cols: int, dr: int, dc: int) -> list[list[list[Coord]]]:
+    t = tables(n_rows, n_cols)
+    if (dr, dc) in t.rays:
+        return t.rays[(dr, dc)]
+    return [[t.ray(r, c, dr, dc) for c in range(n_cols)] for r in range(n_rows)]
+
+
+@cache
+def attacks(
+        piece_rules: tuple[tuple[PieceType, PieceRules], ...],
+        n_rows: int, n_cols: int) -> AttackTables:
+    return AttackTables(piece_rules, n_rows, n_cols)
@@ -0,0 +1,318 @@
+"""
+Piece movement written in a Betza-style notation and compiled, once per board
+size, into per-square target tables.
+
+A definition is a sequence of atoms, each an upper-case letter optionally
+preceded by lower-case modifiers; whitespace is ignored. Leaper atoms jump to
+every rotation and reflection of an offset:
+
+    W (1,0)  F (1,1)  D (2,0)  N (2,1)  A (2,2)
+    H (3,0)  C (3,1)  Z (3,2)  G (3,3)
+
+Doubling a letter makes it a rider, which repeats the step along a line until
+it is blocked (WW, FF, NN), and K = WF, R = WW, B = FF and Q = WWFF are
+shorthand. Modifiers apply to every direction of the atom they precede:
+
+    m / c   move only / capture only (default: both)
+    f / b   forward / backward only, forward being towards the opponent
+    l / r   left / right only, from white's side of the board; combined with
+            f or b they pick out diagonals (frF is the forward-right step)
+    v / s   only the more vertical / more sideways directions
+    n       lame: the square halfway along the leap must be empty (even
+            offsets only, e.g. nD)
+    i       only from the mover's third rank, where sergeants start
+    g       hopper (riders only): move along the line to the first piece,
+            jump it and land on the square right behind it
+    w       with g: past an orthogonal hurdle, also land on either square
+            diagonally behind it
+
+So the sergeant, which steps or captures onto the three squares in front of
+it and may make a non-capturing double step straight or diagonally from its
+starting rank, is "fK ifmnD ifmnA".
+"""
+from functools import cache
+from typing import Optional
+from .color.color import Color
+from .move.coord import Coord
+from .move.tables import tables
+
+
+LEAPERS = {
+    "W": (1, 0),
+    "F": (1, 1),
+    "D": (2, 0),
+    "N": (2, 1),
+    "A": (2, 2),
+    "H": (3, 0),
+    "C": (3, 1),
+    "Z": (3, 2),
+    "G": (3, 3),
+}
+
+SHORTHAND = {
+    "K": "WF",
+    "R": "WW",
+    "B": "FF",
+    "Q": "WWFF",
+}
+
+MODIFIERS = set("mcfblrvsnigw")
+
+# what an atom may do on its target square
+MOVE = 1
+CAPTURE = 2
+
+
+class Atom:
+    """One parsed atom: its offsets for white and what it may do with them."""
+    offsets: tuple[tuple[int, int], ...]
+    mode: int
+    rider: bool
+    hop: bool
+    wide: bool
+    lame: bool
+    initial: bool
+
+    def __init__(
+            self, offsets: tuple[tuple[int, int], ...], mode: int,
+            rider: bool, hop: bool, wide: bool, lame: bool, initial: bool):
+        self.offsets = offsets
+        self.mode = mode
+        self.rider = rider
+        self.hop = hop
+        self.wide = wide
+        self.lame = lame
+        self.initial = initial
+
+
+def _symmetries(a: int, b: int) -> list[tuple[int, int]]:
+    offsets = []
+    for dr, dc in [(a, b), (b, a)]:
+        for sr in (1, -1):
+            for sc in (1, -1):
+                offset = (sr * dr, sc * dc)
+                if offset not in offsets:
+                    offsets.append(offset)
+    return offsets
+
+
+def _directed(
+        offsets: list[tuple[int, int]], mods: str) -> list[tuple[int, int]]:
+    rows = {"f": 1, "b": -1}
+    cols = {"l": -1, "r": 1}
+    want_r = {rows[m] for m in mods if m in rows}
+    want_c = {cols[m] for m in mods if m in cols}
+
+    def keep(dr: int, dc: int) -> bool:
+        if want_r and (dr > 0) - (dr < 0) not in want_r:
+            return False
+        if want_c and (dc > 0) - (dc < 0) not in want_c:
+            return False
+        if "v" in mods and not abs(dr) > abs(dc):
+            return False
+        if "s" in mods and not abs(dc) > abs(dr):
+            return False
+        return True
+
+    return [(dr, dc) for dr, dc in offsets if keep(dr, dc)]
+
+
+def parse(notation: str) -> list[Atom]:
+    text = "".join(notation.split())
+    atoms = []
+    mods = ""
+    i = 0
+
+    while i < len(text):
+        ch = text[i]
+        if ch in MODIFIERS:
+            mods += ch
+            i += 1
+            continue
+
+        if ch in SHORTHAND:
+            letters = SHORTHAND[ch]
+            i += 1
+        elif ch in LEAPERS:
+            rider = i + 1 < len(text) and text[i + 1] == ch
+            letters = ch * (2 if rider else 1)
+            i += len(letters)
+        else:
+            raise ValueError(f"unknown atom {ch!r} in {notation!r}")
+
+        # shorthand may stand for several atoms, each getting the modifiers
+        j = 0
+        while j < len(letters):
+            letter = letters[j]
+            rider = j + 1 < len(letters) and letters[j + 1] == letter
+            j += 2 if rider else 1
+            atoms.append(_atom(letter, rider, mods, notation))
+        mods = ""
+
+    if mods:
+        raise ValueError(f"modifiers {mods!r} without an atom in {notation!r}")
+    if not atoms:
+        raise ValueError(f"empty piece definition {notation!r}")
+    return atoms
+
+
+def _atom(letter: str, rider: bool, mods: str, notation: str) -> Atom:
+    offsets = _directed(_symmetries(*LEAPERS[letter]), mods)
+    if not offsets:
+        raise ValueError(f"no directions left for {mods}{letter} in {notation!r}")
+
+    hop = "g" in mods
+    lame = "n" in mods
+    initial = "i" in mods
+
+    if hop and not rider:
+        raise ValueError(f"g needs a rider in {notation!r}")
+    if "w" in mods and not hop:
+        raise ValueError(f"w needs g in {notation!r}")
+    if rider and (lame or initial):
+        raise ValueError(f"n and i only apply to leapers in {notation!r}")
+    if lame and any(dr % 2 or dc % 2 for dr, dc in offsets):
+        raise ValueError(f"n needs an even leap in {notation!r}")
+
+    mode = (
+        MOVE if "m" in mods and "c" not in mods else
+        CAPTURE if "c" in mods and "m" not in mods else
+        MOVE | CAPTURE
+    )
+
+    return Atom(tuple(offsets), mode, rider, hop, "w" in mods, lame, initial)
+
+
+class CompiledRules:
+    """
+    A definition's targets for one board size, per color, indexed as
+    table[color][r][c]:
+
+        leaps: (to, square that must be empty or None, mode)
+        rides: (ray, mode), the ray's squares in order
+        hops:  (ray, landing squares if the hurdle is ray[i], mode)
+    """
+    leaps: dict[Color, list[list[list[tuple[Coord, Optional[Coord], int]]]]]
+    rides: dict[Color, list[list[list[tuple[list[Coord], int]]]]]
+    hops: dict[Color, list[list[list[tuple[list[Coord], list[list[Coord]], int]]]]]
+
+    def __init__(self, atoms: list[Atom], n_rows: int, n_cols: int):
+        self.leaps = dict()
+        self.rides = dict()
+        self.hops = dict()
+
+        cells = [(r, c) for r in range(n_rows) for c in range(n_cols)]
+
+        for color in Color:
+            dir = 1 if color is Color.WHITE else -1
+            start = 2 if color is Color.WHITE else n_rows - 3
+
+            self.leaps[color] = [[None] * n_cols for _ in range(n_rows)]
+            self.rides[color] = [[None] * n_cols for _ in range(n_rows)]
+            self.hops[color] = [[None] * n_cols for _ in range(n_rows)]
+
+            for r, c in cells:
+                self.leaps[color][r][c] = self._leaps(
+                    atoms, r, c, dir, r == start, n_rows, n_cols)
+                self.rides[color][r][c] = self._rides(
+                    atoms, r, c, dir, n_rows, n_cols)
+                self.hops[color][r][c] = self._hops(
+                    atoms, r, c, dir, n_rows, n_cols)
+
+    @staticmethod
+    def _leaps(atoms, r, c, dir, on_start, n_rows, n_cols):
+        t = tables(n_rows, n_cols)
+        # merged by target and lameness, so overlapping atoms combine modes
+        merged: dict[tuple[Coord, Optional[Coord]], int] = dict()
+        for atom in atoms:
+            if atom.rider or (atom.initial and not on_start):
+                continue
+            for dr, dc in atom.offsets:
+                dr *= dir
+                if not t.in_bounds(r + dr, c + dc):
+                    continue
+                to = t.coords[r + dr][c + dc]
+                via = t.coords[r + dr // 2][c + dc // 2] if atom.lame else None
+                merged[(to, via)] = merged.get((to, via), 0) | atom.mode
+        return [(to, via, mode) for (to, via), mode in merged.items()]
+
+    @staticmethod
+    def _rides(atoms, r, c, dir, n_rows, n_cols):
+        t = tables(n_rows, n_cols)
+        merged: dict[tuple[int, int], int] = dict()
+        for atom in atoms:
+            if not atom.rider or atom.hop:
+                continue
+            for dr, dc in atom.offsets:
+                merged[(dr * dir, dc)] = merged.get((dr * dir, dc), 0) | atom.mode
+        return [
+            (ray, mode)
+            for (dr, dc), mode in merged.items()
+            if (ray := t.ray(r, c, dr, dc))
+        ]
+
+    @staticmethod
+    def _hops(atoms, r, c, dir, n_rows, n_cols):
+        t = tables(n_rows, n_cols)
+        hops = []
+        for atom in atoms:
+            if not atom.hop:
+                continue
+            for dr, dc in atom.offsets:
+                dr *= dir
+                ray = t.ray(r, c, dr, dc)
+                if not ray:
+                    continue
+                steps = landings(dr, dc, atom.wide)
+                hops.append((
+                    ray,
+                    [
+                        [
+                            t.coords[h.r + lr][h.c + lc]
+                            for lr, lc in steps
+                            if t.in_bounds(h.r + lr, h.c + lc)
+                        ]
+                        for h in ray
+                    ],
+                    atom.mode
+                ))
+        return hops
+
+
+def landings(dr: int, dc: int, wide: bool) -> list[tuple[int, int]]:
+    """Offsets from the hurdle at which a hopper along (dr, dc) may land."""
+    if not wide or (dr and dc):
+        return [(dr, dc)]
+    if dr == 0:
+        return [(x, dc) for x in [-1, 0, 1]]
+    return [(dr, x) for x in [-1, 0, 1]]
+
+
+class PieceRules:
+    """
+    A parsed definition. Compiled tables are built on first use for each
+    board size and kept, so pieces with the same definition share them.
+    """
+    notation: str
+    atoms: list[Atom]
+    compiled: dict[tuple[int, int], CompiledRules]
+
+    def __init__(self, notation: str):
+        self.notation = notation
+        self.atoms = parse(notation)
+        self.compiled = dict()
+
+    def tables(self, n_rows: int, n_cols: int) -> CompiledRules:
+        t = self.compiled.get((n_rows, n_cols))
+        if t is None:
+            t = self.compiled[(n_rows, n_cols)] = \
+                CompiledRules(self.atoms, n_rows, n_cols)
+        return t
+
+    def __repr__(self) -> str:
+        return f"PieceRules({self.notation!r})"
+
+
+@cache
+def rules(notation: str) -> PieceRules:
+    return PieceRules(notation)
@@ -0,0 +1,203 @@
+from functools import cache
+from typing import Optional
+from .attacks import AttackTables
+from .board import Board
+from .piece import Piece, PieceType
+from .color.color import Color
+from .move.coord import Coord
+from .move.tables import tables
+
+
+def mask(coords: list[Coord], n_cols: int) -> int:
+    m = 0
+    for coord in coords:
+        m |= 1 << (coord.r * n_cols + coord.c)
+    return m
+
+
+def nearest(blockers: int, ascending: bool) -> int:
+    # the blocker closest to the ray's origin, as a single-bit mask
+    if ascending:
+        return blockers & -blockers
+    elif blockers:
+        return 1 << (blockers.bit_length() - 1)
+    else:
+        return 0
+
+
+class BitMasks:
+    """
+    A board's attack tables (see AttackTables) as masks over squares
+    numbered r * n_cols + c, indexed by the attacking color and then by the
+    attacked square.
+
+        leaps:  (mask of squares to capture from, piece types), one entry per
+                distinct set of types
+        lame:   (square to capture from, square that must be empty, types)
+        lines:  (piece types, every square on their lines, [(ray mask,
+                whether the ray runs to higher squares)])
+        hops:   (hurdle square, [(ray mask behind it, ascending, types)])
+    """
+    n_rows: int
+    n_cols: int
+    leaps: dict[Color, list[list[tuple[int, tuple[PieceType, ...]]]]]
+    lame: dict[Color, list[list[tuple[int, int, tuple[PieceType, ...]]]]]
+    lines: dict[Color, list[list[tuple[tuple[PieceType, ...], int, list[tuple[int, bool]]]]]]
+    hops: dict[Color, list[list[tuple[int, list[tuple[int, bool, tuple[PieceType, ...]]]]]]]
+
+    def __init__(self, attacks: AttackTables):
+        n_rows, n_cols = attacks.n_rows, attacks.n_cols
+        self.n_rows = n_rows
+        self.n_cols = n_cols
+        squares = [(r, c) for r in range(n_rows) for c in range(n_cols)]
+
+        def bit(coord: Coord) -> int:
+            return 1 << (coord.r * n_cols + coord.c)
+
+        def ascending(dr: int, dc: int) -> bool:
+            return dr * n_cols + dc > 0
+
+        self.leaps = dict()
+        self.lame = dict()
+        self.lines = dict()
+        self.hops = dict()
+
+        for color in Color:
+            leaps = []
+            lame = []
+            for r, c in squares:
+                groups: dict[tuple[PieceType, ...], int] = dict()
+                lame.append([])
+                for fr, via, (_, types) in attacks.leaps[color][r][c]:
+                    if via is None:
+                        groups[types] = groups.get(types, 0) | bit(fr)
+                    else:
+                        lame[-1].append((bit(fr), bit(via), types))
+                leaps.append([(m, types) for types, m in groups.items()])
+            self.leaps[color] = leaps
+            self.lame[color] = lame
+
+            by_types: dict[tuple[PieceType, ...], list] = dict()
+            for d, rays, (_, types) in attacks.lines[color]:
+                by_types.setdefault(types, []).append((d, rays))
+            self.lines[color] = [
+                [
+                    (
+                        types,
+                        sum(mask(rays[r][c], n_cols) for _, rays in dirs),
+                        [
+                            (mask(rays[r][c], n_cols), ascending(*d))
+                            for d, rays in dirs
+                            if rays[r][c]
+                        ]
+                    )
+                    for types, dirs in by_types.items()
+                ]
+                for r, c in squares
+            ]
+
+            t = tables(n_rows, n_cols)
+            self.hops[color] = [
+                [
+                    (
+                        1 << ((r - sr) * n_cols + (c - sc)),
+                        [
+                            (
+                                mask(t.ray(r - sr, c - sc, -dr, -dc), n_cols),
+                                ascending(-dr, -dc),
+                                types
+                            )
+                            for (dr, dc), (_, types) in hops
+                        ]
+                    )
+                    for (sr, sc), hops in attacks.hops[color].items()
+                    if t.in_bounds(r - sr, c - sc)
+                ]
+                for r, c in squares
+            ]
+
+
+@cache
+def masks(attacks: AttackTables) -> BitMasks:
+    return BitMasks(attacks)
+
+
+class BitBoard(Board):
+    """
+    Board that additionally keeps occupancy as one integer bitmask per color
+    and per piece type, so attack queries are a handful of bitwise operations.
+
+    The square grid is kept in sync as well, since piece rules and frontends
+    read it directly.
+    """
+    colors: dict[Color, int]
+    types: dict[PieceType, int]
+
+    def __init__(self, spec_path: str):
+        self.colors = {color: 0 for color in Color}
+        self.types = {type: 0 for type in PieceType}
+        super().__init__(spec_path)
+
+    def copy(self) -> "BitBoard":
+        board = super().copy()
+        board.colors = dict(self.colors)
+        board.types = dict(self.types)
+        return board
+
+    def _square(self, coord: Coord) -> int:
+        return coord.r * self.n_cols + coord.c
+
+    def _place(self, piece: Piece, coord: Coord):
+        super()._place(piece, coord)
+        bit = 1 << self._square(coord)
+        self.colors[piece.color] |= bit
+        self.types[piece.type] |= bit
+
+    def _lift(self, coord: Coord) -> Optional[Piece]:
+        piece = super()._lift(coord)
+        if piece is not None:
+            bit = 1 << self._square(coord)
+            self.colors[piece.color] &= ~bit
+            self.types[piece.type] &= ~bit
+        return piece
+
+    def occupied(self, color: Optional[Color] = None) -> int:
+        if color is None:
+            return self.colors[Color.WHITE] | self.colors[Color.BLACK]
+        return self.colors[color]
+
+    def _of(self, color: Color, types) -> int:
+        m = 0
+        for type in types:
+            m |= self.types[type]
+        return m & self.colors[color]
+
+    def attacked_by(self, to: Coord, color: Color) -> bool:
+        m = masks(self.attacks)
+        sq = self._square(to)
+        occ = self.occupied()
+
+        for leaps, types in m.leaps[color][sq]:
+            if leaps & self._of(color, types):
+                return True
+
+        for fr, via, types in m.lame[color][sq]:
+            if not via & occ and fr & self._of(color, types):
+                return True
+
+        for types, lines, rays in m.lines[color][sq]:
+            sliders = lines & self._of(color, types)
+            if not sliders:
+                continue
+            for ray, ascending in rays:
+                if nearest(ray & occ, ascending) & sliders:
+                    return True
+
+        for hurdle, lines in m.hops[color][sq]:
+            if not hurdle & occ:
+                continue
+            for ray, ascending, types in lines:
+                if nearest(ray & occ, ascending) & self._of(color, types):
+                    return True
+
+        return False
@@ -1,51 +1,98 @@
-import json
+import copy
 # from tabulate import tabulate
+from dataclasses import dataclass
 from typing import Optional, Tuple
 from .piece import *
 from .color.color import Color
 from .move.coord import Coord
+from .move.move import Move
+from .move.tables import tables
+from .betza import PieceRules, rules
+from .attacks import AttackTables, attacks
+from .zobrist import Zobrist, zobrist
+from .spec import Spec, load_spec
+from .cache import PositionCache, PositionInfo, move_id, positions
+
+
+# everything needed to take back a move made with Board.make: the moving and
+# captured piece objects are restored as-is, and the map delta is the moving
+# piece's key going fr -> to plus the captured piece's key at to
+@dataclass
+class Undo:
+    move: Move
+    moving: Piece
+    captured: Optional[Piece]
+
+
+# starting positions by board class and spec, copied by Board.from_spec
+_templates: dict[tuple[type, Spec], "Board"] = dict()
 
 
 class Board:
     # white promotes at highest-index row, black at row 0
     board: list[list[Optional[Piece]]]
     map: dict[Tuple[Color, PieceType], set[Coord]]
+    history: list[Undo]
+    cache: PositionCache
+    zobrist: Zobrist
+    # movement of each piece type: the classes' built-in definitions, with
+    # any given in the spec's optional "pieces" section (name -> Betza-style
+    # notation, see betza.py) taking their place
+    rules: dict[PieceType, PieceRules]
+    attacks: AttackTables
+    # side to move, for the key and for serialization; white until the first
+    # pass_turn
+    turn: Color
+    # Zobrist key of the position, updated incrementally as pieces are placed
+    # and lifted and as the turn passes
+    key: int
 
     def __init__(self, spec_path: str):
-        if not spec_path.endswith(".json"):
-            raise ValueError()
+        spec = load_spec(spec_path)
 
-        with open(spec_path) as spec_file:
-            spec = json.loads(spec_file.read())
+        self.board = [[None for _ in range(spec.n_cols)] for _ in range(spec.n_rows)]
+        self.map = dict()
+        self.history = []
+        self.cache = positions
+        self.zobrist = zobrist(spec.n_rows, spec.n_cols, spec.seed)
+        self.turn = Color.WHITE
+        self.key = 0
 
-        assert {"size", "white", "black"} == set(spec.keys())
+        self.rules = {cls.type: rules(cls.notation) for cls in Piece.__subclasses__()}
+        for type, notation in spec.pieces:
+            self.rules[type] = rules(notation)
+        self.attacks = attacks(tuple(self.rules.items()), spec.n_rows, spec.n_cols)
 
-        size, white, black = spec["size"], spec["white"], spec["black"]
+        for type, color, coord in spec.placement:
+            self.add_piece(type, color, coord)
 
-        assert PieceType.KING.value in white and PieceType.KING.value in black
+    @classmethod
+    def from_spec(cls, spec_path: str) -> "Board":
+        """
+        A board in the spec's starting position, cloned from a template that
+        is built once per spec and board class rather than set up piece by
+        piece.
+        """
+        spec = load_spec(spec_path)
+        template = _templates.get((cls, spec))
+        if template is None:
+            template = _templates[(cls, spec)] = cls(spec_path)
+        return template.copy()
 
-        self.board = [[None for _ in range(size["w"])] for _ in range(size["h"])]
-        self.map = dict()
-
-        self.add_piece(
-            PieceType.KING,
-            Color.WHITE,
-            Coord.from_str(white[PieceType.KING.value])
-        )
-        self.add_piece(
-            PieceType.KING,
-            Color.BLACK,
-            Coord.from_str(black[PieceType.KING.value])
-        )
-
-        for color, dct in [(Color.WHITE, white), (Color.BLACK, black)]:
-            for name, locs in [(n, ls) for (n, ls) in dct.items() if n != PieceType.KING.value]:
-                for loc in locs:
-                    self.add_piece(
-                        PieceType(name),
-                        color,
-                        Coord.from_str(loc)
-                    )
+    def copy(self) -> "Board":
+        """
+        Structural copy of the position with its own grid, map and pieces
+        and an empty history; rule tables, Zobrist keys and the position
+        cache are shared.
+        """
+        board = copy.copy(self)
+        board.board = [
+            [None if p is None else p.copy() for p in row]
+            for row in self.board
+        ]
+        board.map = {key: set(coords) for key, coords in self.map.items()}
+        board.history = []
+        return board
     
     def piece_at(self, x: Coord | int, c: Optional[int] = None) -> Optional[Piece]:
         if isinstance(x, Coord):
@@ -53,12 +100,7 @@ class Board:
         else:
             return self.board[x][c]
 
-    def _map_add(self, c: Coord):
-        p = self.piece_at(c)
-
-        if p is None:
-            return
-        
+    def _map_add(self, p: Piece, c: Coord):
         key = (p.color, p.type)
 
         if key not in self.map:
@@ -73,29 +115,119 @@ class Board:
 
         if len(self.map[key]) == 0:
             del self.map[key]
-    
-    def add_piece(self, type: PieceType, color: Color, coord: Coord):
+
+    def _place(self, piece: Piece, coord: Coord):
         assert self.board[coord.r][coord.c] is None
-        self.board[coord.r][coord.c] = new_piece(type, color, coord)
-        self._map_add(coord)
-    
-    def remove_piece(self, coord: Coord) -> Optional[Piece]:
+        piece.loc = coord
+        self.board[coord.r][coord.c] = piece
+        self._map_add(piece, coord)
+        self.key ^= self.zobrist.pieces[(piece.color, piece.type)][coord.r][coord.c]
+
+    def _lift(self, coord: Coord) -> Optional[Piece]:
         piece = self.piece_at(coord)
         if piece is None:
-            return
+            return None
         self._map_remove(piece, coord)
         self.board[coord.r][coord.c] = None
+        self.key ^= self.zobrist.pieces[(piece.color, piece.type)][coord.r][coord.c]
         return piece
+    
+    def add_piece(self, type: PieceType, color: Color, coord: Coord):
+        self._place(new_piece(type, color, coord, self.rules[type]), coord)
+    
+    def remove_piece(self, coord: Coord) -> Optional[Piece]:
+        return self._lift(coord)
 
     def move_piece(self, fr: Coord, to: Coord):
         assert self.board[fr.r][fr.c] is not None
         # remove captured piece, if any
-        self.remove_piece(to)
-        # remove moving piece from old location
-        moving = self.remove_piece(fr)
-        # insert moving piece at new location
-        self.add_piece(moving.type, moving.color, to)
+        self._lift(to)
+        # move the same piece object, so its identity survives the move
+        self._place(self._lift(fr), to)
+
+    def make(self, move: Move):
+        assert self.board[move.fr.r][move.fr.c] is not None
+        captured = self._lift(move.to)
+        moving = self._lift(move.fr)
+        self._place(moving, move.to)
+        self.pass_turn()
+        self.history.append(Undo(move, moving, captured))
+
+    def unmake(self) -> Move:
+        undo = self.history.pop()
+        self.pass_turn()
+        self._lift(undo.move.to)
+        self._place(undo.moving, undo.move.fr)
+        if undo.captured is not None:
+            self._place(undo.captured, undo.move.to)
+        return undo.move
     
+    def pass_turn(self):
+        self.turn = Color.other(self.turn)
+        self.key ^= self.zobrist.side
+
+    def to_fen(self) -> str:
+        """
+        Compact text form of the position: rows from the highest index down,
+        separated by '/', each piece as its char code (lower case for black)
+        and runs of empty squares as counts, then the side to move.
+        """
+        rows = []
+        for r in reversed(range(self.n_rows)):
+            row = ""
+            empty = 0
+            for p in self.board[r]:
+                if p is None:
+                    empty += 1
+                    continue
+                if empty > 0:
+                    row += str(empty)
+                    empty = 0
+                code = p.type.char_code
+                row += code if p.color is Color.WHITE else code.lower()
+            if empty > 0:
+                row += str(empty)
+            rows.append(row)
+        return f"{'/'.join(rows)} {'w' if self.turn is Color.WHITE else 'b'}"
+
+    def load_fen(self, fen: str):
+        placement, turn = fen.split(" ")
+        rows = placement.split("/")
+
+        if len(rows) != self.n_rows:
+            raise ValueError(fen)
+
+        self.history = []
+        for r in range(self.n_rows):
+            for c in range(self.n_cols):
+                self._lift(Coord(r, c))
+
+        for r, row in zip(reversed(range(self.n_rows)), rows):
+            c = 0
+            digits = ""
+            for ch in row + " ":
+                if ch.isdigit():
+                    digits += ch
+                    continue
+                if digits:
+                    c += int(digits)
+                    digits = ""
+                if ch == " ":
+                    break
+                if c >= self.n_cols:
+                    raise ValueError(fen)
+                self.add_piece(
+                    PieceType.from_char_code(ch.upper()),
+                    Color.WHITE if ch.isupper() else Color.BLACK,
+                    Coord(r, c)
+                )
+                c += 1
+            if c != self.n_cols:
+                raise ValueError(fen)
+
+        if (turn == "b") != (self.turn is Color.BLACK):
+            self.pass_turn()
+
     @property
     def n_rows(self) -> int:
         return len(self.board)
@@ -107,77 +239,285 @@ class Board:
     def n_squares(self) -> int:
         return self.n_rows * self.n_cols
     
+    def king_loc(self, color: Color) -> Coord:
+        kings = self.map.get((color, PieceType.KING))
+        if not kings:
+            raise ValueError(self.board)
+        return next(iter(kings))
+
     def exists_check(self, color: Color) -> bool:
-        king = None
+        return self.attacked_by(self.king_loc(color), Color.other(color))
 
-        for r in range(self.n_rows):
-            for c in range(self.n_cols):
-                p = self.piece_at(r, c)
-                if isinstance(p, King) and p.color is color:
-                    king = p
+    def attacked_by(self, to: Coord, color: Color) -> bool:
+        """
+        Whether any piece of the given color can move to the given square,
+        found by looking outward from that square (see AttackTables) rather
+        than by asking every piece on the board.
+        """
+        a = self.attacks
+        board = self.board
+
+        for fr, via, (kinds, _) in a.leaps[color][to.r][to.c]:
+            p = board[fr.r][fr.c]
+            if (
+                p is not None and p.color is color and isinstance(p, kinds) and
+                (via is None or board[via.r][via.c] is None)
+            ):
+                return True
+
+        for _, rays, (kinds, _) in a.lines[color]:
+            for fr in rays[to.r][to.c]:
+                p = board[fr.r][fr.c]
+                if p is not None:
+                    if p.color is color and isinstance(p, kinds):
+                        return True
                     break
-            else:
+
+        # a hopper lands just past its hurdle, so look for it behind each
+        # occupied square it could have jumped, along every line it could
+        # have come in on
+        for (sr, sc), hops in a.hops[color].items():
+            hr, hc = to.r - sr, to.c - sc
+            if not (0 <= hr < a.n_rows and 0 <= hc < a.n_cols):
                 continue
-            break
-        
-        if king is None:
-            raise ValueError(self.board)
-        
-        return any(
-            any(
-                self.piece_at(r, c) is not None and
-                self.piece_at(r, c).can_move_to(
-                    self.board, king.loc
-                )
-                for c in range(self.n_cols)
-            )
-            for r in range(self.n_rows)
-        )
+            if board[hr][hc] is None:
+                continue
+            for (dr, dc), (kinds, _) in hops:
+                r, c = hr - dr, hc - dc
+                while 0 <= r < a.n_rows and 0 <= c < a.n_cols:
+                    p = board[r][c]
+                    if p is not None:
+                        if p.color is color and isinstance(p, kinds):
+                            return True
+                        break
+                    r, c = r - dr, c - dc
 
-    def exists_check_after_move(self, color: Color, move: Move) -> bool:
-        restore = self.piece_at(move.to)
+        return False
 
-        self.move_piece(move.fr, move.to)
-        
-        check_exists = self.exists_check(color)
+    def _checks(
+            self, k: Coord, color: Color) -> list[tuple[set[int], set[int]]]:
+        """
+        One entry per line along which a piece of the given color attacks the
+        square k: the squares a move could land on to stop that attack
+        (capturing or blocking) and the squares it could leave to stop it
+        (a hopper's hurdle). Squares are numbered r * n_cols + c.
+        """
+        a = self.attacks
+        board = self.board
+        w = self.n_cols
+        checks = []
 
-        self.move_piece(move.to, move.fr)
+        def attacker(coord: Coord, kinds) -> bool:
+            p = board[coord.r][coord.c]
+            return p is not None and p.color is color and isinstance(p, kinds)
 
-        if restore is not None:
-            self.add_piece(restore.type, restore.color, restore.loc)
-        
+        for fr, via, (kinds, _) in a.leaps[color][k.r][k.c]:
+            if via is not None and board[via.r][via.c] is not None:
+                continue
+            if attacker(fr, kinds):
+                lands = {fr.r * w + fr.c}
+                if via is not None:
+                    lands.add(via.r * w + via.c)
+                checks.append((lands, set()))
+
+        for _, rays, (kinds, _) in a.lines[color]:
+            line = set()
+            for fr in rays[k.r][k.c]:
+                line.add(fr.r * w + fr.c)
+                if board[fr.r][fr.c] is not None:
+                    if attacker(fr, kinds):
+                        checks.append((line, set()))
+                    break
+
+        for (sr, sc), hops in a.hops[color].items():
+            hr, hc = k.r - sr, k.c - sc
+            if not (0 <= hr < a.n_rows and 0 <= hc < a.n_cols):
+                continue
+            if board[hr][hc] is None:
+                continue
+            for (dr, dc), (kinds, _) in hops:
+                line = set()
+                r, c = hr - dr, hc - dc
+                while 0 <= r < a.n_rows and 0 <= c < a.n_cols:
+                    line.add(r * w + c)
+                    if board[r][c] is not None:
+                        if attacker(Coord(r, c), kinds):
+                            checks.append((line, {hr * w + hc}))
+                        break
+                    r, c = r - dr, c - dc
+
+        return checks
+
+    def _unsafe_squares(self, k: Coord, color: Color) -> set[int]:
+        """
+        Squares that a move by the side whose king is on k must not leave or
+        enter without being tried on the board: pinned pieces, the middle
+        square of a lame leap at k, and, if the other side has hoppers, the
+        squares they could use as a hurdle and the lines from those to an
+        enemy hopper with at most one piece in between. Any other move by a
+        piece other than the king cannot uncover an attack on k.
+        """
+        a = self.attacks
+        board = self.board
+        w = self.n_cols
+        them = Color.other(color)
+        unsafe = set()
+
+        for _, rays, (kinds, _) in a.lines[them]:
+            pinned = None
+            for sq in rays[k.r][k.c]:
+                p = board[sq.r][sq.c]
+                if p is None:
+                    continue
+                if pinned is None and p.color is color:
+                    pinned = sq
+                    continue
+                if pinned is not None and p.color is them and isinstance(p, kinds):
+                    unsafe.add(pinned.r * w + pinned.c)
+                break
+
+        for fr, via, (kinds, _) in a.leaps[them][k.r][k.c]:
+            if via is not None:
+                p = board[fr.r][fr.c]
+                if p is not None and p.color is them and isinstance(p, kinds):
+                    unsafe.add(via.r * w + via.c)
+
+        _, hop_types = a.hoppers[them]
+        if any((them, type) in self.map for type in hop_types):
+            for (sr, sc), hops in a.hops[them].items():
+                hr, hc = k.r - sr, k.c - sc
+                if not (0 <= hr < a.n_rows and 0 <= hc < a.n_cols):
+                    continue
+                unsafe.add(hr * w + hc)
+                for (dr, dc), (kinds, _) in hops:
+                    line = []
+                    blockers = 0
+                    r, c = hr - dr, hc - dc
+                    while 0 <= r < a.n_rows and 0 <= c < a.n_cols:
+                        p = board[r][c]
+                        if p is not None:
+                            if p.color is them and isinstance(p, kinds):
+                                unsafe.update(line)
+                                break
+                            blockers += 1
+                            if blockers > 1:
+                                break
+                        line.append(r * w + c)
+                        r, c = r - dr, c - dc
+
+        return unsafe
+
+    def _check_after(self, color: Color, move: Move) -> bool:
+        self.make(move)
+        check_exists = self.exists_check(color)
+        self.unmake()
         return check_exists
 
-    # we will consider stalemate as checkmate
-    def is_checkmated(self, color: Color) -> int:
-        if not self.exists_check(color):
-            return False
-
-        def can_move_and_no_check_after(p: Piece, to: Coord) -> bool:
-            move = p.can_move_to(self.board, to)
-            if move is None:
-                return False
-            return not self.exists_check_after_move(color, move)
-
-        # this certainly could be done more efficiently, but it's fast enough
-        return not any(
-            any(
-                self.piece_at(r, c) is not None and
-                self.piece_at(r, c).color is color and
-                any (
-                    any(
-                        can_move_and_no_check_after(
-                            self.piece_at(r, c),
-                            Coord(rto, cto)
-                        )
-                        for cto in range(self.n_cols)
-                    )
-                    for rto in range(self.n_rows)
-                )
-                for c in range(self.n_cols)
-            )
-            for r in range(self.n_rows)
-        )
+    def exists_check_after_move(self, color: Color, move: Move) -> bool:
+        piece = self.piece_at(move.fr)
+        if piece is None or move.special is not None:
+            return self._check_after(color, move)
+
+        info = self.position(piece.color)
+        id = move_id(move)
+
+        if id not in info.safe:
+            return self._check_after(color, move)
+        if color is piece.color:
+            return not info.safe[id]
+        if id not in info.gives_check:
+            info.gives_check[id] = self._check_after(color, move)
+        return info.gives_check[id]
+
+    def pieces(self, color: Color) -> list[Piece]:
+        return [
+            self.piece_at(coord)
+            for (c, _), coords in self.map.items() if c is color
+            for coord in coords
+        ]
+
+    def moves(self, color: Color) -> list[Move]:
+        return [
+            move
+            for p in self.pieces(color)
+            for move in p.moves(self.board)
+        ]
+
+    def hyperdrive_moves(self, color: Color) -> list[Move]:
+        k = self.king_loc(color)
+        t = tables(self.n_rows, self.n_cols)
+        return [
+            Move(k, to, False, SpecialMove.HYPERDRIVE)
+            for row in t.coords
+            for to in row
+            if self.board[to.r][to.c] is None
+        ]
+
+    def legal_moves(self, color: Color, hyperdrive: bool = False) -> list[Move]:
+        """
+        Generated moves that do not leave the mover in check, plus the king's
+        hyperdrive jumps if it is still available. Checkers and pins are
+        worked out once; only king moves, moves that might uncover an attack
+        and, when in check, moves that might answer every checker are tried on
+        the board.
+        """
+        k = self.king_loc(color)
+        w = self.n_cols
+        king_sq = k.r * w + k.c
+        checks = self._checks(k, Color.other(color))
+        unsafe = self._unsafe_squares(k, color)
+
+        moves = self.moves(color)
+        if hyperdrive:
+            moves += self.hyperdrive_moves(color)
+
+        legal = []
+        for move in moves:
+            fr = move.fr.r * w + move.fr.c
+            to = move.to.r * w + move.to.c
+
+            if fr == king_sq:
+                pass
+            elif checks:
+                if not all(to in lands or fr in leaves for lands, leaves in checks):
+                    continue
+            elif fr not in unsafe and to not in unsafe:
+                legal.append(move)
+                continue
+
+            if not self._check_after(color, move):
+                legal.append(move)
+
+        return legal
+
+    def position(self, color: Color, hyperdrive: bool = False) -> PositionInfo:
+        """
+        Check status and legal moves for the given color, computed once per
+        position and then served from the shared position cache. The
+        returned info must not be modified.
+        """
+        key = (self.key, color, hyperdrive)
+        info = self.cache.get(key)
+
+        if info is None:
+            info = PositionInfo(self.exists_check(color))
+            info.legal = self.legal_moves(color, hyperdrive)
+            legal = {move_id(move) for move in info.legal}
+            for move in self.moves(color):
+                id = move_id(move)
+                info.safe[id] = id in legal
+            self.cache.put(key, info)
+
+        return info
+
+    def is_checkmated(self, color: Color, hyperdrive: bool = False) -> int:
+        info = self.position(color, hyperdrive)
+        return info.in_check and len(info.legal) == 0
+
+    # no legal move but not in check: all that is left is to pass
+    def is_stalemated(self, color: Color, hyperdrive: bool = False) -> bool:
+        info = self.position(color, hyperdrive)
+        return not info.in_check and len(info.legal) == 0
         
     def __str__(self) -> str:
         # char_codes = [
@@ -0,0 +1,91 @@
+from collections import OrderedDict
+from threading import Lock
+from typing import Optional
+from .color.color import Color
+from .move.move import Move
+
+
+# a move's packed squares (Move.id): fr and to, without capture or special
+MoveId = int
+
+
+def move_id(move: Move) -> MoveId:
+    return move.id
+
+
+class PositionInfo:
+    """
+    Facts about one position from one color's point of view: whether it is in
+    check, its legal moves, and for every generated move whether it is safe
+    (does not leave the king in check) and, once asked, whether it checks the
+    other king.
+    """
+    in_check: bool
+    legal: list[Move]
+    safe: dict[MoveId, bool]
+    gives_check: dict[MoveId, bool]
+
+    def __init__(self, in_check: bool):
+        self.in_check = in_check
+        self.legal = []
+        self.safe = dict()
+        self.gives_check = dict()
+
+
+class PositionCache:
+    """
+    Bounded LRU map from (Zobrist key, color, hyperdrive available) to
+    PositionInfo. Safe to share with pondering threads.
+    """
+    capacity: int
+    entries: OrderedDict[tuple[int, Color, bool], PositionInfo]
+    lock: Lock
+    hits: int
+    misses: int
+    evictions: int
+
+    def __init__(self, capacity: int = 4096):
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: tuple[int, Color, bool]) -> Optional[PositionInfo]:
+        with self.lock:
+            info = self.entries.get(key)
+            if info is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return info
+
+    def put(self, key: tuple[int, Color, bool], info: PositionInfo):
+        with self.lock:
+            self.entries[key] = info
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.capacity:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self) -> dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "capacity": self.capacity,
+            "size": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+# shared by every board in the process; keys are seeded per spec, so boards
+# of different specs do not collide
+positions = PositionCache()
@@ -1,12 +1,28 @@
 from random import randint
-from dataclasses import dataclass
 
 
-@dataclass
 class Coord:
+    """
+    An immutable board square. Coords are interned: Coord(r, c) always returns
+    the same object for the same square, so boards of any size share one
+    instance per square and comparing or hashing them is cheap.
+    """
+    __slots__ = ("r", "c", "_hash")
     r: int
     c: int
 
+    _interned: dict[tuple[int, int], "Coord"] = dict()
+
+    def __new__(cls, r: int, c: int):
+        coord = cls._interned.get((r, c))
+        if coord is None:
+            coord = super().__new__(cls)
+            object.__setattr__(coord, "r", r)
+            object.__setattr__(coord, "c", c)
+            object.__setattr__(coord, "_hash", hash((r, c)))
+            cls._interned[(r, c)] = coord
+        return coord
+
     @classmethod
     def from_str(cls, s):
         return cls(
@@ -21,6 +37,15 @@ class Coord:
             randint(0, n_cols - 1)
         )
 
+    def __setattr__(self, name, value):
+        raise AttributeError("Coord is immutable")
+
+    def __reduce__(self):
+        return Coord, (self.r, self.c)
+
+    def __repr__(self) -> str:
+        return f"Coord(r={self.r}, c={self.c})"
+
     def __str__(self) -> str:
         return f"{chr(self.c + ord('a'))}{self.r + 1}"
     
@@ -28,7 +53,11 @@ class Coord:
         return (x for x in (self.r, self.c))
     
     def __eq__(self, other) -> bool:
+        if self is other:
+            return True
+        if not isinstance(other, Coord):
+            return NotImplemented
         return self.r == other.r and self.c == other.c
     
     def __hash__(self) -> int:
-        return hash(self.__str__())
+        return self._hash
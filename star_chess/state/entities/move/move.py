@@ -1,20 +1,121 @@
 from .coord import Coord
 from enum import Enum
 from typing import Optional
-from dataclasses import dataclass
 
 
 class SpecialMove(Enum):
     HYPERDRIVE = 0
 
 
-@dataclass
+# a move is packed into one int:
+#   bits  0- 4  fr.r    bits  5-10  fr.c
+#   bits 11-15  to.r    bits 16-21  to.c
+#   bit  22     capture
+#   bits 23-24  special, as its value plus one (0 for none)
+# so boards of up to 32 rows by 64 columns; the low 22 bits identify the move
+# by its squares alone
+ROW_BITS = 5
+COL_BITS = 6
+SQUARE_BITS = ROW_BITS + COL_BITS
+# the largest board a spec may have: as many rows as the packing has room
+# for, and only as many columns as there are letters to name them (squares
+# are written a1, b1, ..., see Coord and record.py)
+MAX_ROWS = 1 << ROW_BITS
+MAX_COLS = min(1 << COL_BITS, 26)
+SQUARE_MASK = (1 << SQUARE_BITS) - 1
+ID_MASK = (1 << 2 * SQUARE_BITS) - 1
+CAPTURE_BIT = 1 << 2 * SQUARE_BITS
+SPECIAL_SHIFT = 2 * SQUARE_BITS + 1
+
+_SPECIALS = [None, *SpecialMove]
+
+
+def pack_square(coord: Coord) -> int:
+    if not (0 <= coord.r < MAX_ROWS and 0 <= coord.c < MAX_COLS):
+        raise ValueError(f"square out of range: {coord!r}")
+    return coord.r | coord.c << ROW_BITS
+
+
+def unpack_square(packed: int) -> Coord:
+    return _SQUARES[packed]
+
+
+_SQUARES = [
+    Coord(packed & (1 << ROW_BITS) - 1, packed >> ROW_BITS)
+    for packed in range(1 << SQUARE_BITS)
+]
+
+
 class Move:
-    fr: Coord
-    to: Coord
-    capture: bool
-    special: Optional[SpecialMove] = None
-    msg: Optional[str] = None
+    """
+    An immutable move, stored as a packed int (see above) plus an optional
+    message for the opponent. fr, to, capture and special decode it on
+    access; code is the packed form and id the part that names the squares.
+    """
+    __slots__ = ("code", "msg")
+    code: int
+    msg: Optional[str]
+
+    def __init__(
+            self, fr: Coord, to: Coord, capture: bool,
+            special: Optional[SpecialMove] = None, msg: Optional[str] = None):
+        code = pack_square(fr) | pack_square(to) << SQUARE_BITS
+        if capture:
+            code |= CAPTURE_BIT
+        if special is not None:
+            code |= (special.value + 1) << SPECIAL_SHIFT
+        object.__setattr__(self, "code", code)
+        object.__setattr__(self, "msg", msg)
+
+    @classmethod
+    def from_code(cls, code: int, msg: Optional[str] = None) -> "Move":
+        move = cls.__new__(cls)
+        object.__setattr__(move, "code", code)
+        object.__setattr__(move, "msg", msg)
+        return move
+
+    @property
+    def fr(self) -> Coord:
+        return _SQUARES[self.code & SQUARE_MASK]
+
+    @property
+    def to(self) -> Coord:
+        return _SQUARES[self.code >> SQUARE_BITS & SQUARE_MASK]
+
+    @property
+    def capture(self) -> bool:
+        return self.code & CAPTURE_BIT != 0
+
+    @property
+    def special(self) -> Optional[SpecialMove]:
+        return _SPECIALS[self.code >> SPECIAL_SHIFT]
+
+    @property
+    def id(self) -> int:
+        return self.code & ID_MASK
+
+    def with_msg(self, msg: Optional[str]) -> "Move":
+        return Move.from_code(self.code, msg)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Move is immutable")
+
+    def __reduce__(self):
+        return Move.from_code, (self.code, self.msg)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Move):
+            return NotImplemented
+        return self.code == other.code and self.msg == other.msg
+
+    def __hash__(self) -> int:
+        return hash(self.code)
+
+    def __repr__(self) -> str:
+        return (
+            f"Move(fr={self.fr!r}, to={self.to!r}, capture={self.capture}, " +
+            f"special={self.special}, msg={self.msg!r})"
+        )
 
     def __str__(self) -> str:
         return f"{self.fr} > {self.to} [{'x' if self.capture else ' '}]"
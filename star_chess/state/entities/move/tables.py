@@ -0,0 +1,51 @@
+from functools import cache
+from .coord import Coord
+
+
+ORTHOGONAL = ((1, 0), (-1, 0), (0, 1), (0, -1))
+DIAGONAL = ((1, 1), (1, -1), (-1, 1), (-1, -1))
+OMNIDIRECTIONAL = ORTHOGONAL + DIAGONAL
+
+
+class MoveTables:
+    """
+    Per-board-size square tables, indexed as table[r][c]: the interned
+    coordinates, and for each of the eight unit directions the ray of
+    squares a slider passes over in order, so a generator can stop at the
+    first occupied one. Piece movement itself is compiled from its
+    definition (see betza.py).
+    """
+    n_rows: int
+    n_cols: int
+    coords: list[list[Coord]]
+    rays: dict[tuple[int, int], list[list[list[Coord]]]]
+
+    def __init__(self, n_rows: int, n_cols: int):
+        self.n_rows = n_rows
+        self.n_cols = n_cols
+        self.coords = [[Coord(r, c) for c in range(n_cols)] for r in range(n_rows)]
+
+        # single ray per square for a given direction, possibly empty
+        self.rays = {
+            (dr, dc): [
+                [self.ray(r, c, dr, dc) for c in range(n_cols)]
+                for r in range(n_rows)
+            ]
+            for dr, dc in OMNIDIRECTIONAL
+        }
+
+    def in_bounds(self, r: int, c: int) -> bool:
+        return 0 <= r < self.n_rows and 0 <= c < self.n_cols
+
+    def ray(self, r: int, c: int, dr: int, dc: int) -> list[Coord]:
+        ray = []
+        r, c = r + dr, c + dc
+        while self.in_bounds(r, c):
+            ray.append(self.coords[r][c])
+            r, c = r + dr, c + dc
+        return ray
+
+
+@cache
+def tables(n_rows: int, n_cols: int) -> MoveTables:
+    return MoveTables(n_rows, n_cols)
@@ -4,6 +4,7 @@ from enum import Enum
 from typing import Optional
 from .move.move import Move, SpecialMove
 from .move.coord import Coord
+from .betza import CAPTURE, MOVE, PieceRules, rules
 from .color.color import Color
 
 
@@ -24,61 +25,45 @@ class PieceType(Enum):
 
     @classmethod
     def from_class(cls, c):
-        if isinstance(King.dummy(), c):
-            return cls.KING
-        elif isinstance(Rook.dummy(), c):
-            return cls.ROOK
-        elif isinstance(Sergeant.dummy(), c):
-            return cls.SERGEANT
-        elif isinstance(Wamazon.dummy(), c):
-            return cls.WAMAZON
-        elif isinstance(Bishop.dummy(), c):
-            return cls.BISHOP
-        elif isinstance(Knight.dummy(), c):
-            return cls.KNIGHT
-        elif isinstance (Camel.dummy(), c):
-            return cls.CAMEL
-        elif isinstance(Wildebeest.dummy(), c):
-            return cls.WILDEBEEST
-        elif isinstance(Queen.dummy(), c):
-            return cls.QUEEN
-        elif isinstance(Chancellor.dummy(), c):
-            return cls.CHANCELLOR
-        elif isinstance(Archbishop.dummy(), c):
-            return cls.ARCHBISHOP
-        elif isinstance(Grasshopper.dummy(), c):
-            return cls.GRASSHOPPER
-        else:
+        if not (isinstance(c, type) and issubclass(c, Piece)) or c.type is None:
             raise ValueError()
+        return c.type
     
     def to_class(self):
         match self:
             case PieceType.KING:
-                return King.dummy().__class__
+                return King
             case PieceType.ROOK:
-                return Rook.dummy().__class__
+                return Rook
             case PieceType.SERGEANT:
-                return Sergeant.dummy().__class__
+                return Sergeant
             case PieceType.WAMAZON:
-                return Wamazon.dummy().__class__
+                return Wamazon
             case PieceType.BISHOP:
-                return Bishop.dummy().__class__
+                return Bishop
             case PieceType.KNIGHT:
-                return Knight.dummy().__class__
+                return Knight
             case PieceType.CAMEL:
-                return Camel.dummy().__class__
+                return Camel
             case PieceType.WILDEBEEST:
-                return Wildebeest.dummy().__class__
+                return Wildebeest
             case PieceType.QUEEN:
-                return Queen.dummy().__class__
+                return Queen
             case PieceType.CHANCELLOR:
-                return Chancellor.dummy().__class__
+                return Chancellor
             case PieceType.ARCHBISHOP:
-                return Archbishop.dummy().__class__
+                return Archbishop
             case PieceType.GRASSHOPPER:
-                return Grasshopper.dummy().__class__
+                return Grasshopper
         raise ValueError()
     
+    @classmethod
+    def from_char_code(cls, code: str):
+        for type in cls:
+            if type.char_code == code:
+                return type
+        raise ValueError(code)
+
     @property
     def char_code(self) -> str:
         match self:
@@ -110,8 +95,10 @@ class PieceType(Enum):
                 return "G"
 
 
-def new_piece(type: PieceType, color: Color, loc: Coord, _id: list[int] = [0]) -> Piece:
-    piece = type.to_class()(color, loc, _id[0])
+def new_piece(
+        type: PieceType, color: Color, loc: Coord,
+        piece_rules: Optional[PieceRules] = None, _id: list[int] = [0]) -> Piece:
+    piece = type.to_class()(color, loc, _id[0], piece_rules)
     _id[0] += 1
     return piece
 
@@ -135,32 +122,79 @@ def img_wrap(filename: str) -> str:
 
 
 class Piece(ABC):
+    # the piece type and its default movement (see betza.py) are class
+    # attributes set by each subclass; a board may give a piece other rules
+    __slots__ = ("color", "loc", "id", "rules")
+    type: Optional[PieceType] = None
+    notation: str = ""
     color: Color
     loc: Coord
     id: int
+    rules: PieceRules
 
-    def __init__(self, color: Color, loc: Coord, id: int):
+    def __init__(
+            self, color: Color, loc: Coord, id: int,
+            piece_rules: Optional[PieceRules] = None):
         self.color = color
         self.loc = loc
         self.id = id
+        self.rules = rules(self.notation) if piece_rules is None else piece_rules
 
     @classmethod
     def dummy(cls):
         return cls(Color.WHITE, Coord(0, 0), -1)
 
-    @property
-    def type(self):
-        return PieceType.from_class(self.dummy().__class__)
-    
-    @abstractmethod
+    def copy(self) -> Piece:
+        return self.__class__(self.color, self.loc, self.id, self.rules)
+
     def can_move_to(
         self, board: list[list[Optional[Piece]]], to: Coord,
         special: Optional[SpecialMove] = None) -> Optional[Move]:
-        pass
+        if not (0 <= to.r < len(board)) or not (0 <= to.c < len(board[0])):
+            return None
+        return next((move for move in self.moves(board) if move.to == to), None)
 
-    @abstractmethod
     def moves(self, board: list[list[Optional[Piece]]]) -> list[Move]:
-        pass
+        t = self.rules.tables(len(board), len(board[0]))
+        loc, color = self.loc, self.color
+        r, c = loc.r, loc.c
+        mvs = []
+
+        for to, via, mode in t.leaps[color][r][c]:
+            if via is not None and board[via.r][via.c] is not None:
+                continue
+            p = board[to.r][to.c]
+            if p is None:
+                if mode & MOVE:
+                    mvs.append(Move(loc, to, False))
+            elif p.color is not color and mode & CAPTURE:
+                mvs.append(Move(loc, to, True))
+
+        for ray, mode in t.rides[color][r][c]:
+            for to in ray:
+                p = board[to.r][to.c]
+                if p is None:
+                    if mode & MOVE:
+                        mvs.append(Move(loc, to, False))
+                    continue
+                if p.color is not color and mode & CAPTURE:
+                    mvs.append(Move(loc, to, True))
+                break
+
+        for ray, landings, mode in t.hops[color][r][c]:
+            for i, hurdle in enumerate(ray):
+                if board[hurdle.r][hurdle.c] is None:
+                    continue
+                for to in landings[i]:
+                    p = board[to.r][to.c]
+                    if p is None:
+                        if mode & MOVE:
+                            mvs.append(Move(loc, to, False))
+                    elif p.color is not color and mode & CAPTURE:
+                        mvs.append(Move(loc, to, True))
+                break
+
+        return mvs
 
     @property
     @abstractmethod
@@ -173,168 +207,47 @@ class Piece(ABC):
 
 
 class King(Piece):
-    color: Color
-    loc: Coord
-    id: int
+    __slots__ = ()
+    type = PieceType.KING
+    notation = "K"
 
     def can_move_to(self, board: list[list[Optional[Piece]]], to: Coord, special: Optional[SpecialMove] = None) -> Optional[Move]:
+        if special is not SpecialMove.HYPERDRIVE:
+            return super().can_move_to(board, to)
+
         if not (0 <= to.r < len(board)) or not (0 <= to.c < len(board[0])):
             return None
         
-        if color_at(board, to) == self.color:
-            return None
-        
-        if special is SpecialMove.HYPERDRIVE:
-            if color_at(board, to) is None:
-                return Move(
-                    self.loc,
-                    to,
-                    False
-                )
-            else:
-                return None
-
-        dr = to.r - self.loc.r
-        dc = to.c - self.loc.c
-        
-        if abs(dr) > 1 or abs(dc) > 1 or (abs(dr) == abs(dc) == 0):
+        if color_at(board, to) is None:
+            return Move(
+                self.loc,
+                to,
+                False,
+                SpecialMove.HYPERDRIVE
+            )
+        else:
             return None
-        
-        return Move(
-            self.loc,
-            to,
-            board[to.r][to.c] is not None
-        )
-        
-    def moves(self, board: list[list[Optional[Piece]]]) -> list[Move]:
-        mvs = []
-        for dr in [-1, 0, 1]:
-            for dc in [-1, 0, 1]:
-                if dr == dc == 0:
-                    continue
-                r = self.loc.r + dr
-                c = self.loc.c + dc
-                if not (0 <= r < len(board)):
-                    continue
-                if not (0 <= c < len(board[0])):
-                    continue
-                if board[r][c] is not None and board[r][c].color == self.color:
-                    continue
-                mvs.append(Move(
-                    self.loc,
-                    Coord(r, c),
-                    board[r][c] is not None
-                ))
-        return mvs
-    
+
     @property
     def img_name(self) -> str:
         return f"cr90_corvette({img_cc(self.color)})"
 
 
 class Rook(Piece):
-    color: Color
-    loc: Coord
-    id: int
-
-    def can_move_to(self, board: list[list[Optional[Piece]]], to: Coord, special: Optional[SpecialMove] = None) -> Optional[Move]:
-        if not (0 <= to.r < len(board)) or not (0 <= to.c < len(board[0])):
-            return None
-        
-        if color_at(board, to) == self.color:
-            return None
-        
-        dr = to.r - self.loc.r
-        dc = to.c - self.loc.c
-
-        if not ((dr == 0) ^ (dc == 0)):
-            return None
-        if abs(dr) == 1 or abs(dc) == 1:
-            pass
-        else:
-            between_sta = (
-                self.loc.c + (1 if dc > 0 else -1)
-                if dr == 0 else
-                self.loc.r + (1 if dr > 0 else -1)
-            )
-            between_end = (
-                to.c - (1 if dc > 0 else -1)
-                if dr == 0 else
-                to.r - (1 if dr > 0 else -1)
-            )
-            rank_or_file = (
-                board[to.r]
-                if dr == 0 else
-                [board[r][to.c] for r in range(len(board))]
-            )
-
-            if between_sta > between_end:
-                between_sta, between_end = between_end, between_sta
-            
-            if any(
-                p is not None
-                for p in rank_or_file[between_sta:(between_end + 1)]
-            ):
-                return None
-
-        return Move(
-            self.loc,
-            to,
-            board[to.r][to.c] is not None
-        )
+    __slots__ = ()
+    type = PieceType.ROOK
+    notation = "R"
 
-    def moves(self, board: list[list[Optional[Piece]]]) -> list[Move]:
-        raise NotImplementedError()
-    
     @property
     def img_name(self) -> str:
         return f"e-wing_escort({img_cc(self.color)})"
 
 
 class Sergeant(Piece):
-    color: Color
-    loc: Coord
-    id: int
+    __slots__ = ()
+    type = PieceType.SERGEANT
+    notation = "fK ifmnD ifmnA"
 
-    def can_move_to(self, board: list[list[Optional[Piece]]], to: Coord, special: Optional[SpecialMove] = None) -> Optional[Move]:
-        if not (0 <= to.r < len(board)) or not (0 <= to.c < len(board[0])):
-            return None
-        
-        if color_at(board, to) == self.color:
-            return None
-        
-        dir = 1 if self.color is Color.WHITE else -1
-
-        # special case: double-move on first (cannot capture nor jump)
-        hasnt_moved = self.loc.r == (
-            2 if self.color is Color.WHITE else len(board) - 3
-        )
-        if hasnt_moved and to.r == self.loc.r + 2 * dir:
-            dc = to.c - self.loc.c
-            c_step = dc // 2
-            if (
-                dc in [-2, 0, 2] and
-                board[to.r - dir][to.c - c_step] is None and
-                board[to.r][to.c] is None
-            ):
-                return Move(self.loc, to, False)
-            
-
-        if to.r != self.loc.r + dir:
-            return None
-        
-        if (abs(to.c - self.loc.c) > 1):
-            return None
-        
-        return Move(
-            self.loc,
-            to,
-            board[to.r][to.c] is not None
-        )
-
-    def moves(self, board: list[list[Optional[Piece]]]) -> list[Move]:
-        raise NotImplementedError()
-    
     @property
     def img_name(self) -> str:
         if self.color is Color.WHITE:
@@ -344,287 +257,90 @@ class Sergeant(Piece):
 
 
 class Wamazon(Piece):
-    color: Color
-    loc: Coord
-    id: int
+    __slots__ = ()
+    type = PieceType.WAMAZON
+    notation = "QNC"
 
-    def can_move_to(self, board: list[list[Optional[Piece]]], to: Coord, special: Optional[SpecialMove] = None) -> Optional[Move]:
-        if not (
-            Rook(self.color, self.loc, None).can_move_to(board, to) or
-            Bishop(self.color, self.loc, None).can_move_to(board, to) or
-            Wildebeest(self.color, self.loc, None).can_move_to(board, to)
-        ):
-            return None
-        
-        return Move(
-            self.loc,
-            to,
-            board[to.r][to.c] is not None
-        )
-
-    def moves(self, board: list[list[Optional[Piece]]]) -> list[Move]:
-        raise NotImplementedError()
-    
     @property
     def img_name(self) -> str:
         return f"btl-s8_k-wing({img_cc(self.color)})"
 
 
 class Bishop(Piece):
-    color: Color
-    loc: Coord
-    id: int
+    __slots__ = ()
+    type = PieceType.BISHOP
+    notation = "B"
 
-    def can_move_to(self, board: list[list[Optional[Piece]]], to: Coord, special: Optional[SpecialMove] = None) -> Optional[Move]:
-        if not (0 <= to.r < len(board)) or not (0 <= to.c < len(board[0])):
-            return None
-        
-        if color_at(board, to) == self.color:
-            return None
-        
-        dist = abs(to.r - self.loc.r)
-
-        if not (
-            dist == abs(to.c - self.loc.c) and
-            dist != 0
-        ):
-            return None
-
-        dr = 1 if to.r > self.loc.r else -1
-        dc = 1 if to.c > self.loc.c else -1
-
-        for d in range(1, dist):
-            if board[self.loc.r + dr * d][self.loc.c + dc * d] is not None:
-                return None
-        
-        return Move(
-            self.loc,
-            to,
-            board[to.r][to.c] is not None
-        )
-
-    def moves(self, board: list[list[Optional[Piece]]]) -> list[Move]:
-        raise NotImplementedError()
-    
     @property
     def img_name(self) -> str:
         return f"z-95_headhunter({img_cc(self.color)})"
-    
-
-class Knight(Piece):
-    color: Color
-    loc: Coord
-    id: int
 
-    def can_move_to(self, board: list[list[Optional[Piece]]], to: Coord, special: Optional[SpecialMove] = None) -> Optional[Move]:
-        if not (0 <= to.r < len(board)) or not (0 <= to.c < len(board[0])):
-            return None
-        
-        if color_at(board, to) == self.color:
-            return None
-        
-        dr = abs(self.loc.r - to.r)
-        dc = abs(self.loc.c - to.c)
 
-        if set([dr, dc]) != {1, 2}:
-            return None
-        
-        return Move(
-            self.loc,
-            to,
-            board[to.r][to.c] is not None
-        )
+class Knight(Piece):
+    __slots__ = ()
+    type = PieceType.KNIGHT
+    notation = "N"
 
-    def moves(self, board: list[list[Optional[Piece]]]) -> list[Move]:
-        raise NotImplementedError()
-    
     @property
     def img_name(self) -> str:
         return f"btl_y-wing({img_cc(self.color)})"
 
 
 class Camel(Piece):
-    color: Color
-    loc: Coord
-    id: int
-
-    def can_move_to(self, board: list[list[Optional[Piece]]], to: Coord, special: Optional[SpecialMove] = None) -> Optional[Move]:
-        if not (0 <= to.r < len(board)) or not (0 <= to.c < len(board[0])):
-            return None
-        
-        if color_at(board, to) == self.color:
-            return None
-        
-        dr = abs(self.loc.r - to.r)
-        dc = abs(self.loc.c - to.c)
-
-        if set([dr, dc]) != {1, 3}:
-            return None
-        
-        return Move(
-            self.loc,
-            to,
-            board[to.r][to.c] is not None
-        )
+    __slots__ = ()
+    type = PieceType.CAMEL
+    notation = "C"
 
-    def moves(self, board: list[list[Optional[Piece]]]) -> list[Move]:
-        raise NotImplementedError()
-    
     @property
     def img_name(self) -> str:
         return ""
 
 
 class Wildebeest(Piece):
-    color: Color
-    loc: Coord
-    id: int
+    __slots__ = ()
+    type = PieceType.WILDEBEEST
+    notation = "NC"
 
-    def can_move_to(self, board: list[list[Optional[Piece]]], to: Coord, special: Optional[SpecialMove] = None) -> Optional[Move]:
-        if not (
-            Knight(self.color, self.loc, None).can_move_to(board, to) or
-            Camel(self.color, self.loc, None).can_move_to(board, to)
-        ):
-            return None
-        
-        return Move(
-            self.loc,
-            to,
-            board[to.r][to.c] is not None
-        )
-
-    def moves(self, board: list[list[Optional[Piece]]]) -> list[Move]:
-        raise NotImplementedError()
-    
     @property
     def img_name(self) -> str:
         return f"btl_y-wing({img_cc(self.color)}+)"
 
 
 class Queen(Piece):
-    color: Color
-    loc: Coord
-    id: int
-
-    def can_move_to(self, board: list[list[Optional[Piece]]], to: Coord, special: Optional[SpecialMove] = None) -> Optional[Move]:
-        if not (
-            Rook(self.color, self.loc, None).can_move_to(board, to) or
-            Bishop(self.color, self.loc, None).can_move_to(board, to)
-        ):
-            return None
-        
-        return Move(
-            self.loc,
-            to,
-            board[to.r][to.c] is not None
-        )
+    __slots__ = ()
+    type = PieceType.QUEEN
+    notation = "Q"
 
-    def moves(self, board: list[list[Optional[Piece]]]) -> list[Move]:
-        raise NotImplementedError()
-    
     @property
     def img_name(self) -> str:
         return f"ad-1s_modular({img_cc(self.color)})"
 
 
 class Chancellor(Piece):
-    color: Color
-    loc: Coord
-    id: int
+    __slots__ = ()
+    type = PieceType.CHANCELLOR
+    notation = "RN"
 
-    def can_move_to(self, board: list[list[Optional[Piece]]], to: Coord, special: Optional[SpecialMove] = None) -> Optional[Move]:
-        if not (
-            Rook(self.color, self.loc, None).can_move_to(board, to) or
-            Knight(self.color, self.loc, None).can_move_to(board, to)
-        ):
-            return None
-        
-        return Move(
-            self.loc,
-            to,
-            board[to.r][to.c] is not None
-        )
-
-    def moves(self, board: list[list[Optional[Piece]]]) -> list[Move]:
-        raise NotImplementedError()
-    
     @property
     def img_name(self) -> str:
         return f"e-wing_escort({img_cc(self.color)}+)"
 
 
 class Archbishop(Piece):
-    color: Color
-    loc: Coord
-    id: int
-
-    def can_move_to(self, board: list[list[Optional[Piece]]], to: Coord, special: Optional[SpecialMove] = None) -> Optional[Move]:
-        if not (
-            Bishop(self.color, self.loc, None).can_move_to(board, to) or
-            Knight(self.color, self.loc, None).can_move_to(board, to)
-        ):
-            return None
-        
-        return Move(
-            self.loc,
-            to,
-            board[to.r][to.c] is not None
-        )
+    __slots__ = ()
+    type = PieceType.ARCHBISHOP
+    notation = "BN"
 
-    def moves(self, board: list[list[Optional[Piece]]]) -> list[Move]:
-        raise NotImplementedError()
-    
     @property
     def img_name(self) -> str:
         return f"z-95_headhunter({img_cc(self.color)}+)"
 
 
 class Grasshopper(Piece):
-    color: Color
-    loc: Coord
-    id: int
+    __slots__ = ()
+    type = PieceType.GRASSHOPPER
+    notation = "gwQ"
 
-    def can_move_to(self, board: list[list[Optional[Piece]]], to: Coord, special: Optional[SpecialMove] = None) -> Optional[Move]:
-        if not (0 <= to.r < len(board)) or not (0 <= to.c < len(board[0])):
-            return None
-        
-        if color_at(board, to) == self.color:
-            return None
-
-        def sgn(x):
-            if x < 0:
-                return -1
-            elif x == 0:
-                return 0
-            else:
-                return 1
-        
-        dr = sgn(to.r - self.loc.r)
-        dc = sgn(to.c - self.loc.c)
-
-        beforeTo = Coord(to.r - dr, to.c - dc)
-
-        beforeMove = \
-            Queen(self.color, self.loc, None).can_move_to(board, beforeTo)
-
-        # grasshopper can also jump over pieces of the same color
-        if beforeMove is None:
-            beforeMove = Queen(
-                Color.other(self.color), self.loc, None
-            ).can_move_to(board, beforeTo)
-    
-        if beforeMove is None or not beforeMove.capture:
-            return None
-        
-        return Move(
-            self.loc,
-            to,
-            board[to.r][to.c] is not None
-        )
-
-    def moves(self, board: list[list[Optional[Piece]]]) -> list[Move]:
-        raise NotImplementedError()
-    
     @property
     def img_name(self) -> str:
         return f"bounty_hunter_fighter({img_cc(self.color)})"
@@ -0,0 +1,172 @@
+import hashlib
+import json
+import os
+from dataclasses import dataclass
+from typing import Optional
+from .betza import rules
+from .color.color import Color
+from .move.coord import Coord
+from .move.move import MAX_COLS, MAX_ROWS
+from .piece import PieceType
+from .zobrist import spec_seed
+
+
+# bump when Spec changes shape, so stale compiled files are ignored
+CACHE_VERSION = 4
+CACHE_DIR = "__speccache__"
+
+
+@dataclass(frozen=True)
+class Spec:
+    """
+    A validated spec: board size, starting placement (kings first) and any
+    piece definitions it overrides, plus the seed for its Zobrist keys.
+    """
+    n_rows: int
+    n_cols: int
+    placement: tuple[tuple[PieceType, Color, Coord], ...]
+    pieces: tuple[tuple[PieceType, str], ...]
+    seed: int
+
+
+def parse_spec(spec_text: str) -> Spec:
+    spec = json.loads(spec_text)
+
+    assert {"size", "white", "black"} <= set(spec.keys()) <= \
+        {"size", "white", "black", "pieces"}
+
+    size, white, black = spec["size"], spec["white"], spec["black"]
+    n_rows, n_cols = size["h"], size["w"]
+
+    # moves are packed with room for only so many squares, and columns are
+    # named by single letters (see move.py), so a larger board would load
+    # and then fail on its first far move or write squares no one can read
+    if not (0 < n_rows <= MAX_ROWS and 0 < n_cols <= MAX_COLS):
+        raise ValueError(
+            f"a {n_rows}x{n_cols} board is outside 1x1 to {MAX_ROWS}x{MAX_COLS}")
+
+    assert PieceType.KING.value in white and PieceType.KING.value in black
+
+    placement = [
+        (PieceType.KING, Color.WHITE, Coord.from_str(white[PieceType.KING.value])),
+        (PieceType.KING, Color.BLACK, Coord.from_str(black[PieceType.KING.value])),
+    ]
+    for color, dct in [(Color.WHITE, white), (Color.BLACK, black)]:
+        for name, locs in [(n, ls) for (n, ls) in dct.items() if n != PieceType.KING.value]:
+            for loc in locs:
+                placement.append((PieceType(name), color, Coord.from_str(loc)))
+
+    for _, _, coord in placement:
+        if not (0 <= coord.r < n_rows and 0 <= coord.c < n_cols):
+            raise ValueError(f"{coord} is off the board")
+
+    pieces = tuple(
+        (PieceType(name), notation)
+        for name, notation in spec.get("pieces", dict()).items()
+    )
+    for _, notation in pieces:
+        # fail on load rather than on the first move
+        rules(notation)
+
+    return Spec(n_rows, n_cols, tuple(placement), pieces, spec_seed(spec_text))
+
+
+# by content hash, for the life of the process
+_specs: dict[str, Spec] = dict()
+# by absolute path, with the file's modification time and size when read, so
+# loading an unchanged file again does not even read it
+_loaded: dict[str, tuple[int, int, Spec]] = dict()
+
+
+def _cache_path(spec_path: str, digest: str) -> str:
+    return os.path.join(
+        os.path.dirname(os.path.abspath(spec_path)), CACHE_DIR,
+        f"{digest}.v{CACHE_VERSION}.json")
+
+
+def _to_data(spec: Spec) -> dict:
+    # plain data only: a cache file is read back as data, never run as code
+    return {
+        "n_rows": spec.n_rows,
+        "n_cols": spec.n_cols,
+        "placement": [
+            [type.value, color.value, coord.r, coord.c]
+            for type, color, coord in spec.placement
+        ],
+        "pieces": [[type.value, notation] for type, notation in spec.pieces],
+        "seed": spec.seed,
+    }
+
+
+def _from_data(data: dict) -> Spec:
+    return Spec(
+        int(data["n_rows"]),
+        int(data["n_cols"]),
+        tuple(
+            (PieceType(type), Color(color), Coord(int(r), int(c)))
+            for type, color, r, c in data["placement"]
+        ),
+        tuple(
+            (PieceType(type), str(notation))
+            for type, notation in data["pieces"]
+        ),
+        int(data["seed"]),
+    )
+
+
+def _read_cache(path: str) -> Optional[Spec]:
+    try:
+        with open(path) as cache_file:
+            return _from_data(json.load(cache_file))
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def _write_cache(path: str, spec: Spec):
+    # written to a temporary file and renamed, so a concurrent reader never
+    # sees half a file; a read-only spec directory just means no caching
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(tmp, "w") as cache_file:
+            json.dump(_to_data(spec), cache_file)
+        os.replace(tmp, path)
+    except OSError:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+
+
+def load_spec(spec_path: str) -> Spec:
+    """
+    The spec in the given file, parsed and validated at most once per
+    content: loading a file again in the same process costs a stat while it
+    is unchanged and a read and hash otherwise, and later processes read the
+    compiled form from __speccache__ next to the spec instead of validating
+    it again.
+    """
+    if not spec_path.endswith(".json"):
+        raise ValueError()
+
+    abspath = os.path.abspath(spec_path)
+    stat = os.stat(abspath)
+    loaded = _loaded.get(abspath)
+    if loaded is not None and loaded[:2] == (stat.st_mtime_ns, stat.st_size):
+        return loaded[2]
+
+    with open(abspath) as spec_file:
+        spec_text = spec_file.read()
+    digest = hashlib.sha256(spec_text.encode()).hexdigest()
+
+    spec = _specs.get(digest)
+    if spec is None:
+        path = _cache_path(abspath, digest)
+        spec = _read_cache(path)
+        if spec is None:
+            spec = parse_spec(spec_text)
+            _write_cache(path, spec)
+        _specs[digest] = spec
+
+    _loaded[abspath] = (stat.st_mtime_ns, stat.st_size, spec)
+    return spec
@@ -0,0 +1,38 @@
+import hashlib
+from functools import cache
+from random import Random
+from .color.color import Color
+from .piece import PieceType
+
+
+def spec_seed(spec_text: str) -> int:
+    # stable across processes, unlike hash(), so keys can be shared
+    return int.from_bytes(
+        hashlib.sha256(spec_text.encode()).digest()[:8], "big")
+
+
+class Zobrist:
+    """
+    64-bit Zobrist keys for one spec: one per (color, piece type, square) and
+    one for black to move. A position's key is the XOR of the keys of all of
+    its pieces, plus the side key when black has the turn.
+    """
+    pieces: dict[tuple[Color, PieceType], list[list[int]]]
+    side: int
+
+    def __init__(self, n_rows: int, n_cols: int, seed: int):
+        rng = Random(seed)
+        self.pieces = {
+            (color, type): [
+                [rng.getrandbits(64) for _ in range(n_cols)]
+                for _ in range(n_rows)
+            ]
+            for color in Color
+            for type in PieceType
+        }
+        self.side = rng.getrandbits(64)
+
+
+@cache
+def zobrist(n_rows: int, n_cols: int, seed: int) -> Zobrist:
+    return Zobrist(n_rows, n_cols, seed)
@@ -7,19 +7,24 @@ from .entities.piece import King
 
 class State:
     spec: str
+    board_cls: type[Board]
     board: Board
     pov: Color
     has_turn: Color
     turn_no: int
     winner: Optional[Color]
 
-    def __init__(self, spec: str, color: Color):
+    def __init__(self, spec: str, color: Color, board_cls: type[Board] = Board):
         self.spec = spec
+        self.board_cls = board_cls
         self.pov = color
         self.reset()
     
+    def board_copy(self) -> Board:
+        return self.board.copy()
+
     def reset(self):
-        self.board = Board(self.spec)
+        self.board = self.board_cls.from_spec(self.spec)
         self.has_turn = Color.WHITE
         self.turn_no = 0
         self.winner = None
@@ -31,12 +36,32 @@ class State:
         self.board.move_piece(move.fr, move.to)
         self.pass_turn()
 
+    def replay(self, turns: list[tuple[Optional[Move], bool]]):
+        """
+        Plays the given turns, (move, resign) pairs as players return them,
+        on from the current position, trusting them like make_move does.
+        """
+        for move, resign in turns:
+            if self.is_game_over():
+                break
+            if resign:
+                self.resign_player(self.has_turn)
+            elif move is None:
+                self.pass_turn()
+            else:
+                self.make_move(move)
+
     def resign_player(self, color: Color):
         self.winner = Color.other(color)
     
     def pass_turn(self):
         self.has_turn = Color.other(self.has_turn)
         self.turn_no += 1
+        self.board.pass_turn()
+
+    @property
+    def key(self) -> int:
+        return self.board.key
     
     def is_game_over(self) -> bool:
         return self.winner is not None
@@ -0,0 +1,472 @@
+import argparse
+import contextlib
+import importlib
+import inspect
+import io
+import itertools
+import json
+import math
+import os
+import random
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Optional
+from frontend import NullFrontend
+from game import Game
+from record import RecordWriter, open_archive
+from thread import ThreadWithReturnValue
+from player import Player, PlayerMCTS, PlayerSearchAI
+from state.entities.color.color import Color
+from state.entities.move.move import Move, SpecialMove
+from state.state import State
+
+
+# engines by short name; anything else is read as module.Class
+ENGINES: dict[str, type[Player]] = {
+    "search": PlayerSearchAI,
+    "mcts": PlayerMCTS,
+}
+
+# two-sided 95% confidence
+Z = 1.96
+
+
+def parse_engine(text: str) -> tuple[str, type[Player], dict]:
+    """
+    An engine given as name[:key=value,...], e.g. search:max_depth=4 or
+    mymodule.MyPlayer:ponder=true. Values are read as JSON where possible
+    and kept as strings otherwise.
+    """
+    name, _, args = text.partition(":")
+
+    if name in ENGINES:
+        cls = ENGINES[name]
+    else:
+        module, _, attr = name.rpartition(".")
+        if not module:
+            raise ValueError(f"unknown engine {name!r}")
+        cls = getattr(importlib.import_module(module), attr)
+    if not (isinstance(cls, type) and issubclass(cls, Player)):
+        raise ValueError(f"{name!r} is not a Player")
+
+    kwargs = dict()
+    for arg in filter(None, args.split(",")):
+        key, _, value = arg.partition("=")
+        try:
+            kwargs[key] = json.loads(value)
+        except json.JSONDecodeError:
+            kwargs[key] = value
+
+    return text, cls, kwargs
+
+
+def make_player(
+        cls: type[Player], kwargs: dict, color: Color,
+        budget: Optional[float]) -> Player:
+    kwargs = dict(kwargs)
+    if budget is not None and "budget" in inspect.signature(cls).parameters:
+        kwargs.setdefault("budget", budget)
+    return cls(color, **kwargs)
+
+
+class Referee(Player):
+    """
+    Stands in for an engine in a game and holds it to the rules: a move that
+    raises, is not legal in the position or runs over the time limit is
+    turned into a resignation, and the reason is kept. The engine thinks in
+    a thread of its own, so one that hangs loses on time when the limit
+    runs out rather than stalling the tournament; the thread cannot be
+    killed and is left to finish (or not) in the background.
+    """
+    color: Color
+    name: str
+    engine: Player
+    limit: Optional[float]
+    # whether the engine may still jump its corvette
+    hyperdrive: bool
+    fault: Optional[str]
+    detail: Optional[str]
+    moves: int
+    thinking: float
+    slowest: float
+
+    def __init__(self, name: str, engine: Player, limit: Optional[float]):
+        self.color = engine.color
+        self.thinks = engine.thinks
+        self.name = name
+        self.engine = engine
+        self.limit = limit
+        self.hyperdrive = True
+        self.fault = None
+        self.detail = None
+        self.moves = 0
+        self.thinking = 0.0
+        self.slowest = 0.0
+
+    def _forfeit(self, fault: str, detail: str) -> tuple[Optional[Move], bool]:
+        self.fault = fault
+        self.detail = detail
+        return None, True
+
+    def _think(self, state: State):
+        # (move, resign) or the traceback it raised, for the referee to read
+        try:
+            return self.engine.get_move(state), None
+        except Exception:
+            return None, traceback.format_exc(limit=-3)
+
+    def get_move(self, state: State) -> tuple[Optional[Move], bool]:
+        start = time.perf_counter()
+        thread = ThreadWithReturnValue(target=self._think, args=(state,))
+        thread.daemon = True
+        thread.start()
+        thread.join(self.limit)
+        if thread.is_alive():
+            self.moves += 1
+            self.slowest = max(self.slowest, time.perf_counter() - start)
+            return self._forfeit("time", f"no move after {self.limit:.3f}s")
+        played, error = thread.join()
+        if error is not None:
+            return self._forfeit("crash", error)
+        move, resign = played
+        seconds = time.perf_counter() - start
+
+        self.moves += 1
+        self.thinking += seconds
+        self.slowest = max(self.slowest, seconds)
+
+        if self.limit is not None and seconds > self.limit:
+            return self._forfeit("time", f"{seconds:.3f}s for one move")
+        if move is not None and not resign and move.id not in {
+            legal.id
+            for legal in state.board.position(self.color, self.hyperdrive).legal
+        }:
+            return self._forfeit("illegal", str(move))
+        if move is not None and move.special is SpecialMove.HYPERDRIVE:
+            self.hyperdrive = False
+        return move, resign
+
+    def ponder_begin(self, state: State):
+        try:
+            self.engine.ponder_begin(state)
+        except Exception:
+            self.fault = "crash"
+            self.detail = traceback.format_exc(limit=-3)
+
+    def ponder_end(self):
+        try:
+            self.engine.ponder_end()
+        except Exception:
+            self.fault = self.fault or "crash"
+            self.detail = self.detail or traceback.format_exc(limit=-3)
+
+    def play_again(self) -> bool:
+        return False
+
+    def rematch_rejected(self):
+        pass
+
+    def game_begin(self):
+        self.engine.game_begin()
+
+    def game_end(self, state: State):
+        self.engine.game_end(state)
+
+    def round_begin(self):
+        self.hyperdrive = True
+        self.engine.round_begin()
+
+    def round_end(self):
+        self.engine.round_end()
+
+
+def play_game(job: dict) -> dict:
+    """
+    Plays one game in a worker process and returns its record. Engine output
+    is swallowed, so workers do not interleave their logs.
+    """
+    random.seed(job["seed"])
+    engines = {
+        color: parse_engine(job[color.name.lower()]) for color in Color
+    }
+    limit = None if job["time"] is None else job["time"] + job["grace"]
+
+    start = time.perf_counter()
+    referees = dict()
+    error = None
+    moves = io.StringIO() if job["record"] else None
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        try:
+            for color, (name, cls, kwargs) in engines.items():
+                referees[color] = Referee(
+                    name, make_player(cls, kwargs, color, job["time"]), limit)
+            game = Game(
+                job["spec"], referees[Color.WHITE], referees[Color.BLACK],
+                NullFrontend(), job["max_turns"],
+                None if moves is None else RecordWriter(moves))
+            game.play()
+            winner = game.state.winner
+            turns = game.state.turn_no
+        except Exception:
+            # outside any one move, e.g. an engine that cannot be built:
+            # charged to nobody, the game is void
+            error = traceback.format_exc(limit=-3)
+            winner = None
+            turns = 0
+
+    faults = {
+        color: referees[color].fault if color in referees else None
+        for color in Color
+    }
+    result = (
+        None if error is not None else
+        "1-0" if winner is Color.WHITE else
+        "0-1" if winner is Color.BLACK else
+        "1/2-1/2"
+    )
+    reason = (
+        "error" if error is not None else
+        "max_turns" if winner is None and job["max_turns"] is not None
+        and turns >= job["max_turns"] else
+        "draw" if winner is None else
+        faults[Color.other(winner)] or "win"
+    )
+
+    record = {
+        "type": "game",
+        "game": job["game"],
+        "white": job["white"],
+        "black": job["black"],
+        "result": result,
+        "reason": reason,
+        "turns": turns,
+        "seconds": time.perf_counter() - start,
+        "seed": job["seed"],
+    }
+    for color in Color:
+        side = color.name.lower()
+        referee = referees.get(color)
+        record[f"{side}_fault"] = faults[color]
+        record[f"{side}_moves"] = 0 if referee is None else referee.moves
+        record[f"{side}_slowest"] = 0.0 if referee is None else referee.slowest
+        if referee is not None and referee.detail is not None:
+            record[f"{side}_detail"] = referee.detail
+    if error is not None:
+        record["error"] = error
+    if moves is not None:
+        # written to the archive by the main process, not to --out
+        record["record"] = moves.getvalue()
+    return record
+
+
+def elo(wins: int, draws: int, losses: int) -> dict:
+    """
+    Elo difference implied by a score, with a 95% interval from the standard
+    error of the per-game scores. Bounds at a 0% or 100% score are None, as
+    are both bounds when every game ended the same way: the per-game scores
+    then have no spread to estimate an interval from.
+    """
+    n = wins + draws + losses
+    if n == 0:
+        return {"elo": None, "low": None, "high": None, "score": None}
+
+    def to_elo(s: float) -> Optional[float]:
+        if s <= 0 or s >= 1:
+            return None
+        return -400 * math.log10(1 / s - 1)
+
+    score = (wins + draws / 2) / n
+    variance = (
+        wins * (1 - score) ** 2 + draws * (0.5 - score) ** 2 +
+        losses * score ** 2
+    ) / n
+    if variance == 0:
+        return {"elo": to_elo(score), "low": None, "high": None, "score": score}
+    margin = Z * math.sqrt(variance / n)
+
+    return {
+        "elo": to_elo(score),
+        "low": to_elo(score - margin),
+        "high": to_elo(score + margin),
+        "score": score,
+    }
+
+
+def summarize(records: list[dict], engines: list[str], seconds: float) -> dict:
+    pairs = []
+    for a, b in itertools.combinations(engines, 2):
+        wins = draws = losses = 0
+        for record in records:
+            if {record["white"], record["black"]} != {a, b} or record["result"] is None:
+                continue
+            if record["result"] == "1/2-1/2":
+                draws += 1
+            elif (record["result"] == "1-0") == (record["white"] == a):
+                wins += 1
+            else:
+                losses += 1
+        pairs.append({
+            "engine": a,
+            "opponent": b,
+            "wins": wins,
+            "draws": draws,
+            "losses": losses,
+            **elo(wins, draws, losses),
+        })
+
+    faults = {
+        engine: {"crash": 0, "illegal": 0, "time": 0} for engine in engines
+    }
+    for record in records:
+        for side in ("white", "black"):
+            fault = record[f"{side}_fault"]
+            if fault is not None:
+                faults[record[side]][fault] += 1
+
+    return {
+        "type": "summary",
+        "games": len(records),
+        "void": sum(record["result"] is None for record in records),
+        "seconds": seconds,
+        "games_per_second": len(records) / seconds if seconds > 0 else None,
+        "pairs": pairs,
+        "faults": faults,
+    }
+
+
+def report(summary: dict):
+    print(
+        f"{summary['games']} games in {summary['seconds']:.1f}s " +
+        f"({summary['games_per_second'] or 0:.2f} games/s)" +
+        (f", {summary['void']} void" if summary["void"] else "")
+    )
+
+    def fmt(x: Optional[float]) -> str:
+        # adding 0 turns -0.0 into 0.0
+        return "?" if x is None else f"{x + 0:+.0f}"
+
+    for pair in summary["pairs"]:
+        print(
+            f"  {pair['engine']} vs {pair['opponent']}: " +
+            f"+{pair['wins']} ={pair['draws']} -{pair['losses']}, " +
+            f"Elo {fmt(pair['elo'])} [{fmt(pair['low'])}, {fmt(pair['high'])}]"
+        )
+    for engine, counts in summary["faults"].items():
+        if any(counts.values()):
+            print(
+                f"  {engine}: {counts['crash']} crashes, " +
+                f"{counts['illegal']} illegal moves, {counts['time']} time losses"
+            )
+
+
+def jobs(args) -> list[dict]:
+    rng = random.Random(args.seed)
+    pairs = list(itertools.combinations(args.engine, 2))
+    return [
+        {
+            "game": i,
+            "spec": args.spec,
+            # alternate colors within each pairing
+            "white": a if (i // len(pairs)) % 2 == 0 else b,
+            "black": b if (i // len(pairs)) % 2 == 0 else a,
+            "time": args.time,
+            "grace": args.grace,
+            "max_turns": args.max_turns,
+            "record": args.record is not None,
+            "seed": rng.getrandbits(32),
+        }
+        for i, (a, b) in zip(
+            range(args.games * len(pairs)), itertools.cycle(pairs))
+    ]
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        prog=argv[0],
+        description="Play engines against each other without a GUI or " +
+                    "network and estimate their relative strength."
+    )
+    parser.add_argument(
+        "--engine", action="append", required=True,
+        help="engine as name[:key=value,...], name being one of " +
+             f"{', '.join(ENGINES)} or module.Class (at least two)")
+    parser.add_argument(
+        "--games", type=int, default=10,
+        help="games per pairing of engines, alternating colors")
+    parser.add_argument("--spec", default="./spec/standard.json")
+    parser.add_argument(
+        "--time", type=float, default=1.0,
+        help="seconds per move, given to engines that take a budget")
+    parser.add_argument(
+        "--grace", type=float, default=1.0,
+        help="seconds a move may run over --time before it loses on time")
+    parser.add_argument(
+        "--max-turns", type=int, default=300,
+        help="turns after which a game is drawn")
+    parser.add_argument(
+        "--workers", type=int, default=os.cpu_count(),
+        help="games played at once, one per process")
+    parser.add_argument("--seed", type=int, help="seed for per-game seeds")
+    parser.add_argument(
+        "--out", help="append one JSON record per game, then the summary")
+    parser.add_argument(
+        "--record", help="append the moves of every game to this archive")
+    args = parser.parse_args(argv[1:])
+
+    if len(set(args.engine)) < 2:
+        parser.error("give at least two different --engine")
+    for engine in args.engine:
+        try:
+            parse_engine(engine)
+        except (ValueError, ImportError, AttributeError) as e:
+            parser.error(str(e))
+    return args
+
+
+def main(argv):
+    args = parse_args(argv)
+    engines = list(dict.fromkeys(args.engine))
+    args.engine = engines
+
+    records = []
+    out = None if args.out is None else open(args.out, "a")
+    archive = None if args.record is None else open_archive(args.record, "a")
+    start = time.perf_counter()
+
+    try:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            futures = [pool.submit(play_game, job) for job in jobs(args)]
+            for future in as_completed(futures):
+                record = future.result()
+                if archive is not None:
+                    archive.write(record.pop("record"))
+                    archive.flush()
+                records.append(record)
+                print(
+                    f"game {record['game']}: {record['white']} - " +
+                    f"{record['black']} {record['result'] or 'void'} " +
+                    f"({record['reason']}, {record['turns']} turns)"
+                )
+                if out is not None:
+                    out.write(json.dumps(record) + "\n")
+                    out.flush()
+
+        summary = summarize(records, engines, time.perf_counter() - start)
+        report(summary)
+        if out is not None:
+            out.write(json.dumps(summary) + "\n")
+    finally:
+        if out is not None:
+            out.close()
+        if archive is not None:
+            archive.close()
+
+    faults = sum(sum(counts.values()) for counts in summary["faults"].values())
+    sys.exit(1 if faults or summary["void"] else 0)
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,136 @@
+import os
+import threading
+import unittest
+from typing import Callable, Optional
+from player import Player
+from state.entities.color.color import Color
+from state.entities.move.coord import Coord
+from state.entities.move.move import Move, SpecialMove
+from state.state import State
+from tournament import Referee, elo
+
+SPEC = os.path.join(os.path.dirname(__file__), "spec", "standard.json")
+
+
+class _Engine(Player):
+    """Answers every move with think(state)."""
+    color: Color
+    think: Callable[[State], tuple[Optional[Move], bool]]
+
+    def __init__(self, color: Color, think: Callable[[State], tuple[Optional[Move], bool]]):
+        self.color = color
+        self.think = think
+
+    def get_move(self, state: State) -> tuple[Optional[Move], bool]:
+        return self.think(state)
+
+    def play_again(self) -> bool:
+        return False
+
+    def rematch_rejected(self):
+        pass
+
+    def game_begin(self):
+        pass
+
+    def game_end(self, state: State):
+        pass
+
+    def round_begin(self):
+        pass
+
+    def round_end(self):
+        pass
+
+
+def _jump(state: State) -> tuple[Optional[Move], bool]:
+    # the white king to the first empty square it can jump to
+    return state.board.hyperdrive_moves(Color.WHITE)[0], False
+
+
+class RefereeTest(unittest.TestCase):
+    def setUp(self):
+        self.state = State(SPEC, Color.WHITE)
+
+    def test_legal_move(self):
+        move = self.state.board.position(Color.WHITE).legal[0]
+        referee = Referee("w", _Engine(Color.WHITE, lambda s: (move, False)), 1.0)
+        self.assertEqual(referee.get_move(self.state), (move, False))
+        self.assertIsNone(referee.fault)
+        self.assertEqual(referee.moves, 1)
+
+    def test_hung_engine_loses_on_time(self):
+        release = threading.Event()
+        referee = Referee("w", _Engine(Color.WHITE, lambda s: (
+            release.wait(), (None, False))[1]), 0.05)
+        try:
+            self.assertEqual(referee.get_move(self.state), (None, True))
+            self.assertEqual(referee.fault, "time")
+        finally:
+            release.set()
+
+    def test_illegal_move(self):
+        move = Move(Coord.from_str("a1"), Coord.from_str("a8"), False)
+        referee = Referee("w", _Engine(Color.WHITE, lambda s: (move, False)), None)
+        self.assertEqual(referee.get_move(self.state), (None, True))
+        self.assertEqual(referee.fault, "illegal")
+
+    def test_crash(self):
+        referee = Referee("w", _Engine(Color.WHITE, lambda s: 1 / 0), None)
+        self.assertEqual(referee.get_move(self.state), (None, True))
+        self.assertEqual(referee.fault, "crash")
+        self.assertIn("ZeroDivisionError", referee.detail)
+
+    def test_hyperdrive_once_a_round(self):
+        referee = Referee("w", _Engine(Color.WHITE, _jump), None)
+        move, resign = referee.get_move(self.state)
+        self.assertIs(move.special, SpecialMove.HYPERDRIVE)
+        self.assertFalse(resign)
+        self.assertIsNone(referee.fault)
+
+        # the second jump is one too many
+        self.assertEqual(referee.get_move(self.state), (None, True))
+        self.assertEqual(referee.fault, "illegal")
+
+        # and a new round brings the corvette's drive back
+        referee.fault = None
+        referee.round_begin()
+        self.assertFalse(referee.get_move(self.state)[1])
+        self.assertIsNone(referee.fault)
+
+
+class EloTest(unittest.TestCase):
+    def test_no_games(self):
+        self.assertEqual(
+            elo(0, 0, 0),
+            {"elo": None, "low": None, "high": None, "score": None})
+
+    def test_all_draws(self):
+        self.assertEqual(
+            elo(0, 10, 0), {"elo": 0.0, "low": None, "high": None, "score": 0.5})
+
+    def test_clean_sweeps(self):
+        for wins, losses, score in ((10, 0, 1.0), (0, 10, 0.0)):
+            with self.subTest(wins=wins, losses=losses):
+                self.assertEqual(
+                    elo(wins, 0, losses),
+                    {"elo": None, "low": None, "high": None, "score": score})
+
+    def test_even_score(self):
+        result = elo(5, 0, 5)
+        self.assertEqual(result["elo"], 0.0)
+        self.assertLess(result["low"], 0)
+        self.assertGreater(result["high"], 0)
+        self.assertAlmostEqual(result["low"], -result["high"])
+
+    def test_interval_narrows(self):
+        few = elo(6, 2, 2)
+        many = elo(60, 20, 20)
+        self.assertAlmostEqual(few["elo"], many["elo"])
+        self.assertLess(many["high"] - many["low"], few["high"] - few["low"])
+        self.assertLess(many["low"], many["elo"])
+        self.assertLess(many["elo"], many["high"])
+
+
+if __name__ == "__main__":
+    unittest.main()
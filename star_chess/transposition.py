@@ -0,0 +1,128 @@
+from array import array
+from enum import IntEnum
+from typing import Optional
+
+
+class Bound(IntEnum):
+    EXACT = 1
+    LOWER = 2
+    UPPER = 3
+
+
+# entries are a 64-bit key plus 64 bits of packed data:
+#   bits  0- 7  depth
+#   bits  8- 9  bound
+#   bits 10-41  score, offset to be non-negative
+#   bits 42-63  best move as its Move.id, which packs fr.r (5 bits), fr.c (6),
+#               to.r (5), to.c (6), so boards of up to 32 rows by 64 columns;
+#               all ones is no move
+ENTRY_BYTES = 16
+SLOTS = 2
+SCORE_OFFSET = 1 << 31
+NO_MOVE = (1 << 22) - 1
+
+MoveId = int
+
+
+def pack_move(move: Optional[MoveId]) -> int:
+    return NO_MOVE if move is None else move
+
+
+def unpack_move(packed: int) -> Optional[MoveId]:
+    return None if packed == NO_MOVE else packed
+
+
+class TranspositionTable:
+    """
+    Fixed-size table of search results keyed by Zobrist key.
+
+    Storage is two flat unsigned 64-bit arrays (keys and packed data), split
+    into buckets of two slots. The first slot keeps the deepest result seen
+    for its bucket; the second is always replaced, so recent shallow results
+    still get cached. An empty slot has data 0, which no packed entry has
+    since the score offset keeps those bits non-zero.
+    """
+    n_buckets: int
+    keys: array
+    data: array
+    probes: int
+    hits: int
+    misses: int
+    collisions: int
+    stores: int
+
+    def __init__(self, budget_bytes: int):
+        self.n_buckets = max(1, budget_bytes // (ENTRY_BYTES * SLOTS))
+        self.keys = array("Q", bytes(8 * SLOTS * self.n_buckets))
+        self.data = array("Q", bytes(8 * SLOTS * self.n_buckets))
+        self.probes = 0
+        self.hits = 0
+        self.misses = 0
+        self.collisions = 0
+        self.stores = 0
+
+    @property
+    def size_bytes(self) -> int:
+        return ENTRY_BYTES * SLOTS * self.n_buckets
+
+    def clear(self):
+        n = SLOTS * self.n_buckets
+        self.keys = array("Q", bytes(8 * n))
+        self.data = array("Q", bytes(8 * n))
+
+    def probe(self, key: int) -> Optional[tuple[int, Bound, int, Optional[MoveId]]]:
+        """(depth, bound, score, best move) for the key, if it is stored."""
+        self.probes += 1
+        i = (key % self.n_buckets) * SLOTS
+        for slot in (i, i + 1):
+            if self.keys[slot] == key and self.data[slot] != 0:
+                self.hits += 1
+                d = self.data[slot]
+                return (
+                    d & 255,
+                    Bound(d >> 8 & 3),
+                    (d >> 10 & 0xFFFFFFFF) - SCORE_OFFSET,
+                    unpack_move(d >> 42),
+                )
+        self.misses += 1
+        return None
+
+    def store(
+            self, key: int, depth: int, bound: Bound, score: int,
+            move: Optional[MoveId]):
+        self.stores += 1
+        d = (
+            min(depth, 255) | bound << 8 |
+            (score + SCORE_OFFSET) << 10 |
+            pack_move(move) << 42
+        )
+        i = (key % self.n_buckets) * SLOTS
+
+        # same position already in the depth-preferred slot: refresh it there
+        # if this result is at least as deep, rather than duplicating it
+        if self.keys[i] == key and self.data[i] != 0:
+            if depth >= self.data[i] & 255:
+                self.data[i] = d
+                return
+        elif self.data[i] == 0 or depth >= self.data[i] & 255:
+            if self.data[i] != 0:
+                self.collisions += 1
+            self.keys[i] = key
+            self.data[i] = d
+            return
+
+        if self.data[i + 1] != 0 and self.keys[i + 1] != key:
+            self.collisions += 1
+        self.keys[i + 1] = key
+        self.data[i + 1] = d
+
+    def stats(self) -> dict[str, float]:
+        return {
+            "size_bytes": self.size_bytes,
+            "probes": self.probes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "collisions": self.collisions,
+            "stores": self.stores,
+            "hit_rate": self.hits / self.probes if self.probes else 0.0,
+        }
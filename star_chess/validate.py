@@ -0,0 +1,282 @@
+import argparse
+import json
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Iterator, Optional
+from record import GameRecord, format_turn, open_archive, read_records
+from state.entities.color.color import Color
+from state.entities.move.move import Move, SpecialMove
+from state.entities.piece import King
+from state.state import State
+
+
+# what can be wrong with a recorded game
+KINDS = {
+    "illegal": "move the piece on its from square cannot make",
+    "self-check": "move that leaves the mover's own corvette in check",
+    "capture-flag": "move whose capture flag does not match the board",
+    "hyperdrive": "second hyperdrive jump, or one onto an occupied square",
+    "pass-in-check": "pass while in check",
+    "after-end": "turn after a corvette was captured or a player forfeited",
+    "result": "recorded result that the moves do not lead to",
+    "spec": "spec that cannot be loaded",
+}
+
+
+def check_move(
+        state: State, move: Move, hyperdrive: bool) -> Optional[str]:
+    """
+    What is wrong with the given move for the side to move, if anything.
+    Only the moving piece's own moves are generated, so this is much cheaper
+    than listing every legal move.
+    """
+    board = state.board
+    color = state.has_turn
+    piece = board.piece_at(move.fr)
+
+    if piece is None or piece.color is not color:
+        return "illegal"
+
+    if move.special is SpecialMove.HYPERDRIVE:
+        if not hyperdrive or not isinstance(piece, King) or \
+                board.piece_at(move.to) is not None:
+            return "hyperdrive"
+        expected = Move(move.fr, move.to, False, SpecialMove.HYPERDRIVE)
+    else:
+        expected = piece.can_move_to(board.board, move.to)
+        if expected is None:
+            return "illegal"
+
+    board.make(expected)
+    check = board.exists_check(color)
+    board.unmake()
+    if check:
+        return "self-check"
+
+    if expected.capture != move.capture:
+        return "capture-flag"
+    return None
+
+
+def validate_game(record: GameRecord, spec_dir: str) -> tuple[int, list[dict]]:
+    """
+    Replays a recorded game through the rules. Returns the number of turns
+    checked and what was found, as (turn, kind) dicts. A move its piece
+    cannot make ends the replay; one that is only mis-flagged or exposes the
+    mover's corvette is played on, as it was in the game.
+    """
+    try:
+        state = State(os.path.join(spec_dir, record.tags.get("Spec", "")),
+                      Color.WHITE)
+    except (OSError, ValueError, AssertionError, KeyError):
+        return 0, [{"turn": None, "kind": "spec"}]
+
+    hyperdrive = {color: True for color in Color}
+    issues = []
+    checked = 0
+
+    def issue(turn: int, kind: str, move: Optional[Move], resign: bool):
+        issues.append({
+            "turn": turn,
+            "kind": kind,
+            "move": format_turn(move, resign),
+        })
+
+    for turn, (move, resign) in enumerate(record.turns):
+        if state.is_game_over():
+            issue(turn, "after-end", move, resign)
+            break
+        checked += 1
+
+        if resign:
+            state.resign_player(state.has_turn)
+        elif move is None:
+            if state.board.exists_check(state.has_turn):
+                issue(turn, "pass-in-check", move, resign)
+            state.pass_turn()
+        else:
+            kind = check_move(state, move, hyperdrive[state.has_turn])
+            if kind is not None:
+                issue(turn, kind, move, resign)
+            if kind in ("illegal", "hyperdrive"):
+                break
+            if move.special is SpecialMove.HYPERDRIVE:
+                hyperdrive[state.has_turn] = False
+            state.make_move(move)
+
+    winner = {"1-0": Color.WHITE, "0-1": Color.BLACK}.get(record.result)
+    if record.result != "*" and state.winner is not winner and (
+        winner is not None or state.is_game_over()
+    ):
+        issues.append({"turn": len(record.turns), "kind": "result"})
+
+    return checked, issues
+
+
+def _shard_lines(path: str, start: int, end: Optional[int]) -> Iterator[str]:
+    """
+    The lines of the games that belong to the byte range [start, end) of an
+    archive. Every game but the first follows a blank line, and a game
+    belongs to the range that blank line starts in, so neighbouring ranges
+    split the archive without overlap however the bytes fall.
+    """
+    with open(path, "rb") as archive:
+        pos = 0
+        if start > 0:
+            # on to the first line starting in the range
+            archive.seek(start - 1)
+            archive.readline()
+            pos = archive.tell()
+
+        started = start == 0
+        # offset of the previous line, if it was blank
+        blank = None
+
+        for line in archive:
+            # past the range, unless a blank line in it may yet start a game
+            if end is not None and not started and pos >= end and (
+                blank is None or blank >= end
+            ):
+                return
+            if blank is not None and line.startswith(b"["):
+                if end is not None and blank >= end:
+                    return
+                started = True
+            if started:
+                yield line.decode()
+            blank = pos if not line.strip() else None
+            pos += len(line)
+
+
+def validate_shard(job: tuple[str, int, Optional[int], str]) -> dict:
+    path, start, end, spec_dir = job
+
+    if path.endswith(".gz"):
+        stream = open_archive(path)
+        lines = stream
+    else:
+        stream = None
+        lines = _shard_lines(path, start, end)
+
+    t0 = time.perf_counter()
+    games = positions = 0
+    issues = []
+    try:
+        for record in read_records(lines):
+            checked, found = validate_game(record, spec_dir)
+            games += 1
+            positions += checked
+            for issue in found:
+                issues.append({
+                    "type": "issue",
+                    "archive": path,
+                    "white": record.tags.get("White"),
+                    "black": record.tags.get("Black"),
+                    "date": record.tags.get("Date"),
+                    **issue,
+                })
+    except ValueError as e:
+        # a malformed archive: report it, keep what was checked
+        issues.append({
+            "type": "issue", "archive": path, "kind": "format", "error": str(e)
+        })
+    finally:
+        if stream is not None:
+            stream.close()
+
+    return {
+        "games": games,
+        "positions": positions,
+        "seconds": time.perf_counter() - t0,
+        "issues": issues,
+    }
+
+
+def shards(paths: list[str], shard_bytes: int, spec_dir: str) -> list[tuple]:
+    jobs = []
+    for path in paths:
+        size = os.path.getsize(path)
+        if path.endswith(".gz") or size <= shard_bytes:
+            jobs.append((path, 0, None, spec_dir))
+            continue
+        bounds = list(range(0, size, shard_bytes))
+        for i, start in enumerate(bounds):
+            end = bounds[i + 1] if i + 1 < len(bounds) else None
+            jobs.append((path, start, end, spec_dir))
+    return jobs
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        prog=argv[0],
+        description="Replay archived game records through the rules and " +
+                    "report moves that should not have been accepted."
+    )
+    parser.add_argument("archives", nargs="+", help="game record archives")
+    parser.add_argument(
+        "--spec-dir", default="./spec",
+        help="where the specs named by the records' Spec tags are")
+    parser.add_argument(
+        "--workers", type=int, default=os.cpu_count(),
+        help="shards validated at once, one per process")
+    parser.add_argument(
+        "--shard-mb", type=float, default=16,
+        help="split uncompressed archives into shards of about this size")
+    parser.add_argument(
+        "--show", type=int, default=20, help="issues to print, at most")
+    parser.add_argument("--out", help="append every issue as a JSON line")
+    return parser.parse_args(argv[1:])
+
+
+def main(argv):
+    args = parse_args(argv)
+    jobs = shards(
+        args.archives, max(1, int(args.shard_mb * (1 << 20))), args.spec_dir)
+
+    start = time.perf_counter()
+    games = positions = 0
+    kinds = Counter()
+    shown = 0
+    out = None if args.out is None else open(args.out, "a")
+
+    try:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            futures = [pool.submit(validate_shard, job) for job in jobs]
+            for future in as_completed(futures):
+                result = future.result()
+                games += result["games"]
+                positions += result["positions"]
+                for issue in result["issues"]:
+                    kinds[issue["kind"]] += 1
+                    if shown < args.show:
+                        shown += 1
+                        print(
+                            f"{issue['archive']}: {issue.get('white')} - " +
+                            f"{issue.get('black')} {issue.get('date')}, " +
+                            f"turn {issue.get('turn')}: {issue['kind']}" +
+                            (f" ({issue['move']})" if "move" in issue else "") +
+                            (f" ({issue['error']})" if "error" in issue else "")
+                        )
+                    if out is not None:
+                        out.write(json.dumps(issue) + "\n")
+    finally:
+        if out is not None:
+            out.close()
+
+    seconds = time.perf_counter() - start
+    print(
+        f"{games} games, {positions} positions in {seconds:.2f}s " +
+        f"({positions / seconds if seconds > 0 else 0:.0f} positions/s, " +
+        f"{len(jobs)} shards)"
+    )
+    for kind, count in kinds.most_common():
+        print(f"  {count} {kind}: {KINDS.get(kind, 'unreadable archive')}")
+
+    sys.exit(1 if kinds else 0)
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,61 @@
+import os
+import tempfile
+import unittest
+from record import GameRecord, RecordWriter, read_records
+from state.entities.move.coord import Coord
+from state.entities.move.move import Move
+from validate import _shard_lines, shards
+
+
+def _move(fr: str, to: str, capture: bool = False) -> Move:
+    return Move(Coord.from_str(fr), Coord.from_str(to), capture)
+
+
+def _archive(path: str, games: int):
+    # games of different lengths, so game boundaries fall on every residue
+    with open(path, "w", encoding="utf-8") as stream:
+        writer = RecordWriter(stream)
+        for i in range(games):
+            turns = [(_move("b2", "b3"), False), (_move("g7", "g6"), False)]
+            turns = turns[:i % 3] + [(None, False)] * (i % 2)
+            writer.write(GameRecord(
+                {"Spec": "standard.json", "White": f"w{i}", "Black": f"b{i}"},
+                turns, "*" if i % 4 else "1/2-1/2"))
+
+
+class ShardTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "games.txt")
+        _archive(self.path, 16)
+        self.size = os.path.getsize(self.path)
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def games(self, bounds: list[tuple[int, int]]) -> list[str]:
+        white = []
+        for start, end in bounds:
+            for record in read_records(_shard_lines(self.path, start, end)):
+                white.append(record.tags["White"])
+        return white
+
+    def test_split_at_every_offset(self):
+        expected = [f"w{i}" for i in range(16)]
+        for split in range(1, self.size):
+            with self.subTest(split=split):
+                self.assertEqual(
+                    self.games([(0, split), (split, None)]), expected)
+
+    def test_every_shard_size(self):
+        expected = [f"w{i}" for i in range(16)]
+        for size in range(1, self.size + 1):
+            jobs = shards([self.path], size, "./spec")
+            with self.subTest(size=size):
+                self.assertEqual(
+                    self.games([(start, end) for _, start, end, _ in jobs]),
+                    expected)
+
+
+if __name__ == "__main__":
+    unittest.main()